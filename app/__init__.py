@@ -4,6 +4,7 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_migrate import Migrate
 from config import config
+import gc
 
 # Initialize Flask extensions
 db = SQLAlchemy()
@@ -20,30 +21,90 @@ def create_app(config_name='default'):
     # Load config
     app.config.from_object(config[config_name])
     
+    # Connection pool sized from workers x threads, with pre-ping, recycling
+    # and a statement timeout, unless the config sets engine options itself
+    from app.utils.database import engine_options, dispose_engines_after_fork
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+    
     # Initialize extensions
     CORS(app, supports_credentials=True)
     db.init_app(app)
+    # Workers forked from a preloading master open their own connections
+    dispose_engines_after_fork(app)
     login_manager.init_app(app)
-    migrate.init_app(app, db)
+    # Autogenerate must leave the unmapped full-text search objects alone
+    from app.models.query import include_in_autogenerate
+    migrate.init_app(app, db, include_object=include_in_autogenerate)
+    
+    # Bounded thread pool for password hashing
+    from app.services.password_hasher import password_hasher
+    password_hasher.init_app(app)
+    
+    # Adaptive concurrency, retries and circuit breaker for model calls
+    from app.services.ai_governor import ai_governor
+    ai_governor.init_app(app)
+    
+    # Model provider chosen by AI_PROVIDER (Gemini, or the offline local provider)
+    from app.services.ai_provider import ai_provider
+    ai_provider.init_app(app)
+    
+    # Local specialization classifier used before escalating to the model
+    from app.services.classifier import specialization_classifier
+    specialization_classifier.init_app(app)
+    
+    # Cache of AI answers keyed by normalized question
+    from app.services.response_cache import response_cache
+    response_cache.init_app(app)
+    
+    # In-memory clinician roster for load-aware query assignment
+    from app.services.assignment import clinician_assigner
+    clinician_assigner.init_app(app)
+    
+    # Query events pushed to dashboards over Server-Sent Events
+    from app.services.events import event_bus
+    event_bus.init_app(app)
+    
+    # Cap on requests held open (streams, long-polls) per worker process
+    from app.services.stream_slots import stream_slots
+    stream_slots.init_app(app)
+    
+    # Per-user request limits declared with @rate_limit
+    from app.services.rate_limiter import rate_limiter
+    rate_limiter.init_app(app)
+    
+    # Background workers for the AI answer pipeline
+    from app.services.job_queue import ai_worker_pool
+    ai_worker_pool.init_app(app)
     
     # Register blueprints
     from app.routes.auth import auth_bp
     from app.routes.query import bp as query_bp
     from app.routes.clinician import bp as clinician_bp
+    from app.routes.events import bp as events_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(query_bp, url_prefix='/api/queries')
     app.register_blueprint(clinician_bp, url_prefix='/api/clinician')
+    app.register_blueprint(events_bp, url_prefix='/api/events')
+    
+    # JSON error responses (including 429s with rate limit headers)
+    from app.utils.error_handlers import register_error_handlers
+    register_error_handlers(app)
+    
+    # Register CLI commands
+    from app.cli import register_commands
+    register_commands(app)
     
-    # Check database connection and create tables
-    with app.app_context():
-        try:
-            db.engine.connect()
-            print("Database connection successful!")
-            db.create_all()
-        except Exception as e:
-            print(f"Database connection failed! Error: {e}")
-            raise e
+    # Schema is managed by `flask init-db` / `flask db upgrade`, not at boot.
+    # With APP_PRELOAD, load lazily imported dependencies now so a server
+    # that imports the app before forking shares them with every worker.
+    if app.config.get('APP_PRELOAD'):
+        ai_provider.preload()
+        specialization_classifier.preload()
+        # Move the preloaded heap out of the collector's reach: no full GC
+        # pass over it on the first requests, and no copy-on-write in workers
+        gc.collect()
+        gc.freeze()
     
     return app
 
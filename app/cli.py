@@ -0,0 +1,145 @@
+import click
+import time
+from flask.cli import AppGroup, with_appcontext
+from app.models.query import Query
+from app.utils.specialization import Specialization
+
+classifier_cli = AppGroup('classifier', help='Manage the local specialization classifier.')
+
+@classifier_cli.command('retrain')
+@click.option('--min-samples', default=50, show_default=True,
+              help='Refuse to train on fewer verified queries than this.')
+@click.option('--output', default=None, help='Model path (defaults to CLASSIFIER_MODEL_PATH).')
+def retrain_classifier(min_samples, output):
+    """Retrain the classifier from clinician-verified queries."""
+    from app.services.classifier import specialization_classifier
+
+    samples = Query.query.with_entities(Query.question, Query.category)\
+        .filter(Query.status == 'verified')\
+        .all()
+    if len(samples) < min_samples:
+        raise click.ClickException(
+            f'Only {len(samples)} verified queries available, need at least {min_samples}'
+        )
+
+    classifier = specialization_classifier.retrain(samples, output)
+    trained = sum(1 for row in classifier.centroids if row.any())
+    click.echo(f'Trained on {len(samples)} verified queries covering {trained} specializations')
+    click.echo(f'Model saved to {output or specialization_classifier.model_path}')
+
+ai_cache_cli = AppGroup('ai-cache', help='Inspect and invalidate the AI response cache.')
+
+@ai_cache_cli.command('invalidate')
+@click.option('--category', default=None, help='Only drop answers for this specialization.')
+def invalidate_ai_cache(category):
+    """Drop cached AI answers, e.g. after the prompt template changes."""
+    from app.services.response_cache import response_cache
+
+    if category is not None and category not in Specialization.list():
+        raise click.BadParameter(f'Unknown specialization: {category}', param_hint='--category')
+    if response_cache.backend is not None and response_cache.backend.name == 'memory':
+        click.echo('Note: the memory backend is per process; use DELETE /api/queries/cache '
+                   'to clear a running server.')
+    removed = response_cache.invalidate(category)
+    click.echo(f'Removed {removed} cached answers')
+
+@ai_cache_cli.command('stats')
+def ai_cache_stats():
+    """Show cache backend and size."""
+    from app.services.response_cache import response_cache
+
+    for key, value in response_cache.info().items():
+        click.echo(f'{key}: {value}')
+
+analytics_cli = AppGroup('analytics', help='Maintain the analytics rollup tables.')
+
+@analytics_cli.command('rebuild')
+def rebuild_analytics():
+    """Backfill or rebuild per-category rollups from the queries table."""
+    from app.services.analytics import rebuild_rollups
+
+    categories = rebuild_rollups()
+    click.echo(f'Rebuilt analytics rollups for {categories} categories')
+
+@analytics_cli.command('prune')
+def prune_analytics():
+    """Delete latency sketches older than the longest reporting window."""
+    from app.services.analytics import prune_latency_sketches
+
+    removed = prune_latency_sketches()
+    click.echo(f'Removed {removed} expired latency sketches')
+
+@click.command('init-db')
+@click.option('--create-all', is_flag=True,
+              help='On an empty database, create tables from the models and stamp the latest '
+                   'migration instead of replaying every migration.')
+@with_appcontext
+def init_db(create_all):
+    """Create the schema, or bring an existing one up to the latest migration."""
+    from flask_migrate import upgrade, stamp
+    from app import db
+
+    tables = set(db.inspect(db.engine).get_table_names())
+    if tables and 'alembic_version' not in tables:
+        raise click.ClickException(
+            'Database has tables but no migration history; run `flask db stamp <revision>` '
+            'with the revision it matches, then `flask init-db`'
+        )
+    if create_all and not tables:
+        db.create_all()
+        stamp()
+        click.echo('Created tables from the models and stamped the latest migration')
+    else:
+        upgrade()
+        click.echo('Database is at the latest migration')
+
+@click.command('seed')
+@click.option('--patients', default=1000, show_default=True, help='Patients to add.')
+@click.option('--clinicians-per-specialization', default=5, show_default=True,
+              help='Clinicians to add for every specialization.')
+@click.option('--queries', default=100000, show_default=True,
+              help='Queries to add, spread over every patient and clinician in the database.')
+@click.option('--batch-size', default=10000, show_default=True, help='Rows per COPY or executemany batch.')
+@click.option('--days', default=365, show_default=True, help='How far back reviewed queries go.')
+@click.option('--seed', 'random_seed', type=int, default=None, help='Make the generated data repeatable.')
+@click.option('--password', default=None, help='Password for every seeded user.')
+@click.option('--skip-rollups', is_flag=True, help='Leave the analytics rollups for `flask analytics rebuild`.')
+@with_appcontext
+def seed_data(patients, clinicians_per_specialization, queries, batch_size, days, random_seed,
+              password, skip_rollups):
+    """Bulk-load synthetic users and queries for load and scaling tests."""
+    from app.services import seeder
+    from app.services.analytics import rebuild_rollups
+
+    started = time.perf_counter()
+
+    def progress(inserted, total):
+        rate = inserted / (time.perf_counter() - started)
+        click.echo(f'  {inserted}/{total} queries ({rate:.0f} rows/s)')
+
+    click.echo(f'Seeding with {seeder.bulk_method()}')
+    counts = seeder.seed_database(
+        patients=patients,
+        clinicians_per_specialization=clinicians_per_specialization,
+        queries=queries,
+        batch_size=batch_size,
+        days=days,
+        seed=random_seed,
+        password=password or seeder.SEED_PASSWORD,
+        progress=progress
+    )
+    click.echo(f"Added {counts['patients']} patients, {counts['clinicians']} clinicians and "
+               f"{counts['queries']} queries in {time.perf_counter() - started:.1f}s")
+    if not password:
+        click.echo(f'Seeded users log in with password {seeder.SEED_PASSWORD}')
+    if not skip_rollups:
+        categories = rebuild_rollups()
+        click.echo(f'Rebuilt analytics rollups for {categories} categories')
+
+def register_commands(app):
+    """Register CLI command groups on the app."""
+    app.cli.add_command(classifier_cli)
+    app.cli.add_command(ai_cache_cli)
+    app.cli.add_command(analytics_cli)
+    app.cli.add_command(init_db)
+    app.cli.add_command(seed_data)
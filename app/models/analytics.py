@@ -0,0 +1,31 @@
+from datetime import datetime
+from app import db
+
+class QueryCategoryStats(db.Model):
+    """Per-category query counters maintained at write time."""
+
+    __tablename__ = 'query_category_stats'
+
+    category = db.Column(db.String(100), primary_key=True)
+    query_count = db.Column(db.Integer, nullable=False, default=0)
+    reviewed_count = db.Column(db.Integer, nullable=False, default=0)
+    review_seconds_total = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<QueryCategoryStats {self.category} {self.query_count}>'
+
+class ClinicianLatencySketch(db.Model):
+    """Review-latency quantile sketch per clinician, urgency and hour reviewed."""
+
+    __tablename__ = 'clinician_latency_sketches'
+
+    clinician_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    urgency_level = db.Column(db.String(20), primary_key=True)
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    sketch = db.Column(db.Text, nullable=False)  # serialized DDSketch
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ClinicianLatencySketch {self.clinician_id} {self.urgency_level} {self.bucket_start}>'
@@ -0,0 +1,17 @@
+from datetime import datetime
+from app import db
+
+class AIResponseCacheEntry(db.Model):
+    """Cached AI answer shared by every worker process."""
+
+    __tablename__ = 'ai_response_cache'
+
+    key = db.Column(db.String(64), primary_key=True)
+    normalized_question = db.Column(db.Text, nullable=False)
+    category = db.Column(db.String(100), nullable=False, index=True)
+    ai_response = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<AIResponseCacheEntry {self.key[:12]} {self.category}>'
@@ -0,0 +1,38 @@
+from datetime import datetime
+from app import db
+
+class AIJob(db.Model):
+    """Durable record of background AI work for a query."""
+
+    __tablename__ = 'ai_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    query_id = db.Column(db.Integer, db.ForeignKey('queries.id'), nullable=False, unique=True)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, completed, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def __init__(self, query_id):
+        self.query_id = query_id
+        self.status = 'queued'
+        self.attempts = 0
+
+    def to_dict(self):
+        """Convert job to dictionary."""
+        return {
+            'id': self.id,
+            'query_id': self.query_id,
+            'status': self.status,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def __repr__(self):
+        return f'<AIJob {self.id} query={self.query_id} {self.status}>'
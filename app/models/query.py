@@ -1,10 +1,72 @@
 from datetime import datetime
+from sqlalchemy import event, DDL
 from app import db
+import re
+
+# Length of the plain-text AI answer preview shown in list views
+PREVIEW_LENGTH = 200
+
+MARKDOWN_HEADER_PATTERN = re.compile(r'^#+\s*(.*)$', re.MULTILINE)
+MARKDOWN_SYMBOLS_PATTERN = re.compile(r'[*_`>]|^\s*[-+]\s+', re.MULTILINE)
+
+def make_preview(markdown):
+    """Short plain-text preview of an AI answer, taken from its Overview."""
+    if not markdown:
+        return None
+    # Sections are "# Title" headers; prefer the Overview, skip the Category
+    sections = MARKDOWN_HEADER_PATTERN.split(markdown)
+    body = ''
+    for title, text in zip(sections[1::2], sections[2::2]):
+        if title.strip().lower() == 'overview':
+            body = text
+            break
+        if title.strip().lower() != 'category' and not body:
+            body = text
+    if not body.strip():
+        body = sections[0] if sections[0].strip() else markdown
+    text = ' '.join(MARKDOWN_SYMBOLS_PATTERN.sub('', body).split())
+    if len(text) <= PREVIEW_LENGTH:
+        return text
+    return text[:PREVIEW_LENGTH - 1].rsplit(' ', 1)[0] + '…'
+
+# Work-queue order: lower ranks are reviewed first
+URGENCY_RANKS = {'high': 0, 'medium': 1, 'normal': 2, 'low': 3}
+
+# Display colours for each status
+STATUS_STYLES = {
+    'processing': {'color': '#757575', 'background': '#F5F5F5'},  # Grey
+    'failed': {'color': '#F44336', 'background': '#FFEBEE'},  # Red
+    'pending': {'color': '#FFA500', 'background': '#FFF3E0'},  # Orange
+    'reviewed': {'color': '#4CAF50', 'background': '#E8F5E9'},  # Green
+    'verified': {'color': '#2196F3', 'background': '#E3F2FD'}   # Blue
+}
 
 class Query(db.Model):
     """Model for health queries and responses."""
     
     __tablename__ = 'queries'
+    __table_args__ = (
+        # Patient dashboard: own queries, newest first
+        db.Index('ix_queries_patient_id_created_at', 'patient_id', 'created_at'),
+        # Clinician dashboard: queries in a status, newest first
+        db.Index('ix_queries_status_created_at', 'status', 'created_at'),
+        # Clinician stats: a clinician's reviewed queries
+        db.Index('ix_queries_clinician_id_status', 'clinician_id', 'status'),
+        # Assignment: open workload per clinician, a small slice of the table
+        db.Index(
+            'ix_queries_open_clinician_id', 'clinician_id',
+            postgresql_where=db.text("status IN ('pending', 'pending_review')"),
+            sqlite_where=db.text("status IN ('pending', 'pending_review')")
+        ),
+        # Review work queue: a clinician's pending queries, most urgent then oldest first
+        db.Index(
+            'ix_queries_review_queue', 'clinician_id', 'urgency_rank', 'created_at',
+            postgresql_where=db.text("status = 'pending'"),
+            sqlite_where=db.text("status = 'pending'")
+        ),
+        # Search: newest matches of a common term without scanning them all
+        db.Index('ix_queries_created_at', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     patient_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -12,13 +74,25 @@ class Query(db.Model):
     category = db.Column(db.String(100), nullable=False)
     question = db.Column(db.Text, nullable=False)
     ai_response = db.Column(db.Text)
+    ai_response_preview = db.Column(db.String(PREVIEW_LENGTH))
     clinician_response = db.Column(db.Text)
-    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, reviewed, verified
+    status = db.Column(db.String(20), nullable=False, default='pending')  # processing, pending, reviewed, verified, failed
     urgency_level = db.Column(db.String(20), default='normal')  # low, normal, high
+    urgency_rank = db.Column(db.SmallInteger, nullable=False, default=URGENCY_RANKS['normal'])
     is_anonymous = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     reviewed_at = db.Column(db.DateTime)
+    # Review claim held by a clinician; lapses on its own at claim_expires_at
+    claimed_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    claim_expires_at = db.Column(db.DateTime)
+    
+    # Columns read by to_summary_dict
+    SUMMARY_COLUMNS = (
+        'id', 'patient_id', 'clinician_id', 'category', 'question', 'ai_response_preview',
+        'status', 'urgency_level', 'is_anonymous', 'created_at', 'updated_at', 'reviewed_at',
+        'claimed_by', 'claim_expires_at'
+    )
     
     def __init__(self, patient_id, category, question, clinician_id=None, is_anonymous=False, urgency_level='normal', status='pending'):
         self.patient_id = patient_id
@@ -26,6 +100,7 @@ class Query(db.Model):
         self.question = question
         self.is_anonymous = is_anonymous
         self.urgency_level = urgency_level
+        self.urgency_rank = URGENCY_RANKS.get(urgency_level, URGENCY_RANKS['normal'])
         self.status = status
         # Ensure clinician_id is properly set
         if clinician_id is not None:
@@ -36,6 +111,7 @@ class Query(db.Model):
     def set_ai_response(self, response):
         """Set AI-generated response."""
         self.ai_response = response
+        self.ai_response_preview = make_preview(response)
         self.status = 'pending'
         # Ensure clinician_id is not lost
         if not hasattr(self, 'clinician_id'):
@@ -47,16 +123,17 @@ class Query(db.Model):
         self.clinician_response = response
         self.status = 'verified'
         self.reviewed_at = datetime.utcnow()
+        self.claimed_by = None
+        self.claim_expires_at = None
+    
+    def is_claimed_by_other(self, clinician_id, now=None):
+        """Whether another clinician holds an unexpired review claim."""
+        now = now or datetime.utcnow()
+        return (self.claimed_by is not None and self.claimed_by != clinician_id
+                and self.claim_expires_at is not None and self.claim_expires_at > now)
     
     def to_dict(self):
         """Convert query to dictionary."""
-        # Define status styles
-        status_styles = {
-            'pending': {'color': '#FFA500', 'background': '#FFF3E0'},  # Orange
-            'reviewed': {'color': '#4CAF50', 'background': '#E8F5E9'},  # Green
-            'verified': {'color': '#2196F3', 'background': '#E3F2FD'}   # Blue
-        }
-
         return {
             'id': self.id,
             'patient_id': self.patient_id,
@@ -64,15 +141,96 @@ class Query(db.Model):
             'category': self.category,
             'question': self.question,
             'ai_response': self.ai_response,
+            'ai_response_preview': self.ai_response_preview,
             'clinician_response': self.clinician_response,
             'status': self.status,
-            'status_style': status_styles.get(self.status, {}),  # Get style for current status
+            'status_style': STATUS_STYLES.get(self.status, {}),  # Get style for current status
+            'urgency_level': self.urgency_level,
+            'is_anonymous': self.is_anonymous,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat(),
+            'reviewed_at': self.reviewed_at.isoformat() if self.reviewed_at else None,
+            'claimed_by': self.claimed_by,
+            'claim_expires_at': self.claim_expires_at.isoformat() if self.claim_expires_at else None
+        }
+    
+    def to_summary_dict(self):
+        """Convert query to a list-view dictionary without the full responses.
+
+        Only reads ``SUMMARY_COLUMNS``, so list endpoints can load rows with
+        ``load_only`` and skip the large text columns.
+        """
+        return {
+            'id': self.id,
+            'patient_id': self.patient_id,
+            'clinician_id': self.clinician_id,
+            'category': self.category,
+            'question': self.question,
+            'ai_response_preview': self.ai_response_preview,
+            'status': self.status,
+            'status_style': STATUS_STYLES.get(self.status, {}),
             'urgency_level': self.urgency_level,
             'is_anonymous': self.is_anonymous,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
-            'reviewed_at': self.reviewed_at.isoformat() if self.reviewed_at else None
+            'reviewed_at': self.reviewed_at.isoformat() if self.reviewed_at else None,
+            'claimed_by': self.claimed_by,
+            'claim_expires_at': self.claim_expires_at.isoformat() if self.claim_expires_at else None
         }
     
     def __repr__(self):
-        return f'<Query {self.id}>' 
\ No newline at end of file
+        return f'<Query {self.id}>'
+
+# Full-text search index over question, AI answer and clinician response,
+# kept current by the database on every write. PostgreSQL: a generated
+# tsvector column (question weighted A, clinician response B, AI answer C)
+# with a GIN index. SQLite: an external-content FTS5 table maintained by
+# triggers. Neither is mapped on the model; app.services.search queries them.
+SEARCH_CONFIG = 'english'
+
+SEARCH_POSTGRES_DDL = (
+    f"""ALTER TABLE queries ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(question, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(clinician_response, '')), 'B') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(ai_response, '')), 'C')
+    ) STORED""",
+    "CREATE INDEX ix_queries_search_vector ON queries USING gin (search_vector)",
+)
+
+SEARCH_SQLITE_DDL = (
+    """CREATE VIRTUAL TABLE queries_fts USING fts5(
+        question, ai_response, clinician_response,
+        content='queries', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER queries_fts_insert AFTER INSERT ON queries BEGIN
+        INSERT INTO queries_fts (rowid, question, ai_response, clinician_response)
+        VALUES (new.id, new.question, new.ai_response, new.clinician_response);
+    END""",
+    """CREATE TRIGGER queries_fts_delete AFTER DELETE ON queries BEGIN
+        INSERT INTO queries_fts (queries_fts, rowid, question, ai_response, clinician_response)
+        VALUES ('delete', old.id, old.question, old.ai_response, old.clinician_response);
+    END""",
+    """CREATE TRIGGER queries_fts_update AFTER UPDATE OF question, ai_response, clinician_response ON queries BEGIN
+        INSERT INTO queries_fts (queries_fts, rowid, question, ai_response, clinician_response)
+        VALUES ('delete', old.id, old.question, old.ai_response, old.clinician_response);
+        INSERT INTO queries_fts (rowid, question, ai_response, clinician_response)
+        VALUES (new.id, new.question, new.ai_response, new.clinician_response);
+    END""",
+)
+
+for _statement in SEARCH_POSTGRES_DDL:
+    event.listen(Query.__table__, 'after_create', DDL(_statement).execute_if(dialect='postgresql'))
+for _statement in SEARCH_SQLITE_DDL:
+    event.listen(Query.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+event.listen(Query.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS queries_fts').execute_if(dialect='sqlite'))
+
+def include_in_autogenerate(object, name, type_, reflected, compare_to):
+    """Keep ``flask db migrate`` from dropping the unmapped search index objects."""
+    if reflected and compare_to is None:
+        if type_ == 'column' and name == 'search_vector':
+            return False
+        if type_ == 'index' and name == 'ix_queries_search_vector':
+            return False
+        if type_ == 'table' and name.startswith('queries_fts'):
+            return False
+    return True
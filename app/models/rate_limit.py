@@ -0,0 +1,14 @@
+from app import db
+
+class RateLimitBucket(db.Model):
+    """Token-bucket state for one rate limit key, shared by every worker process."""
+
+    __tablename__ = 'rate_limit_buckets'
+
+    key = db.Column(db.String(255), primary_key=True)
+    # Theoretical arrival time (Unix seconds) of the next request; the bucket
+    # is full again once this is in the past
+    tat = db.Column(db.Float, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<RateLimitBucket {self.key}>'
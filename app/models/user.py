@@ -1,12 +1,16 @@
 from datetime import datetime
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
 from app import db
+from app.services.password_hasher import password_hasher
 
 class User(UserMixin, db.Model):
     """User model for both patients and clinicians."""
     
     __tablename__ = 'users'
+    __table_args__ = (
+        # Assignment roster: clinicians by specialization
+        db.Index('ix_users_role_specialization', 'role', 'specialization'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
@@ -35,11 +39,15 @@ class User(UserMixin, db.Model):
     
     def set_password(self, password):
         """Set password hash."""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
         """Check password hash."""
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """Check whether the stored hash predates the configured hash method."""
+        return password_hasher.needs_rehash(self.password_hash)
     
     def is_clinician(self):
         """Check if user is a clinician."""
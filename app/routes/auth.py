@@ -3,13 +3,33 @@ from flask_login import login_user, logout_user, login_required
 from app import db
 from app.models.user import User
 from app.utils.validators import validate_email, validate_password
-from app.utils.decorators import json_required
+from app.utils.decorators import json_required, rate_limit
 from app.utils.specialization import Specialization
+from app.services.assignment import clinician_assigner
+from app.services.password_hasher import PasswordHasherBusyError
+import hashlib
 
 auth_bp = Blueprint('auth', __name__)
 
+def _busy():
+    response = jsonify({'error': 'Server is busy, please try again shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+def _login_email():
+    # Login buckets are per address and account, so users behind one NAT or
+    # proxy don't share a single limit; a looser per-address limit still caps
+    # guessing across many accounts. The email is hashed, which keeps the
+    # key within the rate_limit.key column and keeps addresses out of it
+    data = request.get_json(silent=True)
+    email = data.get('email') if isinstance(data, dict) else None
+    digest = hashlib.sha256(str(email or '').strip().lower().encode('utf-8')).hexdigest()
+    return f"email:{digest}"
+
 @auth_bp.route('/register', methods=['POST'])
 @json_required
+@rate_limit(limit=10, per=3600)
 def register():
     """Register a new user."""
     data = request.get_json()
@@ -37,13 +57,16 @@ def register():
         return jsonify({'error': 'Invalid role'}), 400
     
     # Create new user
-    user = User(
-        email=data['email'],
-        password=data['password'],
-        first_name=data['first_name'],
-        last_name=data['last_name'],
-        role=data['role']
-    )
+    try:
+        user = User(
+            email=data['email'],
+            password=data['password'],
+            first_name=data['first_name'],
+            last_name=data['last_name'],
+            role=data['role']
+        )
+    except PasswordHasherBusyError:
+        return _busy()
     
     # Add clinician-specific fields
     if user.is_clinician():
@@ -67,6 +90,10 @@ def register():
         db.session.rollback()
         return jsonify({'error': 'Database error occurred'}), 500
     
+    # New clinicians must be visible to query assignment right away
+    if user.is_clinician():
+        clinician_assigner.invalidate()
+    
     return jsonify({
         'message': 'Registration successful',
         'user': user.to_dict()
@@ -74,6 +101,8 @@ def register():
 
 @auth_bp.route('/login', methods=['POST'])
 @json_required
+@rate_limit(limit=300, per=60, scope='auth.login-address')
+@rate_limit(limit=20, per=60, key=_login_email)
 def login():
     """Login user."""
     data = request.get_json()
@@ -84,8 +113,17 @@ def login():
     
     # Find user by email
     user = User.query.filter_by(email=data['email']).first()
-    if not user or not user.check_password(data['password']):
-        return jsonify({'error': 'Invalid email or password'}), 401
+    try:
+        if not user or not user.check_password(data['password']):
+            return jsonify({'error': 'Invalid email or password'}), 401
+        
+        # Upgrade hashes made with older parameters while the password is at hand
+        if user.password_needs_rehash():
+            user.set_password(data['password'])
+            db.session.commit()
+    except PasswordHasherBusyError:
+        db.session.rollback()
+        return _busy()
         
     # Login user
     login_user(user, remember=data.get('remember', False))
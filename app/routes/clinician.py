@@ -4,10 +4,12 @@ from app import db
 from app.models.query import Query
 from app.models.user import User
 from app.utils.decorators import clinician_required, json_required
+from app.services.assignment import clinician_assigner
+from app.services.analytics import get_clinician_stats
 
 bp = Blueprint('clinician', __name__)
 
-@bp.route('/api/clinician/profile', methods=['GET'])
+@bp.route('/profile', methods=['GET'])
 @login_required
 @clinician_required
 def get_profile():
@@ -20,7 +22,7 @@ def get_profile():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@bp.route('/api/clinician/profile', methods=['PUT'])
+@bp.route('/profile', methods=['PUT'])
 @login_required
 @clinician_required
 @json_required
@@ -41,6 +43,9 @@ def update_profile():
         
         db.session.commit()
         
+        # Specialization changes affect which queries this clinician receives
+        clinician_assigner.invalidate()
+        
         return jsonify({
             'message': 'Profile updated successfully',
             'profile': current_user.to_dict()
@@ -50,43 +55,13 @@ def update_profile():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-@bp.route('/api/clinician/stats', methods=['GET'])
+@bp.route('/stats', methods=['GET'])
 @login_required
 @clinician_required
 def get_stats():
-    """Get clinician statistics."""
+    """Get clinician statistics, including review latency percentiles."""
     try:
-        # Get total queries reviewed
-        total_reviewed = Query.query.filter_by(
-            clinician_id=current_user.id,
-            status='reviewed'
-        ).count()
-        
-        # Get pending reviews
-        pending_reviews = Query.query.filter_by(
-            status='pending'
-        ).count()
-        
-        # Get average response time
-        reviewed_queries = Query.query.filter_by(
-            clinician_id=current_user.id,
-            status='reviewed'
-        ).all()
-        
-        total_response_time = 0
-        if reviewed_queries:
-            for query in reviewed_queries:
-                response_time = (query.reviewed_at - query.created_at).total_seconds()
-                total_response_time += response_time
-            avg_response_time = total_response_time / len(reviewed_queries)
-        else:
-            avg_response_time = 0
-        
-        return jsonify({
-            'total_reviewed': total_reviewed,
-            'pending_reviews': pending_reviews,
-            'avg_response_time_seconds': avg_response_time
-        }), 200
+        return jsonify(get_clinician_stats(current_user.id)), 200
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500 
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
\ No newline at end of file
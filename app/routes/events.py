@@ -0,0 +1,77 @@
+from flask import Blueprint, Response, jsonify
+from flask_login import login_required, current_user
+from app.services.events import event_bus
+from app.services.stream_slots import stream_slots
+import random
+import json
+import time
+
+bp = Blueprint('events', __name__)
+
+# Seconds a client refused for lack of capacity should wait before retrying
+FULL_RETRY_AFTER_SECONDS = 30
+
+@bp.route('', methods=['GET'])
+@bp.route('/', methods=['GET'])
+@login_required
+def stream_events():
+    """Push query events for the current user as Server-Sent Events.
+
+    Each event's name is its type (``query.created``, ``query.answered``,
+    ``query.assigned``, ``query.reviewed``, ``query.failed``) and its data
+    is ``{"query": <summary>}``. A ``resync`` event means events were
+    dropped and the client should re-fetch its list.
+
+    The stream ends after about ``EVENTS_MAX_STREAM_SECONDS`` and the
+    browser reconnects, so an abandoned tab doesn't hold a server thread
+    for good. When the process has no stream thread free (see
+    ``StreamSlots``) the request is refused with 503 and ``Retry-After``.
+    """
+    if not event_bus.enabled:
+        return jsonify({'error': 'Event streaming is disabled'}), 404
+
+    if not stream_slots.acquire():
+        response = jsonify({'error': 'Too many open streams, please try again shortly'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(FULL_RETRY_AFTER_SECONDS)
+        return response
+    try:
+        subscription = event_bus.subscribe(current_user)
+    except Exception:
+        stream_slots.release()
+        raise
+
+    # Spread the lifetimes so streams opened together don't all reconnect together
+    lifetime = event_bus.max_stream_seconds * random.uniform(0.8, 1.0)
+    response = Response(
+        _relay(subscription, time.monotonic() + lifetime),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # The server closes the response even if the stream never started
+    response.call_on_close(lambda: event_bus.unsubscribe(subscription))
+    response.call_on_close(stream_slots.release)
+    return response
+
+def _relay(subscription, deadline):
+    # Runs after the request context is gone and never touches the database
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            message = subscription.get(timeout=min(event_bus.keepalive, remaining))
+            if subscription.overflowed:
+                subscription.drain()
+                yield 'event: resync\ndata: {}\n\n'
+                continue
+            if message is None:
+                yield ': keepalive\n\n'
+                continue
+            payload = json.loads(message)
+            data = {'query': payload['query'], 'partial': payload.get('partial', False)}
+            yield f"event: {payload['type']}\ndata: {json.dumps(data)}\n\n"
+    finally:
+        # Stop buffering events as soon as the stream ends
+        event_bus.unsubscribe(subscription)
@@ -1,37 +1,113 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, current_app, url_for, stream_with_context
 from flask_login import login_required, current_user
 from app import db
-from app.models.query import Query
-from app.models.user import User
+from app.models.query import Query, STATUS_STYLES, URGENCY_RANKS
+from app.models.job import AIJob
+from app.services.job_queue import ai_worker_pool
+from app.services.query_pipeline import process_query, finalize_query, assign_clinicians, UNCATEGORIZED
 from app.services.ai_service import AIService
+from app.services.assignment import clinician_assigner, OPEN_STATUSES
+from app.services.analytics import record_query_created, record_queries_created, record_review, get_rollups
+from app.services.response_cache import response_cache
+from app.services.ai_governor import ai_governor, busy_error_of
+from app.services.ai_provider import ai_provider
+from app.services.prompts import token_usage
+from app.services.events import event_bus, QUERY_CREATED, QUERY_ANSWERED, QUERY_ASSIGNED, QUERY_REVIEWED
+from app.services.work_queue import peek_queue, claim_next, claim_one, release_claim, claimable_by
+from app.services.search import search_queries, has_positive_terms
+from app.services.stream_slots import stream_slots
+from app.utils.specialization import Specialization
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.orm import load_only
 from datetime import datetime
-from app.utils.decorators import json_required, patient_required, clinician_required
-import random
+from app.utils.decorators import json_required, patient_required, clinician_required, admin_required, rate_limit
+from app.utils.pagination import keyset_page, InvalidCursorError
+import logging
+import json
+import math
+import time
+
+logger = logging.getLogger(__name__)
 
 bp = Blueprint('query', __name__)
 
+# Largest page size accepted in cursor mode
+MAX_PAGE_LIMIT = 100
+
+# Most queries returned or claimed from the review queue at once
+MAX_QUEUE_LIMIT = 50
+
+# Largest search results page, and longest accepted search string
+MAX_SEARCH_PER_PAGE = 50
+MAX_SEARCH_LENGTH = 200
+
+# Upper bound for long-polling the status endpoint
+MAX_STATUS_WAIT_SECONDS = 30
+STATUS_POLL_INTERVAL_SECONDS = 0.25
+
+# How long a stream relays progress of a query the worker pool is answering
+MAX_STREAM_WAIT_SECONDS = 120
+
+# Seconds a client refused a stream should wait before retrying
+STREAMS_FULL_RETRY_AFTER_SECONDS = 5
+
+# Seconds a batch refused for upstream trouble should wait before retrying,
+# unless the circuit breaker says how long it will stay open
+BATCH_RETRY_AFTER_SECONDS = 5
+
+def _streams_full():
+    response = jsonify({'error': 'Too many open streams, please try again shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(STREAMS_FULL_RETRY_AFTER_SECONDS)
+    return response
+
+def _batch_size():
+    # A batch draws one token per submitted query from its rate limit
+    data = request.get_json(silent=True)
+    items = data.get('queries') if isinstance(data, dict) else None
+    return max(1, len(items)) if isinstance(items, list) else 1
+
 @bp.route('', methods=['GET'])
 @bp.route('/', methods=['GET'])
 @login_required
 def get_queries():
-    """Get all queries for the current user."""
+    """Get all queries for the current user.
+    
+    Pass ``limit`` (and ``cursor`` from the previous response) for keyset
+    pagination; otherwise ``page``/``per_page`` offset pagination is used.
+    """
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        
         if current_user.is_patient():
             # Get patient's queries
-            queries = Query.query.filter_by(patient_id=current_user.id)\
-                .order_by(Query.created_at.desc())\
-                .paginate(page=page, per_page=per_page)
+            queries = Query.query.filter_by(patient_id=current_user.id)
         else:
             # Get queries for clinician review
-            queries = Query.query.filter_by(status='pending')\
-                .order_by(Query.created_at.desc())\
-                .paginate(page=page, per_page=per_page)
+            queries = Query.query.filter_by(status='pending')
+        
+        # List views show a preview; full responses come from GET /<id>
+        queries = queries.options(load_only(
+            *(getattr(Query, column) for column in Query.SUMMARY_COLUMNS), raiseload=True
+        ))
+        
+        if 'cursor' in request.args or 'limit' in request.args:
+            limit = min(max(request.args.get('limit', 10, type=int), 1), MAX_PAGE_LIMIT)
+            try:
+                rows, next_cursor = keyset_page(queries, Query, limit, request.args.get('cursor'))
+            except InvalidCursorError as e:
+                return jsonify({'error': str(e)}), 400
+            return jsonify({
+                'queries': [query.to_summary_dict() for query in rows],
+                'next_cursor': next_cursor,
+                'limit': limit
+            }), 200
+        
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 10, type=int)
+        queries = queries.order_by(Query.created_at.desc())\
+            .paginate(page=page, per_page=per_page)
         
         return jsonify({
-            'queries': [query.to_dict() for query in queries.items],
+            'queries': [query.to_summary_dict() for query in queries.items],
             'pages': queries.pages,
             'current_page': queries.page
         }), 200
@@ -44,94 +120,445 @@ def get_queries():
 @login_required
 @patient_required
 @json_required
+@rate_limit(limit=20, per=60)
 def create_query():
-    """Create a new query."""
+    """Create a new query and hand AI processing to the worker pool."""
     try:
         data = request.get_json()
         
-        # Get AI response
-        ai_service = AIService()
-        category, ai_response = ai_service.get_response(data['question'])
-        
-        print(f"Category determined: {category}")  # Debug print
-        
-        # Find clinicians with matching specialization
-        matching_clinicians = User.query.filter(
-            User.role == 'clinician',
-            User.specialization == category
-        ).all()
-        
-        print(f"Matching clinicians found: {len(matching_clinicians)}")  # Debug print
-        if matching_clinicians:
-            print(f"First matching clinician: {matching_clinicians[0].to_dict()}")  # Debug print
-        
-        # If no matching clinicians, get all clinicians
-        if not matching_clinicians:
-            print("No matching specialists, getting all clinicians")  # Debug print
-            matching_clinicians = User.query.filter_by(role='clinician').all()
-            print(f"Total clinicians found: {len(matching_clinicians)}")  # Debug print
-            if matching_clinicians:
-                print(f"First available clinician: {matching_clinicians[0].to_dict()}")  # Debug print
-        
-        # If still no clinicians, return error
-        if not matching_clinicians:
-            print("No clinicians found at all!")  # Debug print
-            return jsonify({'error': 'No clinicians available'}), 400
-        
-        # Select a random clinician
-        assigned_clinician = random.choice(matching_clinicians) # Debug print
-        
-        # Validate clinician_id before creating query
-        if not assigned_clinician or not assigned_clinician.id:
-            print("Error: Invalid clinician selected")  # Debug print
-            return jsonify({'error': 'Invalid clinician selected'}), 400
-            
-        print(f"Creating query with clinician_id: {assigned_clinician.id}")  # Debug print
+        if not data.get('question'):
+            return jsonify({'error': 'Missing required field: question'}), 400
         
-        # Create new query with assigned clinician
+        # Persist the query right away; category, AI response and
+        # clinician assignment are filled in by the AI pipeline
         query = Query(
             patient_id=current_user.id,
-            clinician_id=assigned_clinician.id,
-            category=category,
+            category=UNCATEGORIZED,
             question=data['question'],
             is_anonymous=data.get('is_anonymous', False),
             urgency_level=data.get('urgency_level', 'low'),
-            status='pending_review'
+            status='processing'
         )
+        db.session.add(query)
+        db.session.flush()  # Flush to get the ID without committing
+        record_query_created(UNCATEGORIZED)
+        event_bus.publish(QUERY_CREATED, query)
         
-        # Verify clinician_id was set correctly
-        if not query.clinician_id:
-            print("Error: clinician_id not set after query creation")  # Debug print
-            return jsonify({'error': 'Failed to assign clinician'}), 500
+        if not current_app.config.get('AI_PIPELINE_ASYNC', True):
+            process_query(query)
+            db.session.commit()
+            return jsonify({
+                'message': 'Query created successfully',
+                'query': query.to_dict()
+            }), 201
+        
+        job = ai_worker_pool.enqueue(query.id)
+        db.session.commit()
+        
+        result = {
+            'message': 'Query accepted for processing',
+            'query': query.to_dict(),
+            'status_url': url_for('query.get_query_status', query_id=query.id)
+        }
+        if data.get('stream'):
+            # Give the client time to open the stream and answer it there;
+            # the worker pool picks the job up if nobody claims it
+            ai_worker_pool.submit(job.id, delay=current_app.config.get('AI_STREAM_CLAIM_SECONDS', 10))
+            result['stream_url'] = url_for('query.stream_query', query_id=query.id)
+        else:
+            ai_worker_pool.submit(job.id)
+        
+        return jsonify(result), 202
+        
+    except Exception as e:
+        logger.error(f"Error in create_query: {str(e)}")
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/batch', methods=['POST'])
+@login_required
+@patient_required
+@json_required
+@rate_limit(limit=200, per=3600, cost=_batch_size)
+def create_queries_batch():
+    """Create many queries at once, answering them concurrently.
+
+    Returns one result per submitted item, in order; items that fail
+    validation or AI processing are reported without affecting the rest.
+    When nothing was created the status says why: 400 if every item was
+    invalid, otherwise 503 (AI capacity or circuit breaker) or 502 (AI
+    upstream error) with ``Retry-After``.
+    """
+    try:
+        data = request.get_json()
+        items = data.get('queries')
+        max_items = current_app.config.get('AI_BATCH_MAX_ITEMS', 100)
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'Missing required field: queries'}), 400
+        if len(items) > max_items:
+            return jsonify({'error': f'A batch may contain at most {max_items} queries'}), 400
+        
+        results = [None] * len(items)
+        pending = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or not item.get('question'):
+                results[index] = {'index': index, 'status': 'error', 'error': 'Missing required field: question'}
+            else:
+                pending.append(index)
+        
+        # Fan the AI calls out concurrently, bounded by AI_BATCH_CONCURRENCY
+        app = current_app._get_current_object()
+        
+        def answer(question):
+            with app.app_context():
+                return AIService().get_response(question)
+        
+        answers = {}
+        busy = upstream_failed = False
+        if pending:
+            workers = min(current_app.config.get('AI_BATCH_CONCURRENCY', 8), len(pending))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ai-batch') as executor:
+                futures = {index: executor.submit(answer, items[index]['question']) for index in pending}
+                for index, future in futures.items():
+                    try:
+                        answers[index] = future.result()
+                    except Exception as e:
+                        if busy_error_of(e) is not None:
+                            busy = True
+                        else:
+                            upstream_failed = True
+                        results[index] = {'index': index, 'status': 'error', 'error': str(e)}
+        
+        # Assign clinicians in one pass and insert every query in one commit
+        answered = sorted(answers)
+        clinician_ids = assign_clinicians([answers[index][0] for index in answered])
+        queries = []
+        for index, clinician_id in zip(answered, clinician_ids):
+            item = items[index]
+            category, ai_response = answers[index]
+            query = Query(
+                patient_id=current_user.id,
+                clinician_id=clinician_id,
+                category=category,
+                question=item['question'],
+                is_anonymous=item.get('is_anonymous', False),
+                urgency_level=item.get('urgency_level', 'low')
+            )
+            query.set_ai_response(ai_response)
+            queries.append((index, query))
+        
+        db.session.add_all([query for _, query in queries])
+        record_queries_created([query.category for _, query in queries])
+        for _, query in queries:
+            event_bus.publish(QUERY_CREATED, query)
+            event_bus.publish(QUERY_ANSWERED, query)
+            if query.clinician_id is not None:
+                event_bus.publish(QUERY_ASSIGNED, query)
+        db.session.commit()
+        
+        for index, query in queries:
+            results[index] = {'index': index, 'status': 'created', 'query': query.to_dict()}
+        
+        response = jsonify({
+            'message': f'{len(queries)} of {len(items)} queries created',
+            'created': len(queries),
+            'failed': len(items) - len(queries),
+            'results': results
+        })
+        if queries:
+            response.status_code = 201
+        elif not (busy or upstream_failed):
+            response.status_code = 400
+        else:
+            response.status_code = 503 if busy else 502
+            retry_after = max(BATCH_RETRY_AFTER_SECONDS, math.ceil(ai_governor.retry_after()))
+            response.headers['Retry-After'] = str(retry_after)
+        return response
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/search', methods=['GET'])
+@login_required
+@clinician_required
+@rate_limit(limit=60, per=60)
+def search():
+    """Full-text search over questions, AI answers and clinician responses.
+    
+    ``q`` takes web-search syntax (words, "phrases", ``-excluded``, ``or``);
+    ``category``, ``status`` and ``urgency`` narrow the results. Results are
+    best match first, with ``<mark>``-highlighted snippets.
+    """
+    try:
+        terms = (request.args.get('q') or '').strip()
+        if not terms:
+            return jsonify({'error': 'Search terms (q) are required'}), 400
+        if len(terms) > MAX_SEARCH_LENGTH:
+            return jsonify({'error': f'Search terms must be at most {MAX_SEARCH_LENGTH} characters'}), 400
+        if not has_positive_terms(terms):
+            return jsonify({'error': 'Search terms must include a word or phrase that is not excluded'}), 400
+        
+        category = request.args.get('category')
+        if category is not None and category not in Specialization.list():
+            return jsonify({'error': f'Unknown category: {category}'}), 400
+        status = request.args.get('status')
+        if status is not None and status not in STATUS_STYLES:
+            return jsonify({'error': f'Unknown status: {status}'}), 400
+        urgency = request.args.get('urgency')
+        if urgency is not None and urgency not in URGENCY_RANKS:
+            return jsonify({'error': f'Unknown urgency: {urgency}'}), 400
+        
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), MAX_SEARCH_PER_PAGE)
+        results, has_more = search_queries(
+            terms, category=category, status=status, urgency=urgency, page=page, per_page=per_page
+        )
+        
+        return jsonify({
+            'results': [
+                dict(query.to_summary_dict(), rank=rank, highlights=highlights)
+                for query, rank, highlights in results
+            ],
+            'page': page,
+            'per_page': per_page,
+            'has_more': has_more
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/<int:query_id>', methods=['GET'])
+@login_required
+def get_query(query_id):
+    """Get a query with its full AI and clinician responses."""
+    try:
+        query = db.session.get(Query, query_id)
+        if query is None:
+            return jsonify({'error': 'Query not found'}), 404
+        if current_user.is_patient() and query.patient_id != current_user.id:
+            return jsonify({'error': 'Access denied'}), 403
+        
+        return jsonify({'query': query.to_dict()}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/<int:query_id>/status', methods=['GET'])
+@login_required
+def get_query_status(query_id):
+    """Get the processing status of a query.
+
+    Pass ``wait=<seconds>`` to hold the request open until the AI pipeline
+    has finished with the query or the timeout elapses. When the worker has
+    no stream thread free the status is returned at once instead.
+    """
+    waiting = False
+    try:
+        wait = min(request.args.get('wait', 0, type=float), MAX_STATUS_WAIT_SECONDS)
+        waiting = wait > 0 and stream_slots.acquire()
+        deadline = time.monotonic() + (wait if waiting else 0)
+        
+        while True:
+            row = Query.query.with_entities(
+                Query.id, Query.patient_id, Query.status, Query.category, Query.clinician_id
+            ).filter_by(id=query_id).first()
+            if row is None:
+                return jsonify({'error': 'Query not found'}), 404
+            if current_user.is_patient() and row.patient_id != current_user.id:
+                return jsonify({'error': 'Access denied'}), 403
             
-        # Set AI response
-        query.set_ai_response(ai_response)
+            if row.status != 'processing' or time.monotonic() >= deadline:
+                break
+            # End the read transaction so the next poll sees the worker's commit
+            db.session.rollback()
+            time.sleep(STATUS_POLL_INTERVAL_SECONDS)
         
-        # Debug print before commit
-        print(f"Query before commit - clinician_id: {query.clinician_id}, status: {query.status}")
+        job = AIJob.query.with_entities(
+            AIJob.status, AIJob.attempts, AIJob.last_error
+        ).filter_by(query_id=query_id).first()
         
-        db.session.add(query)
-        db.session.flush()  # Flush to get the ID without committing
-        print(f"Query after flush - clinician_id: {query.clinician_id}, status: {query.status}")
+        return jsonify({
+            'id': row.id,
+            'status': row.status,
+            'category': row.category,
+            'clinician_id': row.clinician_id,
+            'job': {
+                'status': job.status,
+                'attempts': job.attempts,
+                'last_error': job.last_error
+            } if job else None
+        }), 200
         
-        # Verify clinician_id before commit
-        if not query.clinician_id:
-            print("Error: clinician_id lost before commit")  # Debug print
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        if waiting:
+            stream_slots.release()
+
+@bp.route('/<int:query_id>/stream', methods=['GET'])
+@login_required
+def stream_query(query_id):
+    """Stream the AI answer for a query as Server-Sent Events.
+
+    Emits ``category``, then ``chunk`` events with answer text as the model
+    produces it, and finally ``done`` with the persisted query (or ``error``).
+    """
+    query = db.session.get(Query, query_id)
+    if query is None:
+        return jsonify({'error': 'Query not found'}), 404
+    if current_user.is_patient() and query.patient_id != current_user.id:
+        return jsonify({'error': 'Access denied'}), 403
+    if not stream_slots.acquire():
+        return _streams_full()
+    
+    response = Response(
+        stream_with_context(_stream_events(query)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    response.call_on_close(stream_slots.release)
+    return response
+
+def _sse(event, data):
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _stream_events(query):
+    if query.status != 'processing':
+        yield _sse('done', {'query': query.to_dict()})
+        return
+    
+    job = AIJob.query.filter_by(query_id=query.id).first()
+    if job is None or not ai_worker_pool.claim(job.id):
+        # The worker pool is already answering this query
+        yield from _relay_worker_result(query.id)
+        return
+    
+    try:
+        question = query.question
+        cached = response_cache.lookup(question)
+        if cached is not None:
+            category, ai_response = cached
+            yield _sse('category', {'category': category})
+            yield _sse('chunk', {'text': ai_response})
+        else:
+            # Give the connection back to the pool while the model streams
             db.session.rollback()
-            return jsonify({'error': 'Failed to persist clinician assignment'}), 500
-            
+            for kind, value in AIService().stream_response(question):
+                if kind == 'category':
+                    category = value
+                    yield _sse('category', {'category': category})
+                elif kind == 'chunk':
+                    yield _sse('chunk', {'text': value})
+                else:
+                    ai_response = value
+            response_cache.store(question, category, ai_response)
+        
+        query = db.session.get(Query, query.id)
+        finalize_query(query, category, ai_response)
+        ai_worker_pool.complete(db.session.get(AIJob, job.id))
         db.session.commit()
+        yield _sse('done', {'query': query.to_dict()})
         
-        # Debug print after commit
-        print(f"Query after commit - clinician_id: {query.clinician_id}, status: {query.status}")
+    except GeneratorExit:
+        # Client went away mid-stream; hand the job back to the worker pool
+        db.session.rollback()
+        ai_worker_pool.fail(job.id, 'Stream client disconnected')
+        raise
+    except Exception as e:
+        db.session.rollback()
+        ai_worker_pool.fail(job.id, str(e))
+        yield _sse('error', {'error': str(e)})
+
+def _relay_worker_result(query_id):
+    deadline = time.monotonic() + MAX_STREAM_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        # End the read transaction so each poll sees the worker's commit
+        db.session.rollback()
+        query = db.session.get(Query, query_id)
+        if query is None:
+            yield _sse('error', {'error': 'Query not found'})
+            return
+        if query.status != 'processing':
+            yield _sse('done', {'query': query.to_dict()})
+            return
+        # Don't hold a connection between polls
+        db.session.rollback()
+        yield ': waiting\n\n'
+        time.sleep(STATUS_POLL_INTERVAL_SECONDS * 2)
+    yield _sse('error', {'error': 'Timed out waiting for the AI response'})
+
+@bp.route('/queue', methods=['GET'])
+@login_required
+@clinician_required
+def get_work_queue():
+    """Next queries for this clinician to review, most urgent then oldest."""
+    try:
+        limit = min(max(request.args.get('limit', 10, type=int), 1), MAX_QUEUE_LIMIT)
+        queries = peek_queue(current_user.id, limit)
         
         return jsonify({
-            'message': 'Query created successfully',
-            'query': query.to_dict()
-        }), 201
+            'queries': [query.to_summary_dict() for query in queries]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/queue/claim', methods=['POST'])
+@login_required
+@clinician_required
+def claim_from_queue():
+    """Claim the next queries in this clinician's queue for review."""
+    try:
+        data = request.get_json(silent=True) or {}
+        try:
+            limit = int(data.get('limit', 1))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'limit must be an integer'}), 400
+        limit = min(max(limit, 1), MAX_QUEUE_LIMIT)
+        queries = claim_next(current_user.id, limit)
+        
+        return jsonify({
+            'queries': [query.to_dict() for query in queries]
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/<int:query_id>/claim', methods=['POST'])
+@login_required
+@clinician_required
+def claim_query(query_id):
+    """Claim one query for review, or extend this clinician's claim on it."""
+    try:
+        query = Query.query.get_or_404(query_id)
+        if not claim_one(query, current_user.id):
+            if query.status != 'pending':
+                return jsonify({'error': 'Query is not awaiting review'}), 409
+            return jsonify({'error': 'Query is claimed by another clinician'}), 409
+        
+        return jsonify({'query': query.to_dict()}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/<int:query_id>/claim', methods=['DELETE'])
+@login_required
+@clinician_required
+def release_query(query_id):
+    """Return a claimed query to the queue without reviewing it."""
+    try:
+        query = Query.query.get_or_404(query_id)
+        if not release_claim(query, current_user.id):
+            return jsonify({'error': 'Query is not claimed by you'}), 409
+        
+        return jsonify({'message': 'Claim released'}), 200
         
     except Exception as e:
-        print(f"Error in create_query: {str(e)}")  # Debug print
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
@@ -140,18 +567,51 @@ def create_query():
 @clinician_required
 @json_required
 def review_query(query_id):
-    """Review a query and provide clinician feedback."""
+    """Review a query and provide clinician feedback.
+
+    The reviewer becomes the query's clinician. The update only applies
+    while nobody else holds a live claim on the query, so a clinician can't
+    overwrite a review in progress; otherwise the answer is 409.
+    """
     try:
         data = request.get_json()
         query = Query.query.get_or_404(query_id)
+        previous_status = query.status
+        previous_clinician_id = query.clinician_id
+        previous_reviewed_at = query.reviewed_at
+        now = datetime.utcnow()
+        
+        # Conditional on the claim and on the status read above, so two
+        # clinicians reviewing at once can't both count the review
+        reviewed = Query.query.filter(
+            Query.id == query_id,
+            Query.status == previous_status,
+            claimable_by(current_user.id, now)
+        ).update({
+            'clinician_response': data['response'],
+            'status': 'verified',
+            'reviewed_at': now,
+            'clinician_id': current_user.id,
+            'claimed_by': None,
+            'claim_expires_at': None
+        }, synchronize_session=False)
+        if not reviewed:
+            db.session.rollback()
+            db.session.refresh(query)
+            if query.is_claimed_by_other(current_user.id):
+                return jsonify({'error': 'Query is claimed by another clinician'}), 409
+            return jsonify({'error': 'Query was changed by another clinician, please reload it'}), 409
         
-        # Update query with clinician review
-        query.clinician_response = data['response']
-        query.status = 'verified'
-        query.reviewed_at = datetime.utcnow()
+        db.session.refresh(query)
+        record_review(query, previous_reviewed_at, previous_clinician_id)
+        event_bus.publish(QUERY_REVIEWED, query)
         
         db.session.commit()
         
+        # The open query counted against the clinician it was assigned to
+        if previous_status in OPEN_STATUSES:
+            clinician_assigner.release(previous_clinician_id)
+        
         return jsonify({
             'message': 'Query reviewed successfully',
             'query': query.to_dict()
@@ -165,31 +625,85 @@ def review_query(query_id):
 @login_required
 @clinician_required
 def get_analytics():
-    """Get analytics for queries."""
-    try:
-        # Get all queries
-        queries = Query.query.all()
-        
-        # Calculate category statistics
-        category_stats = {}
-        for query in queries:
-            category_stats[query.category] = category_stats.get(query.category, 0) + 1
-        
-        # Calculate average response time
-        total_response_time = 0
-        reviewed_queries = [q for q in queries if q.reviewed_at]
-        if reviewed_queries:
-            for query in reviewed_queries:
-                response_time = (query.reviewed_at - query.created_at).total_seconds()
-                total_response_time += response_time
-            avg_response_time = total_response_time / len(reviewed_queries)
-        else:
-            avg_response_time = 0
+    """Get analytics for queries from the per-category rollups."""
+    try:
+        return jsonify(get_rollups()), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/cache', methods=['GET'])
+@login_required
+@clinician_required
+def get_cache_stats():
+    """Get AI response cache statistics for this worker."""
+    try:
+        return jsonify({'cache': response_cache.info()}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/ai-governor', methods=['GET'])
+@login_required
+@clinician_required
+def get_ai_governor_state():
+    """Get this worker's AI concurrency limit, circuit breaker state and counters."""
+    try:
+        return jsonify({'governor': ai_governor.state()}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/ai-usage', methods=['GET'])
+@login_required
+@clinician_required
+def get_ai_usage():
+    """Get the AI provider, prompt version and token counts for this worker."""
+    try:
+        return jsonify({
+            'provider': ai_provider.info(),
+            'tokens': token_usage.to_dict()
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/jobs/retry', methods=['POST'])
+@login_required
+@admin_required
+def retry_failed_jobs():
+    """Run failed AI jobs again, all of them or those for ``query_ids``."""
+    try:
+        data = request.get_json(silent=True) or {}
+        query_ids = data.get('query_ids')
+        if query_ids is not None and (
+            not isinstance(query_ids, list) or not all(isinstance(i, int) for i in query_ids)
+        ):
+            return jsonify({'error': 'query_ids must be a list of query ids'}), 400
         
+        requeued = ai_worker_pool.requeue_failed(query_ids)
         return jsonify({
-            'category_stats': category_stats,
-            'avg_response_time_seconds': avg_response_time
+            'message': f'{len(requeued)} failed queries requeued',
+            'query_ids': requeued
         }), 200
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500 
\ No newline at end of file
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/cache', methods=['DELETE'])
+@login_required
+@admin_required
+def invalidate_cache():
+    """Drop cached AI answers, optionally for one specialization."""
+    try:
+        category = request.args.get('category')
+        if category is not None and category not in Specialization.list():
+            return jsonify({'error': 'Invalid specialization. Must be one of: ' + ', '.join(Specialization.list())}), 400
+        
+        removed = response_cache.invalidate(category)
+        return jsonify({
+            'message': 'Cache invalidated successfully',
+            'removed': removed
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -0,0 +1,348 @@
+from collections import deque
+import threading
+import logging
+import random
+import time
+import sys
+import os
+
+logger = logging.getLogger(__name__)
+
+# Circuit breaker states
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Upstream answers that mean "try again later" rather than "your request is wrong"
+TRANSIENT_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+class GeminiBusyError(Exception):
+    """Raised when no in-flight slot frees up before the acquire timeout."""
+    pass
+
+class CircuitOpenError(GeminiBusyError):
+    """Raised without calling upstream while the circuit breaker is open."""
+    pass
+
+def status_code_of(error):
+    """HTTP status of an upstream error, if it carries one."""
+    for attr in ('code', 'status_code'):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, 'response', None)
+    return getattr(response, 'status_code', None)
+
+def busy_error_of(error):
+    """The ``GeminiBusyError`` behind an error, if it was caused by one.
+
+    Follows ``__cause__`` and ``__context__``, since callers such as
+    ``AIService`` wrap upstream errors in their own exception types.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, GeminiBusyError):
+            return error
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return None
+
+def _is_httpx_error(error, *names):
+    # httpx is only imported by providers that use it; if it was never
+    # loaded, the error can't be one of its exceptions
+    httpx = sys.modules.get('httpx')
+    return httpx is not None and isinstance(error, tuple(getattr(httpx, name) for name in names))
+
+def is_transient(error):
+    """Whether an error is worth retrying and counts against upstream health."""
+    if isinstance(error, GeminiBusyError):
+        return False
+    if _is_httpx_error(error, 'TimeoutException', 'TransportError'):
+        return True
+    return status_code_of(error) in TRANSIENT_STATUS_CODES
+
+class AIGovernor:
+    """Admission control for upstream model calls.
+
+    Three mechanisms keep a slow or failing upstream from stalling every
+    worker:
+
+    - An AIMD concurrency limit: each healthy call raises the limit by
+      ``1/limit`` (about one per limit's worth of calls), while a 429, 5xx,
+      timeout or a call much slower than usual halves it, at most once per
+      ``decrease_interval``. Callers over the limit wait up to
+      ``acquire_timeout`` and then get ``GeminiBusyError``.
+    - Retries of transient errors with full-jitter exponential backoff.
+    - A circuit breaker that opens after ``failure_threshold`` consecutive
+      transient failures. While open, calls fail fast with
+      ``CircuitOpenError`` (``breaker_mode='fail'``) or wait for it to
+      recover (``'queue'``); after ``reset_timeout`` one probe call is let
+      through and its outcome closes or re-opens the breaker.
+    """
+
+    COUNTERS = (
+        'calls', 'successes', 'retries', 'throttled', 'server_errors', 'timeouts',
+        'client_errors', 'slow_calls', 'rejected_busy', 'short_circuited', 'breaker_opened'
+    )
+
+    # Weight of each new sample in the per-kind latency baseline
+    LATENCY_ALPHA = 0.1
+    # Samples per kind before slow calls start shrinking the limit
+    LATENCY_WARMUP = 5
+
+    def __init__(self, app=None):
+        self.min_limit = 1
+        self.max_limit = 8
+        self.initial_limit = 8
+        self.acquire_timeout = 30.0
+        self.latency_tolerance = 3.0
+        self.decrease_interval = 1.0
+        self.max_attempts = 3
+        self.retry_base_delay = 0.5
+        self.retry_max_delay = 8.0
+        self.failure_threshold = 5
+        self.reset_timeout = 30.0
+        self.breaker_mode = 'fail'
+        self._reset_state()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_limit = app.config.get('GEMINI_MAX_IN_FLIGHT', 8)
+        self.min_limit = min(app.config.get('AI_GOVERNOR_MIN_CONCURRENCY', 1), self.max_limit)
+        self.initial_limit = app.config.get('AI_GOVERNOR_INITIAL_CONCURRENCY') or self.max_limit
+        self.acquire_timeout = app.config.get('GEMINI_ACQUIRE_TIMEOUT', 30.0)
+        self.latency_tolerance = app.config.get('AI_GOVERNOR_LATENCY_TOLERANCE', 3.0)
+        self.decrease_interval = app.config.get('AI_GOVERNOR_DECREASE_INTERVAL', 1.0)
+        self.max_attempts = app.config.get('AI_RETRY_MAX_ATTEMPTS', 3)
+        self.retry_base_delay = app.config.get('AI_RETRY_BASE_DELAY', 0.5)
+        self.retry_max_delay = app.config.get('AI_RETRY_MAX_DELAY', 8.0)
+        self.failure_threshold = app.config.get('AI_BREAKER_FAILURE_THRESHOLD', 5)
+        self.reset_timeout = app.config.get('AI_BREAKER_RESET_SECONDS', 30.0)
+        self.breaker_mode = app.config.get('AI_BREAKER_MODE', 'fail')
+        if self.breaker_mode not in ('fail', 'queue'):
+            raise ValueError(f"Unknown AI_BREAKER_MODE '{self.breaker_mode}'")
+        self._reset_state()
+        app.extensions['ai_governor'] = self
+
+    def _reset_state(self):
+        self._cond = threading.Condition()
+        self._limit = float(min(max(self.initial_limit, self.min_limit), self.max_limit))
+        self._in_flight = 0
+        self._waiters = deque()  # FIFO, so no caller starves while others get slots
+        self._latency = {}  # kind -> (ewma seconds, samples)
+        self._last_decrease = 0.0
+        self._state = CLOSED
+        self._opened_at = None
+        self._probing = False
+        self._consecutive_failures = 0
+        self._counts = dict.fromkeys(self.COUNTERS, 0)
+
+    def _after_fork(self):
+        # Waiters and in-flight calls belong to the parent
+        self._reset_state()
+
+    def call(self, fn, kind='generate'):
+        """Run ``fn()`` under the concurrency limit and breaker, retrying transient errors."""
+        attempt = 1
+        while True:
+            self._admit()
+            start = time.monotonic()
+            try:
+                result = fn()
+            except Exception as e:
+                self._leave()
+                self._record(kind, None, e)
+                if not self._should_retry(e, attempt):
+                    raise
+                attempt += 1
+                continue
+            self._leave()
+            self._record(kind, time.monotonic() - start, None)
+            return result
+
+    def stream(self, fn, kind='stream'):
+        """Yield from ``fn()`` holding a slot until exhausted.
+
+        Latency is measured to the first chunk. Only failures before the
+        first chunk are retried; after that the caller has seen output.
+        """
+        attempt = 1
+        while True:
+            self._admit()
+            start = time.monotonic()
+            try:
+                iterator = iter(fn())
+                first = next(iterator, None)
+            except Exception as e:
+                self._leave()
+                self._record(kind, None, e)
+                if not self._should_retry(e, attempt):
+                    raise
+                attempt += 1
+                continue
+            break
+        self._record(kind, time.monotonic() - start, None)
+        try:
+            if first is not None:
+                yield first
+            for chunk in iterator:
+                yield chunk
+        except Exception as e:
+            self._record(kind, None, e)
+            raise
+        finally:
+            self._leave()
+
+    def _should_retry(self, error, attempt):
+        if not is_transient(error) or attempt >= self.max_attempts:
+            return False
+        # Full jitter: spreads retries from many workers over the whole window
+        delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** (attempt - 1)))
+        logger.warning(f"Transient AI upstream error, retry {attempt} in {delay:.2f}s: {str(error)}")
+        with self._cond:
+            self._counts['retries'] += 1
+        time.sleep(delay)
+        return True
+
+    def _admit(self):
+        deadline = time.monotonic() + self.acquire_timeout
+        ticket = object()
+        with self._cond:
+            self._counts['calls'] += 1
+            self._waiters.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._state == OPEN and now >= self._opened_at + self.reset_timeout:
+                        self._state = HALF_OPEN
+                        self._probing = False
+                    breaker_blocked = self._state == OPEN or (self._state == HALF_OPEN and self._probing)
+                    if breaker_blocked and self.breaker_mode == 'fail':
+                        self._counts['short_circuited'] += 1
+                        raise CircuitOpenError('AI upstream is unavailable; circuit breaker is open')
+                    if not breaker_blocked and self._waiters[0] is ticket \
+                            and self._in_flight < int(self._limit):
+                        self._in_flight += 1
+                        if self._state == HALF_OPEN:
+                            self._probing = True
+                        return
+                    if now >= deadline:
+                        if breaker_blocked:
+                            self._counts['short_circuited'] += 1
+                            raise CircuitOpenError(
+                                f'AI upstream still unavailable after {self.acquire_timeout}s; circuit breaker is open'
+                            )
+                        self._counts['rejected_busy'] += 1
+                        raise GeminiBusyError(
+                            f'No Gemini request slot available after {self.acquire_timeout}s'
+                        )
+                    wait = deadline - now
+                    if self._state == OPEN:
+                        wait = min(wait, self._opened_at + self.reset_timeout - now)
+                    self._cond.wait(timeout=max(wait, 0.001))
+            finally:
+                self._waiters.remove(ticket)
+                self._cond.notify_all()
+
+    def _leave(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def _record(self, kind, latency, error):
+        with self._cond:
+            now = time.monotonic()
+            if error is None:
+                self._counts['successes'] += 1
+                self._consecutive_failures = 0
+                if self._state == HALF_OPEN:
+                    logger.info('AI upstream recovered; closing circuit breaker')
+                    self._state = CLOSED
+                    self._probing = False
+                if self._observe_latency(kind, latency):
+                    self._counts['slow_calls'] += 1
+                    self._decrease(now)
+                else:
+                    self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+            elif is_transient(error):
+                status = status_code_of(error)
+                if status == 429:
+                    self._counts['throttled'] += 1
+                elif _is_httpx_error(error, 'TimeoutException'):
+                    self._counts['timeouts'] += 1
+                else:
+                    self._counts['server_errors'] += 1
+                self._consecutive_failures += 1
+                self._decrease(now)
+                if self._state == HALF_OPEN or (
+                    self._state == CLOSED and self._consecutive_failures >= self.failure_threshold
+                ):
+                    logger.error(
+                        f"Opening AI circuit breaker for {self.reset_timeout}s after "
+                        f"{self._consecutive_failures} consecutive failures: {str(error)}"
+                    )
+                    self._state = OPEN
+                    self._opened_at = now
+                    self._probing = False
+                    self._counts['breaker_opened'] += 1
+            else:
+                # Upstream answered, even if it refused the request
+                self._counts['client_errors'] += 1
+                if self._state == HALF_OPEN:
+                    self._state = CLOSED
+                    self._probing = False
+            self._cond.notify_all()
+
+    def _observe_latency(self, kind, latency):
+        """Fold a sample into the kind's baseline; True if it was abnormally slow."""
+        baseline, samples = self._latency.get(kind, (latency, 0))
+        slow = samples >= self.LATENCY_WARMUP and latency > baseline * self.latency_tolerance
+        # Slow samples move the baseline less, so congestion is noticed but a
+        # lasting change in upstream speed becomes the new normal
+        alpha = self.LATENCY_ALPHA / 4 if slow else self.LATENCY_ALPHA
+        baseline += alpha * (latency - baseline)
+        self._latency[kind] = (baseline, samples + 1)
+        return slow
+
+    def _decrease(self, now):
+        if now - self._last_decrease < self.decrease_interval:
+            return
+        self._last_decrease = now
+        self._limit = max(float(self.min_limit), self._limit / 2)
+
+    def retry_after(self):
+        """Seconds until the breaker lets a call through again; 0 when it isn't open."""
+        with self._cond:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def state(self):
+        """Snapshot of the limit, breaker and counters, for monitoring."""
+        with self._cond:
+            retry_in = None
+            if self._state == OPEN:
+                retry_in = round(max(0.0, self._opened_at + self.reset_timeout - time.monotonic()), 2)
+            return {
+                'concurrency_limit': round(self._limit, 2),
+                'min_limit': self.min_limit,
+                'max_limit': self.max_limit,
+                'in_flight': self._in_flight,
+                'waiting': len(self._waiters),
+                'latency_baseline_seconds': {
+                    kind: round(baseline, 4) for kind, (baseline, _) in self._latency.items()
+                },
+                'breaker': {
+                    'state': self._state,
+                    'mode': self.breaker_mode,
+                    'consecutive_failures': self._consecutive_failures,
+                    'retry_in_seconds': retry_in
+                },
+                'counts': dict(self._counts)
+            }
+
+ai_governor = AIGovernor()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=ai_governor._after_fork)
@@ -0,0 +1,76 @@
+from app.services.ai_governor import ai_governor
+from app.services.prompts import PROMPT_VERSION
+from typing import Iterator, NamedTuple, Optional
+
+class AIResponse(NamedTuple):
+    """Text from a model call, or one chunk of a streamed one.
+
+    ``usage`` holds ``prompt_tokens``, ``cached_tokens`` and
+    ``output_tokens`` when the provider reports them; for streams it comes
+    with the final chunk.
+    """
+    text: str
+    usage: Optional[dict] = None
+
+class AIProvider:
+    """App extension routing model calls to the provider chosen by ``AI_PROVIDER``.
+
+    Providers implement ``generate`` and ``stream`` taking a fixed system
+    instruction, the per-call message and the prompt kind (``categorize``,
+    ``answer`` or ``structured``), plus ``info`` and ``preload`` (import
+    the provider's SDK ahead of the first call). Calls go through
+    ``ai_governor``, so concurrency limits, retries and the circuit
+    breaker apply whichever provider is in use:
+
+    - ``gemini``: Google Gemini (``app.services.gemini_client``)
+    - ``local``: deterministic offline answers with configurable latency
+      and injected errors (``app.services.local_provider``), for CI and
+      load tests
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        name = app.config.get('AI_PROVIDER', 'gemini')
+        if name == 'gemini':
+            from app.services.gemini_client import gemini_client
+            gemini_client.init_app(app)
+            self.backend = gemini_client
+        elif name == 'local':
+            from app.services.local_provider import local_provider
+            local_provider.init_app(app)
+            self.backend = local_provider
+        else:
+            raise ValueError(f"Unknown AI_PROVIDER '{name}'")
+        app.extensions['ai_provider'] = self
+
+    @property
+    def name(self):
+        return self.backend.name
+
+    def generate(self, instruction: str, message: str, kind: str, json_schema: Optional[dict] = None) -> AIResponse:
+        """One model call; with ``json_schema`` the text is a JSON object matching it."""
+        return ai_governor.call(
+            lambda: self.backend.generate(instruction, message, kind, json_schema),
+            kind=kind
+        )
+
+    def stream(self, instruction: str, message: str, kind: str) -> Iterator[AIResponse]:
+        """Stream a model call chunk by chunk, holding a governor slot until exhausted."""
+        yield from ai_governor.stream(
+            lambda: self.backend.stream(instruction, message, kind),
+            kind=f'{kind}_stream'
+        )
+
+    def preload(self):
+        self.backend.preload()
+
+    def info(self) -> dict:
+        info = {'provider': self.name, 'prompt_version': PROMPT_VERSION}
+        info.update(self.backend.info())
+        return info
+
+ai_provider = AIProvider()
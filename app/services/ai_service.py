@@ -1,192 +1,198 @@
 from flask import current_app
 from app.utils.specialization import Specialization
-from google import genai
-from typing import Tuple
+from app.services.classifier import specialization_classifier
+from app.services.response_cache import response_cache
+from app.services.ai_provider import ai_provider
+from app.services.prompts import (
+    CATEGORIZE_INSTRUCTION, ANSWER_INSTRUCTION, STRUCTURED_INSTRUCTION,
+    categorize_message, answer_message, structured_message, token_usage
+)
+from typing import Iterator, Tuple
+import json
 import logging
 
 # Add logger
 logger = logging.getLogger(__name__)
 
+# Sections requested in single-call mode, in the order they are rendered
+STRUCTURED_SECTIONS = [
+    ('overview', 'Overview'),
+    ('detailed_analysis', 'Detailed Analysis'),
+    ('clinical_considerations', 'Clinical Considerations'),
+    ('important_notes', 'Important Notes'),
+    ('next_steps', 'Next Steps'),
+]
+
 class AIService:
     """Service for handling AI-generated responses."""
     
     def __init__(self):
-        # Get API key from environment variables for security rather than hardcoding
-        self.api_key = current_app.config.get('GEMINI_API_KEY')
-        self.model = current_app.config.get('GEMINI_MODEL', 'gemini-2.0-flash')
         self.valid_categories = Specialization.list()
+        self.single_call = current_app.config.get('AI_SINGLE_CALL', False)
+        self.classifier_enabled = current_app.config.get('CLASSIFIER_ENABLED', True)
+        self.classifier_threshold = current_app.config.get('CLASSIFIER_CONFIDENCE_THRESHOLD', 0.6)
         
-        # Initialize the genai client
-        self.client = genai.Client(api_key=self.api_key)
+        # Shared per-process provider chosen by AI_PROVIDER; AIService itself is cheap to create per request
+        self.provider = ai_provider
     
     def get_response(self, query: str) -> Tuple[str, str]:
-        """Get AI response for a health query"""
+        """Get AI response for a health query, reusing cached answers to the same question"""
+        return response_cache.get_or_compute(query, lambda: self._generate_response(query))
+    
+    def _generate_response(self, query: str) -> Tuple[str, str]:
+        """Ask the model for a category and answer"""
+        if self.single_call:
+            try:
+                return self._get_structured_response(query)
+            except Exception as e:
+                # Unparseable or invalid structured output; use the two-call path instead
+                logger.warning(f"Structured response failed, falling back to two calls: {str(e)}")
+        
         try:
             # First determine the category
             category = self._determine_category(query)
             
-            # Prepare the prompt with the determined category
-            prompt = f"""You are a medical AI assistant. Please provide a detailed medical response to the following health query. Format your response exactly as shown, starting with the category:
-
-Query: {query}
-
-# Category
-{category}
-
-# Overview
-[Provide a brief summary of the main points]
-
-# Detailed Analysis
-
-Key symptoms and their significance:
-- [Symptom 1 and its significance]
-- [Symptom 2 and its significance]
-- [Symptom 3 and its significance]
-
-Potential causes and risk factors:
-- [Cause/factor 1]
-- [Cause/factor 2]
-- [Cause/factor 3]
-
-Relevant medical conditions:
-- [Condition 1]
-- [Condition 2]
-- [Condition 3]
-
-# Clinical Considerations
-
-When to seek immediate medical attention:
-- [Emergency situation 1]
-- [Emergency situation 2]
-- [Emergency situation 3]
-
-Warning signs to watch for:
-- [Warning sign 1]
-- [Warning sign 2]
-- [Warning sign 3]
-
-Risk factors to be aware of:
-- [Risk factor 1]
-- [Risk factor 2]
-- [Risk factor 3]
-
-# Important Notes
-
-Key points to remember:
-- [Key point 1]
-- [Key point 2]
-- [Key point 3]
-
-Lifestyle considerations:
-- [Lifestyle point 1]
-- [Lifestyle point 2]
-- [Lifestyle point 3]
-
-Preventive measures:
-- [Measure 1]
-- [Measure 2]
-- [Measure 3]
-
-# Next Steps
-
-Immediate actions:
-- [Action 1]
-- [Action 2]
-- [Action 3]
-
-Follow-up recommendations:
-- [Recommendation 1]
-- [Recommendation 2]
-- [Recommendation 3]
-
-Self-care measures:
-- [Measure 1]
-- [Measure 2]
-- [Measure 3]
-
-Please ensure your response:
-1. Follows this exact format with proper markdown
-2. Includes the category section at the top
-3. Uses proper line breaks between sections
-4. Uses proper list formatting with dashes
-5. Is professional and medically accurate
-6. Is clear and easy to understand
-7. Is based on current medical knowledge
-8. Is appropriate for the query's urgency level
-9. Does not include any disclaimers"""
-
-            # Get response from Gemini
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=prompt,
-            )
+            # Only the query and category are sent; the scaffold is the system instruction
+            response = self.provider.generate(ANSWER_INSTRUCTION, answer_message(query, category), 'answer')
+            token_usage.record('answer', response.usage)
             
             # Extract the response text and ensure proper markdown formatting
-            ai_response = response.text.strip()
-            
-            # Process the markdown to ensure proper formatting
-            lines = ai_response.split('\n')
-            formatted_lines = []
+            ai_response = self._format_response(response.text, category)
             
-            for i, line in enumerate(lines):
-                # Add double line breaks before headers
-                if line.startswith('#'):
-                    if i > 0:  # Don't add newline before the first header
-                        formatted_lines.extend(['', ''])
-                    formatted_lines.append(line)
-                # Add proper spacing for list items
-                elif line.strip().startswith('-'):
-                    if i > 0 and not lines[i-1].strip().startswith('-'):
-                        formatted_lines.append('')
-                    formatted_lines.append(line)
-                # Handle normal lines
-                else:
-                    formatted_lines.append(line)
+            return category, ai_response
             
-            # Join the lines back together
-            ai_response = '\n'.join(formatted_lines)
+        except Exception as e:
+            logger.error(f"Error getting AI response: {str(e)}")
+            raise AIServiceError(f"Failed to get AI response: {str(e)}") from e
+    
+    def stream_response(self, query: str) -> Iterator[Tuple[str, str]]:
+        """Stream an AI response for a health query.
+
+        Yields ``('category', name)`` first, then ``('chunk', text)`` for each
+        piece of the answer as it arrives, and finally ``('done', markdown)``
+        with the complete, normalized answer.
+        """
+        try:
+            category = self._determine_category(query)
+            yield 'category', category
             
-            # Verify category is included
-            if '# Category' not in ai_response:
-                ai_response = f"# Category\n{category}\n\n{ai_response}"
+            chunks = []
+            usage = None
+            for response in self.provider.stream(ANSWER_INSTRUCTION, answer_message(query, category), 'answer'):
+                if response.text:
+                    chunks.append(response.text)
+                    yield 'chunk', response.text
+                # Usage totals arrive with the final chunk
+                usage = response.usage or usage
+            token_usage.record('answer_stream', usage)
             
-            return category, ai_response
+            yield 'done', self._format_response(''.join(chunks), category)
             
         except Exception as e:
-            logger.error(f"Error getting AI response: {str(e)}")
-            raise AIServiceError(f"Failed to get AI response: {str(e)}")
+            logger.error(f"Error streaming AI response: {str(e)}")
+            raise AIServiceError(f"Failed to stream AI response: {str(e)}") from e
+    
+    def _get_structured_response(self, query: str) -> Tuple[str, str]:
+        """Categorize and answer a query with a single structured-output call."""
+        response = self.provider.generate(
+            STRUCTURED_INSTRUCTION, structured_message(query), 'structured',
+            json_schema=self._structured_schema()
+        )
+        token_usage.record('structured', response.usage)
+        
+        payload = json.loads(response.text)
+        category = self._match_category(payload['category'])
+        if category is None:
+            raise ValueError(f"Category '{payload['category']}' is not a valid specialization")
+        
+        sections = [f"# Category\n{category}"]
+        for key, title in STRUCTURED_SECTIONS:
+            content = payload[key]
+            if not isinstance(content, str) or not content.strip():
+                raise ValueError(f"Missing content for section '{key}'")
+            sections.append(f"# {title}\n\n{content.strip()}")
+        
+        return category, self._format_response('\n\n'.join(sections), category)
+    
+    def _structured_schema(self) -> dict:
+        """JSON schema for the single-call structured response."""
+        properties = {'category': {'type': 'STRING', 'format': 'enum', 'enum': self.valid_categories}}
+        for key, _ in STRUCTURED_SECTIONS:
+            properties[key] = {'type': 'STRING'}
+        return {
+            'type': 'OBJECT',
+            'properties': properties,
+            'required': list(properties),
+            'property_ordering': list(properties),
+        }
+    
+    def _format_response(self, text: str, category: str) -> str:
+        """Normalize model markdown and make sure the category section is present."""
+        ai_response = text.strip()
+        
+        # Process the markdown to ensure proper formatting
+        lines = ai_response.split('\n')
+        formatted_lines = []
+        
+        for i, line in enumerate(lines):
+            # Add double line breaks before headers
+            if line.startswith('#'):
+                if i > 0:  # Don't add newline before the first header
+                    formatted_lines.extend(['', ''])
+                formatted_lines.append(line)
+            # Add proper spacing for list items
+            elif line.strip().startswith('-'):
+                if i > 0 and not lines[i-1].strip().startswith('-'):
+                    formatted_lines.append('')
+                formatted_lines.append(line)
+            # Handle normal lines
+            else:
+                formatted_lines.append(line)
+        
+        # Join the lines back together
+        ai_response = '\n'.join(formatted_lines)
+        
+        # Verify category is included
+        if '# Category' not in ai_response:
+            ai_response = f"# Category\n{category}\n\n{ai_response}"
+        
+        return ai_response
+    
+    def _match_category(self, suggested_category: str):
+        """Return the canonical specialization for a model suggestion, or None."""
+        suggested_category = suggested_category.strip()
+        # Ensure the category is valid (case-insensitive comparison)
+        for valid_category in self.valid_categories:
+            if valid_category.lower() == suggested_category.lower():
+                return valid_category
+        return None
     
     def _determine_category(self, query: str) -> str:
         """Determine the medical specialization category based on the query content."""
+        # The local classifier answers confident cases without a network round trip
+        local_category, confidence = specialization_classifier.classify(query)
+        if self.classifier_enabled and confidence >= self.classifier_threshold:
+            logger.debug(f"Local classifier chose '{local_category}' ({confidence:.2f})")
+            return local_category
+        
         try:
-            # Create a prompt for categorization
-            categorization_prompt = f"""Given the following medical query, determine the most appropriate medical specialization category from this list: {', '.join(self.valid_categories)}.
-
-Query: {query}
-
-Please respond with ONLY the name of the most appropriate specialization category from the list provided. Don't include any explanations or additional text."""
-
-            # Get categorization from Gemini using the correct client method
-            category_response = self.client.models.generate_content(
-                model=self.model,
-                contents=categorization_prompt
-            )
+            # Ask the model; the category list is in the system instruction
+            category_response = self.provider.generate(CATEGORIZE_INSTRUCTION, categorize_message(query), 'categorize')
+            token_usage.record('categorize', category_response.usage)
             
             # Extract and validate the category
             suggested_category = category_response.text.strip()
+            valid_category = self._match_category(suggested_category)
+            if valid_category:
+                return valid_category
             
-            # Ensure the category is valid (case-insensitive comparison)
-            for valid_category in self.valid_categories:
-                if valid_category.lower() == suggested_category.lower():
-                    return valid_category
-            
-            # Default to General Medicine if no match is found
-            logger.warning(f"Category '{suggested_category}' not found in valid categories. Defaulting to 'General Medicine'.")
-            return "General Medicine"
+            # Default to the local classifier's best guess if no match is found
+            logger.warning(f"Category '{suggested_category}' not found in valid categories. Defaulting to '{local_category}'.")
+            return local_category
             
         except Exception as e:
             logger.error(f"Error determining category: {str(e)}")
-            return "General Medicine"  # Default category on error
+            return local_category  # Best local guess, DEFAULT_CATEGORY if there was no signal
 
 class AIServiceError(Exception):
     """Custom exception for AI service errors."""
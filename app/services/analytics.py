@@ -0,0 +1,245 @@
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from app import db
+from app.models.analytics import QueryCategoryStats, ClinicianLatencySketch
+from app.models.query import Query
+from app.services.assignment import OPEN_STATUSES
+from app.utils.sketch import DDSketch
+from sqlalchemy.dialects import postgresql, sqlite
+
+COUNTER_COLUMNS = ('query_count', 'reviewed_count', 'review_seconds_total')
+
+# Review latency quantiles are accurate to within 1% of the true value
+SKETCH_ALPHA = 0.01
+LATENCY_WINDOWS = {
+    '24h': timedelta(hours=24),
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30)
+}
+LATENCY_QUANTILES = {'p50': 0.5, 'p90': 0.9, 'p99': 0.99}
+SKETCH_RETENTION = max(LATENCY_WINDOWS.values())
+
+def _increment(category, **deltas):
+    """Add deltas to one category's counters inside the caller's transaction."""
+    deltas = {column: deltas.get(column, 0) for column in COUNTER_COLUMNS}
+    table = QueryCategoryStats.__table__
+    now = datetime.utcnow()
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        insert = (postgresql if dialect == 'postgresql' else sqlite).insert(table)
+        statement = insert.values(category=category, updated_at=now, **deltas).on_conflict_do_update(
+            index_elements=[table.c.category],
+            set_={
+                **{column: table.c[column] + insert.excluded[column] for column in COUNTER_COLUMNS},
+                'updated_at': now
+            }
+        )
+        db.session.execute(statement)
+        return
+
+    updated = db.session.execute(
+        table.update()
+        .where(table.c.category == category)
+        .values(updated_at=now, **{column: table.c[column] + delta for column, delta in deltas.items()})
+    ).rowcount
+    if not updated:
+        db.session.execute(table.insert().values(category=category, updated_at=now, **deltas))
+
+def record_queries_created(categories):
+    """Count newly inserted queries; one statement per distinct category."""
+    for category, created in Counter(categories).items():
+        _increment(category, query_count=created)
+
+def record_query_created(category):
+    record_queries_created([category])
+
+def record_category_change(old_category, new_category):
+    """Move a query between categories, e.g. once the AI has categorized it."""
+    if old_category == new_category:
+        return
+    _increment(old_category, query_count=-1)
+    _increment(new_category, query_count=1)
+
+def record_review(query, previous_reviewed_at=None, previous_clinician_id=None):
+    """Add a query's review time; a re-review replaces the earlier time.
+
+    ``previous_clinician_id`` is whoever gave the earlier review, when it
+    may not be the query's current clinician.
+    """
+    seconds = (query.reviewed_at - query.created_at).total_seconds()
+    if previous_reviewed_at is None:
+        _increment(query.category, reviewed_count=1, review_seconds_total=seconds)
+    else:
+        previous = (previous_reviewed_at - query.created_at).total_seconds()
+        _increment(query.category, review_seconds_total=seconds - previous)
+        _adjust_latency_sketch(
+            previous_clinician_id or query.clinician_id, query, previous_reviewed_at, previous, remove=True
+        )
+    _adjust_latency_sketch(query.clinician_id, query, query.reviewed_at, seconds)
+
+def _hour(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+def _adjust_latency_sketch(clinician_id, query, reviewed_at, seconds, remove=False):
+    """Add or remove one review latency in the clinician's hourly sketch."""
+    if clinician_id is None:
+        return
+    key = (clinician_id, query.urgency_level or 'normal', _hour(reviewed_at))
+    row = db.session.get(ClinicianLatencySketch, key, with_for_update=True)
+    if row is None:
+        if remove:
+            return
+        row = ClinicianLatencySketch(
+            clinician_id=key[0], urgency_level=key[1], bucket_start=key[2], review_count=0
+        )
+        db.session.add(row)
+        sketch = DDSketch(SKETCH_ALPHA)
+    else:
+        sketch = DDSketch.from_json(row.sketch)
+
+    if remove:
+        sketch.remove(seconds)
+    else:
+        sketch.add(seconds)
+    row.sketch = sketch.to_json()
+    row.review_count = sketch.count
+
+def _review_seconds_expression():
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return db.func.extract('epoch', Query.reviewed_at - Query.created_at)
+    return (db.func.julianday(Query.reviewed_at) - db.func.julianday(Query.created_at)) * 86400.0
+
+def rebuild_rollups():
+    """Recompute every category's counters and recent latency sketches."""
+    rows = db.session.query(
+        Query.category,
+        db.func.count(Query.id),
+        db.func.count(Query.reviewed_at),
+        db.func.coalesce(db.func.sum(_review_seconds_expression()), 0.0)
+    ).group_by(Query.category).all()
+
+    QueryCategoryStats.query.delete(synchronize_session=False)
+    now = datetime.utcnow()
+    db.session.add_all([
+        QueryCategoryStats(
+            category=category,
+            query_count=query_count,
+            reviewed_count=reviewed_count,
+            review_seconds_total=float(review_seconds_total),
+            updated_at=now
+        )
+        for category, query_count, reviewed_count, review_seconds_total in rows
+    ])
+    _rebuild_latency_sketches()
+    db.session.commit()
+    return len(rows)
+
+def _rebuild_latency_sketches():
+    since = _hour(datetime.utcnow()) - SKETCH_RETENTION
+    reviews = db.session.query(
+        Query.clinician_id, Query.urgency_level, Query.created_at, Query.reviewed_at
+    ).filter(
+        Query.clinician_id.isnot(None),
+        Query.reviewed_at >= since
+    ).yield_per(1000)
+
+    sketches = defaultdict(lambda: DDSketch(SKETCH_ALPHA))
+    for clinician_id, urgency_level, created_at, reviewed_at in reviews:
+        key = (clinician_id, urgency_level or 'normal', _hour(reviewed_at))
+        sketches[key].add((reviewed_at - created_at).total_seconds())
+
+    ClinicianLatencySketch.query.delete(synchronize_session=False)
+    db.session.add_all([
+        ClinicianLatencySketch(
+            clinician_id=clinician_id,
+            urgency_level=urgency_level,
+            bucket_start=bucket_start,
+            review_count=sketch.count,
+            sketch=sketch.to_json()
+        )
+        for (clinician_id, urgency_level, bucket_start), sketch in sketches.items()
+    ])
+
+def prune_latency_sketches():
+    """Delete hourly sketches older than the longest reporting window."""
+    cutoff = _hour(datetime.utcnow()) - SKETCH_RETENTION
+    removed = ClinicianLatencySketch.query.filter(
+        ClinicianLatencySketch.bucket_start < cutoff
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return removed
+
+def get_rollups():
+    """Category counts and average review time from the rollup table."""
+    rows = QueryCategoryStats.query.all()
+    reviewed = sum(row.reviewed_count for row in rows)
+    review_seconds = sum(row.review_seconds_total for row in rows)
+    return {
+        'category_stats': {row.category: row.query_count for row in rows if row.query_count},
+        'avg_response_time_seconds': review_seconds / reviewed if reviewed else 0
+    }
+
+def _summarize(sketch):
+    summary = {'count': sketch.count}
+    for name, q in LATENCY_QUANTILES.items():
+        value = sketch.quantile(q)
+        summary[f'{name}_seconds'] = round(value, 1) if value is not None else None
+    return summary
+
+def get_clinician_latency(clinician_id):
+    """Review-latency percentiles per rolling window, overall and by urgency.
+
+    Windows are aligned to whole hours and include the current hour, so
+    '24h' covers the last 24 hourly sketches.
+    """
+    current_hour = _hour(datetime.utcnow())
+    rows = db.session.query(
+        ClinicianLatencySketch.urgency_level,
+        ClinicianLatencySketch.bucket_start,
+        ClinicianLatencySketch.sketch
+    ).filter(
+        ClinicianLatencySketch.clinician_id == clinician_id,
+        ClinicianLatencySketch.bucket_start > current_hour - SKETCH_RETENTION
+    ).all()
+    hourly = [(urgency, bucket_start, DDSketch.from_json(data)) for urgency, bucket_start, data in rows]
+
+    latency = {}
+    for window, span in LATENCY_WINDOWS.items():
+        start = current_hour - span + timedelta(hours=1)
+        overall = DDSketch(SKETCH_ALPHA)
+        by_urgency = defaultdict(lambda: DDSketch(SKETCH_ALPHA))
+        for urgency, bucket_start, sketch in hourly:
+            if bucket_start >= start:
+                overall.merge(sketch)
+                by_urgency[urgency].merge(sketch)
+        latency[window] = _summarize(overall)
+        latency[window]['by_urgency'] = {
+            urgency: _summarize(sketch) for urgency, sketch in sorted(by_urgency.items())
+        }
+    return latency
+
+def get_clinician_stats(clinician_id):
+    """Review counts and latency for one clinician, computed in SQL."""
+    total_reviewed, avg_response_time = db.session.query(
+        db.func.count(Query.id),
+        db.func.avg(_review_seconds_expression())
+    ).filter(
+        Query.clinician_id == clinician_id,
+        Query.status == 'verified',
+        Query.reviewed_at.isnot(None)
+    ).one()
+    pending_reviews = db.session.query(db.func.count(Query.id))\
+        .filter(Query.status == 'pending')\
+        .scalar()
+    assigned_open = db.session.query(db.func.count(Query.id))\
+        .filter(Query.clinician_id == clinician_id, Query.status.in_(OPEN_STATUSES))\
+        .scalar()
+
+    return {
+        'total_reviewed': total_reviewed,
+        'pending_reviews': pending_reviews,
+        'assigned_open': assigned_open,
+        'avg_response_time_seconds': float(avg_response_time or 0),
+        'latency': get_clinician_latency(clinician_id)
+    }
@@ -0,0 +1,142 @@
+from app import db
+from app.models.query import Query
+from app.models.user import User
+from itertools import count
+import threading
+import logging
+import heapq
+import time
+
+logger = logging.getLogger(__name__)
+
+# Statuses that count towards a clinician's open workload
+OPEN_STATUSES = ('pending', 'pending_review')
+
+# Heap key for the roster of every clinician, used when no specialist exists
+ALL_CLINICIANS = '*'
+
+class ClinicianAssigner:
+    """Assigns queries to the least-loaded eligible clinician.
+
+    Keeps an in-memory roster of clinician ids indexed by specialization,
+    with one min-heap of ``(open_queries, last_assigned, id)`` per
+    specialization plus one across all clinicians. Loads change
+    incrementally on assignment and review; outdated heap entries are
+    skipped lazily, so picking a clinician is O(log n) and needs no
+    database round trip.
+
+    Counts are per process, so the roster is rebuilt from the database when
+    a clinician registers or edits their profile and every
+    ``ASSIGNMENT_ROSTER_TTL_SECONDS`` to absorb other workers' assignments.
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 300
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._load = {}
+        self._stamp = {}
+        self._specialization = {}
+        self._heaps = {}
+        self._sequence = count()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get('ASSIGNMENT_ROSTER_TTL_SECONDS', 300)
+        app.extensions['clinician_assigner'] = self
+
+    def invalidate(self):
+        """Force the roster to be reloaded on the next assignment."""
+        with self._lock:
+            self._loaded_at = None
+
+    def assign(self, category):
+        """Return the id of the least-loaded clinician for a category, or None."""
+        return self.assign_many([category])[0]
+
+    def assign_many(self, categories):
+        """Assign one clinician per category, balancing load across the batch."""
+        with self._lock:
+            self._ensure_loaded()
+            return [self._pick(category) for category in categories]
+
+    def release(self, clinician_id):
+        """Record that one of a clinician's open queries was reviewed."""
+        if clinician_id is None:
+            return
+        with self._lock:
+            if self._loaded_at is None or clinician_id not in self._load:
+                return
+            self._load[clinician_id] = max(0, self._load[clinician_id] - 1)
+            self._push(clinician_id)
+
+    def take(self, clinician_id, count=1):
+        """Record that a clinician picked up open queries on their own, by claiming them."""
+        if clinician_id is None or not count:
+            return
+        with self._lock:
+            if self._loaded_at is None or clinician_id not in self._load:
+                return
+            self._load[clinician_id] += count
+            self._push(clinician_id)
+
+    def loads(self):
+        """Snapshot of open-query counts by clinician id."""
+        with self._lock:
+            self._ensure_loaded()
+            return dict(self._load)
+
+    def _ensure_loaded(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return
+
+        clinicians = User.query.with_entities(User.id, User.specialization)\
+            .filter(User.role == 'clinician')\
+            .all()
+        open_counts = dict(db.session.query(Query.clinician_id, db.func.count(Query.id))
+            .filter(Query.clinician_id.isnot(None), Query.status.in_(OPEN_STATUSES))
+            .group_by(Query.clinician_id)
+            .all())
+
+        self._load = {row.id: open_counts.get(row.id, 0) for row in clinicians}
+        self._specialization = {row.id: row.specialization for row in clinicians}
+        self._stamp = {}
+        self._heaps = {ALL_CLINICIANS: []}
+        for clinician_id in self._load:
+            self._heaps.setdefault(self._specialization[clinician_id], [])
+            self._push(clinician_id)
+        self._loaded_at = time.monotonic()
+        logger.debug(f"Loaded clinician roster: {len(self._load)} clinicians")
+
+    def _push(self, clinician_id):
+        stamp = next(self._sequence)
+        self._stamp[clinician_id] = stamp
+        entry = (self._load[clinician_id], stamp, clinician_id)
+        heapq.heappush(self._heaps[self._specialization[clinician_id]], entry)
+        heapq.heappush(self._heaps[ALL_CLINICIANS], entry)
+
+    def _pick(self, category):
+        # Fall back to every clinician when nobody has this specialization
+        heap = self._heaps.get(category) or self._heaps[ALL_CLINICIANS]
+        while heap and self._stamp.get(heap[0][2]) != heap[0][1]:
+            heapq.heappop(heap)  # superseded by a newer entry
+        if not heap:
+            return None
+
+        load, _, clinician_id = heap[0]
+        self._load[clinician_id] = load + 1
+        self._push(clinician_id)
+        self._compact()
+        return clinician_id
+
+    def _compact(self):
+        # Stale entries that never reach the top would otherwise pile up
+        heap = self._heaps[ALL_CLINICIANS]
+        if len(heap) > 4 * len(self._load) + 64:
+            for key in self._heaps:
+                self._heaps[key] = [entry for entry in self._heaps[key]
+                                    if self._stamp.get(entry[2]) == entry[1]]
+                heapq.heapify(self._heaps[key])
+
+clinician_assigner = ClinicianAssigner()
@@ -0,0 +1,308 @@
+from app.utils.specialization import Specialization
+from collections import Counter
+from typing import Iterable, Optional, Tuple
+import numpy as np
+import threading
+import logging
+import zlib
+import re
+import os
+
+logger = logging.getLogger(__name__)
+
+# Category used when neither the local classifier nor the model can decide
+DEFAULT_CATEGORY = Specialization.FAMILY_MEDICINE.value
+
+N_FEATURES = 2 ** 14
+
+# Weight of one lexicon hit relative to the learned tf-idf similarity
+LEXICON_WEIGHT = 1.0
+
+# Softmax temperature turning raw scores into a confidence
+CONFIDENCE_SCALE = 4.0
+
+STOP_WORDS = frozenset("""
+a about after again all also am an and any are as at be been before being but by can could
+did do does doing for from had has have having he her here hers him his how i if in into is it
+its just me more most my myself no nor not now of off on once only or other our out over own
+same she should so some such than that the their them then there these they this those through
+to too under until up very was we were what when where which while who why will with would you
+your yours feel feeling get getting got since really lot lately
+""".split())
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Keywords and synonyms per specialization; two-word terms match as bigrams
+LEXICON = {
+    Specialization.CARDIOLOGY: [
+        'heart', 'chest pain', 'palpitation', 'blood pressure', 'hypertension', 'arrhythmia',
+        'cholesterol', 'angina', 'heartbeat', 'cardiac', 'heart attack', 'murmur', 'racing heart',
+    ],
+    Specialization.DERMATOLOGY: [
+        'skin', 'rash', 'acne', 'eczema', 'psoriasis', 'mole', 'itchy', 'itching', 'hive',
+        'dermatitis', 'wart', 'blister', 'hair loss', 'sunburn', 'pimple',
+    ],
+    Specialization.NEUROLOGY: [
+        'headache', 'migraine', 'seizure', 'numbness', 'tingling', 'dizziness', 'dizzy',
+        'memory loss', 'tremor', 'stroke', 'nerve', 'epilepsy', 'concussion', 'vertigo',
+    ],
+    Specialization.PEDIATRICS: [
+        'child', 'baby', 'infant', 'toddler', 'newborn', 'son', 'daughter', 'kid',
+        'teething', 'vaccination', 'growth chart', 'diaper',
+    ],
+    Specialization.PSYCHIATRY: [
+        'anxiety', 'depression', 'depressed', 'panic attack', 'stress', 'insomnia', 'mood',
+        'suicidal', 'bipolar', 'adhd', 'ptsd', 'mental health', 'hallucination', 'anxious',
+    ],
+    Specialization.ORTHOPEDICS: [
+        'knee', 'back pain', 'fracture', 'broken bone', 'joint pain', 'shoulder', 'hip',
+        'sprain', 'ankle', 'tendon', 'ligament', 'spine', 'wrist', 'bone',
+    ],
+    Specialization.GYNECOLOGY: [
+        'period', 'menstrual', 'pregnancy', 'pregnant', 'vaginal', 'ovarian', 'menopause',
+        'pap smear', 'uterus', 'cramp', 'contraception', 'pelvic pain', 'miscarriage',
+    ],
+    Specialization.ONCOLOGY: [
+        'cancer', 'tumor', 'lump', 'chemotherapy', 'malignant', 'biopsy', 'lymphoma',
+        'metastasis', 'radiation therapy', 'oncologist', 'mass',
+    ],
+    Specialization.ENDOCRINOLOGY: [
+        'diabetes', 'thyroid', 'insulin', 'blood sugar', 'hormone', 'glucose', 'weight gain',
+        'hypothyroidism', 'hyperthyroidism', 'metabolism', 'adrenal',
+    ],
+    Specialization.GASTROENTEROLOGY: [
+        'stomach', 'nausea', 'vomiting', 'diarrhea', 'constipation', 'heartburn', 'acid reflux',
+        'bloating', 'abdominal pain', 'ibs', 'bowel', 'liver', 'indigestion', 'stool',
+    ],
+    Specialization.PULMONOLOGY: [
+        'cough', 'shortness of breath', 'breathing', 'asthma', 'wheezing', 'lung', 'copd',
+        'pneumonia', 'breathless', 'sleep apnea', 'phlegm', 'bronchitis',
+    ],
+    Specialization.NEPHROLOGY: [
+        'kidney', 'renal', 'dialysis', 'creatinine', 'kidney stone', 'swollen ankle',
+        'protein in urine', 'kidney function',
+    ],
+    Specialization.UROLOGY: [
+        'urine', 'urination', 'bladder', 'prostate', 'urinary', 'erectile', 'incontinence',
+        'uti', 'testicle', 'frequent urination', 'burning urination',
+    ],
+    Specialization.OPHTHALMOLOGY: [
+        'eye', 'vision', 'blurry vision', 'blurred vision', 'glaucoma', 'cataract', 'red eye',
+        'eyesight', 'floater', 'retina', 'dry eye',
+    ],
+    Specialization.ENT: [
+        'ear', 'nose', 'throat', 'sinus', 'hearing', 'tinnitus', 'sore throat', 'tonsil',
+        'earache', 'nasal', 'hoarse', 'sinusitis', 'ringing ear',
+    ],
+    Specialization.RHEUMATOLOGY: [
+        'arthritis', 'lupus', 'gout', 'joint stiffness', 'rheumatoid', 'autoimmune',
+        'fibromyalgia', 'swollen joint', 'morning stiffness',
+    ],
+    Specialization.HEMATOLOGY: [
+        'anemia', 'bleeding', 'bruising', 'blood clot', 'platelet', 'hemoglobin', 'iron',
+        'blood count', 'clotting', 'easy bruising',
+    ],
+    Specialization.INFECTIOUS_DISEASE: [
+        'fever', 'infection', 'virus', 'flu', 'covid', 'bacterial', 'antibiotic', 'hiv',
+        'std', 'tuberculosis', 'chill', 'contagious', 'malaria',
+    ],
+    Specialization.ALLERGY_IMMUNOLOGY: [
+        'allergy', 'allergic', 'sneezing', 'hay fever', 'pollen', 'peanut', 'anaphylaxis',
+        'food allergy', 'immune', 'runny nose',
+    ],
+    Specialization.EMERGENCY_MEDICINE: [
+        'emergency', 'unconscious', 'severe bleeding', 'overdose', 'poisoning', 'accident',
+        'breathe', 'collapsed', 'burn', 'choking',
+    ],
+    Specialization.FAMILY_MEDICINE: [
+        'checkup', 'check up', 'general health', 'cold', 'tired', 'fatigue', 'vaccine',
+        'physical exam', 'wellness', 'prescription refill',
+    ],
+    Specialization.INTERNAL_MEDICINE: [
+        'weight loss', 'chronic', 'night sweat', 'weakness', 'appetite', 'multiple condition',
+        'side effect', 'lab result',
+    ],
+    Specialization.GENERAL_SURGERY: [
+        'surgery', 'hernia', 'appendicitis', 'gallbladder', 'incision', 'wound', 'stitches',
+        'post operative', 'abscess', 'operation',
+    ],
+    Specialization.PLASTIC_SURGERY: [
+        'cosmetic', 'scar', 'breast implant', 'rhinoplasty', 'reconstructive', 'botox',
+        'facelift', 'liposuction', 'tummy tuck', 'skin graft',
+    ],
+}
+
+def normalize_token(token: str) -> str:
+    """Fold simple plurals so 'headaches' and 'headache' share a feature."""
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+def tokenize(text: str) -> list:
+    """Lowercase word tokens with stop words removed."""
+    return [normalize_token(t) for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOP_WORDS]
+
+def feature_index(term: str) -> int:
+    """Stable hashed feature index for a unigram or bigram."""
+    return zlib.crc32(term.encode('utf-8')) % N_FEATURES
+
+def extract_features(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Hashed unigram and bigram counts as parallel (indices, counts) arrays."""
+    tokens = tokenize(text)
+    counts = Counter(feature_index(t) for t in tokens)
+    counts.update(feature_index(f'{a} {b}') for a, b in zip(tokens, tokens[1:]))
+    return (np.fromiter(counts.keys(), dtype=np.int64, count=len(counts)),
+            np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+
+def build_lexicon_matrix(classes) -> np.ndarray:
+    """Dense (classes x features) matrix with one weight per lexicon term."""
+    matrix = np.zeros((len(classes), N_FEATURES), dtype=np.float32)
+    for row, category in enumerate(classes):
+        for term in LEXICON.get(Specialization(category), []):
+            # Lexicon terms pass through the same normalization as questions
+            normalized = ' '.join(tokenize(term))
+            matrix[row, feature_index(normalized)] = 1.0
+    return matrix
+
+class SpecializationClassifier:
+    """Scores a question against every specialization in one vectorized pass.
+
+    Scores combine a keyword/synonym lexicon with class centroids learned
+    from clinician-verified queries (tf-idf over hashed unigrams and
+    bigrams). Both live in a single (classes x features) matrix, so
+    classification is a gather of the question's feature columns and a
+    matrix-vector product.
+    """
+
+    def __init__(self, classes=None, centroids=None, idf=None):
+        self.classes = list(classes or Specialization.list())
+        self.centroids = centroids if centroids is not None else \
+            np.zeros((len(self.classes), N_FEATURES), dtype=np.float32)
+        self.idf = idf if idf is not None else np.ones(N_FEATURES, dtype=np.float32)
+        self.lexicon = build_lexicon_matrix(self.classes)
+        # Lexicon rows stacked over centroid rows so one gather serves both
+        self._matrix = np.vstack([self.lexicon, self.centroids]).astype(np.float32)
+
+    @property
+    def is_trained(self) -> bool:
+        return bool(self.centroids.any())
+
+    def classify(self, text: str) -> Tuple[str, float]:
+        """Return the best specialization and a confidence in [0, 1]."""
+        indices, counts = extract_features(text)
+        if indices.size == 0:
+            return DEFAULT_CATEGORY, 0.0
+
+        values = counts * self.idf[indices]
+        norm = np.linalg.norm(values)
+        if norm:
+            values /= norm
+        columns = self._matrix[:, indices]
+        n_classes = len(self.classes)
+        # Lexicon hits count once per term regardless of the tf-idf weighting
+        scores = LEXICON_WEIGHT * columns[:n_classes].sum(axis=1) + columns[n_classes:] @ values
+
+        best = int(np.argmax(scores))
+        if scores[best] <= 0:
+            return DEFAULT_CATEGORY, 0.0
+
+        exp_scores = np.exp(CONFIDENCE_SCALE * (scores - scores[best]))
+        confidence = float(1.0 / exp_scores.sum())
+        return self.classes[best], confidence
+
+    @classmethod
+    def train(cls, samples: Iterable[Tuple[str, str]]) -> 'SpecializationClassifier':
+        """Learn tf-idf class centroids from (question, category) pairs."""
+        classes = Specialization.list()
+        class_index = {category: i for i, category in enumerate(classes)}
+
+        documents = []
+        for question, category in samples:
+            if category not in class_index:
+                continue
+            indices, counts = extract_features(question)
+            if indices.size:
+                documents.append((class_index[category], indices, counts))
+
+        idf = np.ones(N_FEATURES, dtype=np.float32)
+        centroids = np.zeros((len(classes), N_FEATURES), dtype=np.float32)
+        if not documents:
+            return cls(classes, centroids, idf)
+
+        document_frequency = np.zeros(N_FEATURES, dtype=np.float32)
+        for _, indices, _ in documents:
+            document_frequency[indices] += 1
+        idf = (np.log((1 + len(documents)) / (1 + document_frequency)) + 1).astype(np.float32)
+
+        class_counts = np.zeros(len(classes), dtype=np.float32)
+        for row, indices, counts in documents:
+            values = counts * idf[indices]
+            values /= np.linalg.norm(values)
+            centroids[row, indices] += values
+            class_counts[row] += 1
+
+        # Unit-length centroids make scores cosine similarities
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        np.divide(centroids, norms, out=centroids, where=norms > 0)
+        return cls(classes, centroids, idf)
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        np.savez_compressed(path, classes=np.array(self.classes), centroids=self.centroids, idf=self.idf)
+
+    @classmethod
+    def load(cls, path: str) -> 'SpecializationClassifier':
+        with np.load(path) as data:
+            classes = [str(c) for c in data['classes']]
+            if classes != Specialization.list():
+                raise ValueError('Saved classifier does not match the current specializations')
+            return cls(classes, data['centroids'], data['idf'])
+
+class LocalClassifier:
+    """App extension that lazily loads the process-wide classifier."""
+
+    def __init__(self, app=None):
+        self.model_path = None
+        self._classifier = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.model_path = app.config.get('CLASSIFIER_MODEL_PATH') or \
+            os.path.join(app.instance_path, 'specialization_classifier.npz')
+        app.extensions['specialization_classifier'] = self
+
+    @property
+    def classifier(self) -> SpecializationClassifier:
+        if self._classifier is None:
+            with self._lock:
+                if self._classifier is None:
+                    self._classifier = self._load()
+        return self._classifier
+
+    def _load(self) -> SpecializationClassifier:
+        if self.model_path and os.path.exists(self.model_path):
+            try:
+                return SpecializationClassifier.load(self.model_path)
+            except Exception as e:
+                logger.error(f"Failed to load classifier from {self.model_path}: {str(e)}")
+        # Lexicon-only until a model has been trained
+        return SpecializationClassifier()
+
+    def preload(self):
+        """Load the model now instead of on the first classification."""
+        return self.classifier
+
+    def classify(self, text: str) -> Tuple[str, float]:
+        return self.classifier.classify(text)
+
+    def retrain(self, samples: Iterable[Tuple[str, str]], path: Optional[str] = None) -> SpecializationClassifier:
+        """Train on labelled samples, persist the model and start using it."""
+        classifier = SpecializationClassifier.train(samples)
+        classifier.save(path or self.model_path)
+        with self._lock:
+            self._classifier = classifier
+        return classifier
+
+specialization_classifier = LocalClassifier()
@@ -0,0 +1,262 @@
+from app import db
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+import threading
+import logging
+import select
+import queue
+import json
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+# Event types pushed to dashboards
+QUERY_CREATED = 'query.created'
+QUERY_ANSWERED = 'query.answered'
+QUERY_ASSIGNED = 'query.assigned'
+QUERY_REVIEWED = 'query.reviewed'
+QUERY_FAILED = 'query.failed'
+
+# Topic every clinician subscribes to, for queries nobody is assigned to
+CLINICIANS_TOPIC = 'clinicians'
+
+def user_topic(user_id):
+    return f'user:{user_id}'
+
+def query_topics(event_type, query):
+    """Users who should hear about an event on a query."""
+    topics = {user_topic(query.patient_id)}
+    if event_type in (QUERY_ANSWERED, QUERY_ASSIGNED, QUERY_REVIEWED):
+        topics.add(user_topic(query.clinician_id) if query.clinician_id else CLINICIANS_TOPIC)
+    return sorted(topics)
+
+class Subscription:
+    """Bounded mailbox for one connected client.
+
+    A client that stops reading does not hold up publishers: once the
+    mailbox is full further events are dropped and the client is told to
+    resync instead.
+    """
+
+    def __init__(self, topics, max_queue=100):
+        self.topics = frozenset(topics)
+        self.overflowed = False
+        self._queue = queue.Queue(maxsize=max_queue)
+
+    def put(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        """Next message, or None if nothing arrived within ``timeout``."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def drain(self):
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self.overflowed = False
+
+class MemoryEventBackend:
+    """Delivers events to subscribers in this process only."""
+
+    name = 'memory'
+
+    def __init__(self, bus):
+        self.bus = bus
+
+    def publish(self, messages):
+        for message in messages:
+            self.bus.deliver(message)
+
+    def ensure_listening(self):
+        pass
+
+class PostgresEventBackend:
+    """Fans events out to every worker process through LISTEN/NOTIFY.
+
+    Publishers send ``pg_notify`` on their own connection after the
+    transaction commits; each process runs one listener thread on a
+    dedicated connection and hands notifications to its local subscribers.
+    """
+
+    name = 'postgres'
+    CHANNEL = 'query_events'
+    # NOTIFY payloads must stay under 8000 bytes
+    MAX_PAYLOAD = 7900
+
+    def __init__(self, bus):
+        self.bus = bus
+        self._engine = None
+        self._listener = None
+        self._listener_pid = None
+        self._lock = threading.Lock()
+
+    def publish(self, messages):
+        with db.engine.connect() as connection:
+            for message in messages:
+                if len(message.encode('utf-8')) > self.MAX_PAYLOAD:
+                    message = self._compact(message)
+                connection.execute(
+                    text('SELECT pg_notify(:channel, :payload)'),
+                    {'channel': self.CHANNEL, 'payload': message}
+                )
+            connection.commit()
+
+    @staticmethod
+    def _compact(message):
+        # Long questions don't fit; clients fetch the query when 'partial' is set
+        payload = json.loads(message)
+        query = payload['query']
+        payload['query'] = {key: query[key] for key in ('id', 'patient_id', 'clinician_id', 'status')}
+        payload['partial'] = True
+        return json.dumps(payload)
+
+    def ensure_listening(self):
+        """Start this process's listener thread (again, after a fork)."""
+        with self._lock:
+            if self._listener is not None and self._listener_pid == os.getpid() \
+                    and self._listener.is_alive():
+                return
+            self._engine = db.engine
+            self._listener_pid = os.getpid()
+            self._listener = threading.Thread(target=self._listen, name='event-listener', daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        backoff = 1
+        while True:
+            connection = None
+            try:
+                # Detached so the LISTEN never leaks back into the pool
+                connection = self._engine.raw_connection()
+                connection.detach()
+                driver = connection.driver_connection
+                driver.autocommit = True
+                driver.cursor().execute(f'LISTEN {self.CHANNEL}')
+                backoff = 1
+                while True:
+                    if select.select([driver], [], [], 5) == ([], [], []):
+                        continue
+                    driver.poll()
+                    while driver.notifies:
+                        self.bus.deliver(driver.notifies.pop(0).payload)
+            except Exception as e:
+                logger.error(f"Event listener failed, reconnecting in {backoff}s: {str(e)}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+class EventBus:
+    """Publishes query events to connected dashboards after commit.
+
+    ``publish`` attaches an event to the current database session; it is
+    serialized just before the transaction commits and sent once it has,
+    so subscribers never see changes that were rolled back.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.keepalive = 15
+        self.max_queue = 100
+        self.max_stream_seconds = 300
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self._hooked = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get('EVENTS_BACKEND', 'memory')
+        if backend == 'memory':
+            self.backend = MemoryEventBackend(self)
+        elif backend == 'postgres':
+            self.backend = PostgresEventBackend(self)
+        elif backend in (None, '', 'none'):
+            self.backend = None
+        else:
+            raise ValueError(f"Unknown EVENTS_BACKEND '{backend}'")
+        self.keepalive = app.config.get('EVENTS_KEEPALIVE_SECONDS', 15)
+        self.max_queue = app.config.get('EVENTS_MAX_QUEUE', 100)
+        self.max_stream_seconds = app.config.get('EVENTS_MAX_STREAM_SECONDS', 300)
+        if not self._hooked:
+            event.listen(Session, 'before_commit', self._serialize_pending)
+            event.listen(Session, 'after_commit', self._send_pending)
+            event.listen(Session, 'after_rollback', self._discard_pending)
+            self._hooked = True
+        app.extensions['event_bus'] = self
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    def publish(self, event_type, query):
+        """Queue an event about a query for delivery when the session commits."""
+        if not self.enabled:
+            return
+        db.session.info.setdefault('pending_events', []).append((event_type, query))
+
+    def subscribe(self, user):
+        """Register a mailbox for a user's events (and the clinician pool's)."""
+        topics = [user_topic(user.id)]
+        if user.is_clinician():
+            topics.append(CLINICIANS_TOPIC)
+        subscription = Subscription(topics, self.max_queue)
+        self.backend.ensure_listening()
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def deliver(self, message):
+        """Hand a serialized event to local subscribers of its topics."""
+        topics = json.loads(message)['topics']
+        with self._lock:
+            subscriptions = [s for s in self._subscriptions if s.topics.intersection(topics)]
+        for subscription in subscriptions:
+            subscription.put(message)
+
+    def _serialize_pending(self, session):
+        pending = session.info.pop('pending_events', None)
+        if not pending:
+            return
+        session.flush()
+        session.info['outgoing_events'] = [
+            json.dumps({
+                'type': event_type,
+                'topics': query_topics(event_type, query),
+                'query': query.to_summary_dict()
+            })
+            for event_type, query in pending
+        ]
+
+    def _send_pending(self, session):
+        messages = session.info.pop('outgoing_events', None)
+        if not messages or not self.enabled:
+            return
+        try:
+            self.backend.publish(messages)
+        except Exception as e:
+            logger.error(f"Failed to publish {len(messages)} query events: {str(e)}")
+
+    def _discard_pending(self, session):
+        session.info.pop('pending_events', None)
+        session.info.pop('outgoing_events', None)
+
+event_bus = EventBus()
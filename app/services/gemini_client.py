@@ -0,0 +1,254 @@
+from app.services.ai_governor import status_code_of
+from app.services.ai_provider import AIResponse
+from app.services.prompts import PROMPT_VERSION
+from typing import TYPE_CHECKING
+import threading
+import hashlib
+import logging
+import time
+import os
+
+if TYPE_CHECKING:
+    from google import genai
+    from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+# Refresh a cached context this long before it expires upstream
+CONTEXT_REFRESH_MARGIN_SECONDS = 60
+# Wait this long before trying again to cache a context the API refused
+CONTEXT_RETRY_SECONDS = 300
+
+def _pooled_httpx_client(connect_timeout, read_timeout, max_connections, keepalive_expiry):
+    """Keep-alive httpx client that enforces separate connect/read timeouts.
+
+    The SDK passes a single scalar timeout with every request, which would
+    override the per-phase limits configured on the client.
+    """
+    import httpx
+
+    class PooledHttpxClient(httpx.Client):
+        def build_request(self, *args, **kwargs):
+            kwargs['timeout'] = self.timeout
+            return super().build_request(*args, **kwargs)
+
+    return PooledHttpxClient(
+        timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry
+        ),
+        follow_redirects=True
+    )
+
+def _usage(metadata):
+    if metadata is None:
+        return None
+    return {
+        'prompt_tokens': metadata.prompt_token_count or 0,
+        'cached_tokens': metadata.cached_content_token_count or 0,
+        'output_tokens': metadata.candidates_token_count or 0
+    }
+
+class GeminiClient:
+    """Gemini provider: a process-wide client shared by every request and worker thread.
+
+    The underlying ``genai.Client`` and its connection pool are built on
+    first use and rebuilt in forked children, so preloading the app in a
+    server master never shares sockets between workers. The SDK itself is
+    imported on first use too, unless ``preload`` is called.
+    """
+
+    name = 'gemini'
+
+    def __init__(self, app=None):
+        self.api_key = None
+        self.model = None
+        self.connect_timeout = 5.0
+        self.read_timeout = 60.0
+        self.keepalive_expiry = 60.0
+        self.max_in_flight = None
+        self.context_cache = False
+        self.context_cache_ttl = 3600
+        self._contexts = {}  # (model, instruction hash) -> (name, refresh_at, instruction)
+        self._client = None
+        self._lock = threading.Lock()
+        self._context_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.api_key = app.config.get('GEMINI_API_KEY')
+        self.model = app.config.get('GEMINI_MODEL', 'gemini-2.0-flash')
+        self.connect_timeout = app.config.get('GEMINI_CONNECT_TIMEOUT', 5.0)
+        self.read_timeout = app.config.get('GEMINI_READ_TIMEOUT', 60.0)
+        self.keepalive_expiry = app.config.get('GEMINI_KEEPALIVE_SECONDS', 60.0)
+        self.max_in_flight = app.config.get('GEMINI_MAX_IN_FLIGHT', 8)
+        self.context_cache = app.config.get('AI_CONTEXT_CACHE', False)
+        self.context_cache_ttl = app.config.get('AI_CONTEXT_CACHE_TTL_SECONDS', 3600)
+        self.reset()
+        app.extensions['gemini_client'] = self
+
+    def preload(self):
+        """Import the SDK now, e.g. in a server master before it forks workers."""
+        from google import genai  # noqa: F401
+        from google.genai import types  # noqa: F401
+        import httpx  # noqa: F401
+
+    @property
+    def client(self) -> 'genai.Client':
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._build_client()
+        return self._client
+
+    def _build_client(self) -> 'genai.Client':
+        from google import genai
+        from google.genai import types
+        client = genai.Client(
+            api_key=self.api_key,
+            # Fallback for the whole request if the pooled transport can't be installed
+            http_options=types.HttpOptions(timeout=int(self.read_timeout * 1000))
+        )
+        api_client = getattr(client, '_api_client', None)
+        if api_client is not None and hasattr(api_client, '_httpx_client'):
+            api_client._httpx_client = _pooled_httpx_client(
+                self.connect_timeout,
+                self.read_timeout,
+                self.max_in_flight,
+                self.keepalive_expiry
+            )
+        else:
+            logger.warning('Could not install pooled HTTP client on genai.Client')
+        return client
+
+    def reset(self):
+        """Drop the client so the next call builds a fresh connection pool."""
+        with self._lock:
+            self._client = None
+        with self._context_lock:
+            self._contexts = {}
+
+    def _after_fork(self):
+        # Locks may have been held by threads that don't exist in the child
+        self._lock = threading.Lock()
+        self._context_lock = threading.Lock()
+        self._client = None
+
+    def prompt_config(self, model, instruction, label, **kwargs) -> 'types.GenerateContentConfig':
+        """Generation config carrying a fixed system instruction.
+
+        With ``AI_CONTEXT_CACHE`` the instruction is uploaded once as cached
+        content and referenced by name on every call; otherwise, or if the
+        API won't cache it (e.g. it is below the model's minimum size), it
+        is sent as the request's system instruction.
+        """
+        from google.genai import types
+        if self.context_cache:
+            name = self._cached_context(model, instruction, label)
+            if name is not None:
+                return types.GenerateContentConfig(cached_content=name, **kwargs)
+        return types.GenerateContentConfig(system_instruction=instruction, **kwargs)
+
+    def _cached_context(self, model, instruction, label):
+        from google.genai import types
+        key = (model, hashlib.sha256(instruction.encode('utf-8')).hexdigest())
+        with self._context_lock:
+            entry = self._contexts.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                return entry[0]
+            try:
+                cache = self.client.caches.create(
+                    model=model,
+                    config=types.CreateCachedContentConfig(
+                        system_instruction=instruction,
+                        display_name=f'{label}-{PROMPT_VERSION}',
+                        ttl=f'{self.context_cache_ttl}s'
+                    )
+                )
+                name = cache.name
+                refresh_at = time.monotonic() + self.context_cache_ttl - CONTEXT_REFRESH_MARGIN_SECONDS
+                logger.info(f"Cached '{label}' prompt context {PROMPT_VERSION} as {name}")
+            except Exception as e:
+                logger.warning(f"Could not cache '{label}' prompt context, sending it inline: {str(e)}")
+                name = None
+                refresh_at = time.monotonic() + CONTEXT_RETRY_SECONDS
+            self._contexts[key] = (name, refresh_at, instruction)
+            return name
+
+    def _inline_context(self, config):
+        """Swap a cached context the API no longer knows for its inline instruction."""
+        name = config.cached_content
+        with self._context_lock:
+            for key, (cached_name, _, instruction) in list(self._contexts.items()):
+                if cached_name == name:
+                    del self._contexts[key]
+                    return config.model_copy(update={'cached_content': None, 'system_instruction': instruction})
+        return None
+
+    def _stale_context(self, error, kwargs):
+        config = kwargs.get('config')
+        if getattr(config, 'cached_content', None) is None or status_code_of(error) not in (400, 403, 404):
+            return None
+        inline = self._inline_context(config)
+        if inline is None:
+            return None
+        logger.warning(f"Cached prompt context {config.cached_content} was rejected, sending it inline: {str(error)}")
+        return dict(kwargs, config=inline)
+
+    def generate(self, instruction, message, kind, json_schema=None) -> AIResponse:
+        """Call ``models.generate_content`` with the instruction as (cached) system context."""
+        extra = {}
+        if json_schema is not None:
+            extra = {'response_mime_type': 'application/json', 'response_schema': json_schema}
+        kwargs = {
+            'model': self.model,
+            'contents': message,
+            'config': self.prompt_config(self.model, instruction, kind, **extra)
+        }
+        try:
+            response = self.client.models.generate_content(**kwargs)
+        except Exception as e:
+            retry = self._stale_context(e, kwargs)
+            if retry is None:
+                raise
+            response = self.client.models.generate_content(**retry)
+        return AIResponse(response.text, _usage(getattr(response, 'usage_metadata', None)))
+
+    def stream(self, instruction, message, kind):
+        """Stream ``models.generate_content_stream`` as ``AIResponse`` chunks."""
+        kwargs = {
+            'model': self.model,
+            'contents': message,
+            'config': self.prompt_config(self.model, instruction, kind)
+        }
+        started = False
+        try:
+            for chunk in self.client.models.generate_content_stream(**kwargs):
+                started = True
+                yield AIResponse(chunk.text or '', _usage(getattr(chunk, 'usage_metadata', None)))
+            return
+        except Exception as e:
+            retry = None if started else self._stale_context(e, kwargs)
+            if retry is None:
+                raise
+        for chunk in self.client.models.generate_content_stream(**retry):
+            yield AIResponse(chunk.text or '', _usage(getattr(chunk, 'usage_metadata', None)))
+
+    def info(self) -> dict:
+        """Model and the prompt contexts cached by this process."""
+        with self._context_lock:
+            contexts = [name for name, _, _ in self._contexts.values() if name is not None]
+        return {
+            'model': self.model,
+            'context_cache': self.context_cache,
+            'cached_contexts': contexts
+        }
+
+gemini_client = GeminiClient()
+
+# Connections must never be shared between a preloaded master and its workers
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=gemini_client._after_fork)
@@ -0,0 +1,229 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from app import db
+from app.models.job import AIJob
+from app.models.query import Query
+from app.services.query_pipeline import process_query
+from app.services.events import event_bus, QUERY_FAILED
+from app.services.ai_governor import ai_governor, busy_error_of
+import threading
+import logging
+import random
+
+logger = logging.getLogger(__name__)
+
+class AIWorkerPool:
+    """Bounded thread pool that runs the AI pipeline for queued queries.
+
+    Every unit of work is backed by an ``AIJob`` row, so jobs that were
+    queued or interrupted when a process stopped are picked up again by
+    the next process that starts serving requests.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._executor = None
+        self._lock = threading.Lock()
+        self._recovered = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['ai_worker_pool'] = self
+
+        @app.before_request
+        def _recover_ai_jobs():
+            if not self._recovered:
+                self.recover()
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.app.config.get('AI_WORKER_COUNT', 4),
+                    thread_name_prefix='ai-worker'
+                )
+            return self._executor
+
+    def enqueue(self, query_id):
+        """Create a durable job row for a query.
+
+        The caller commits the session and then calls ``submit`` so the
+        worker only ever sees jobs that are visible to other sessions.
+        """
+        job = AIJob(query_id=query_id)
+        db.session.add(job)
+        db.session.flush()
+        return job
+
+    def submit(self, job_id, delay=0):
+        """Schedule an already persisted job on the pool, optionally after a delay."""
+        if delay > 0:
+            timer = threading.Timer(delay, self.submit, args=(job_id,))
+            timer.daemon = True
+            timer.start()
+            return
+        self.executor.submit(self._run, job_id)
+
+    def recover(self):
+        """Requeue jobs left behind by a previous or crashed process."""
+        with self._lock:
+            if self._recovered:
+                return
+            self._recovered = True
+
+        stale_before = datetime.utcnow() - timedelta(
+            seconds=self.app.config.get('AI_JOB_STALE_SECONDS', 300)
+        )
+        try:
+            AIJob.query.filter(
+                AIJob.status == 'running',
+                AIJob.started_at < stale_before
+            ).update({'status': 'queued'}, synchronize_session=False)
+            db.session.commit()
+
+            job_ids = [row.id for row in AIJob.query.with_entities(AIJob.id)
+                       .filter_by(status='queued').order_by(AIJob.id).all()]
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to recover AI jobs: {str(e)}")
+            return
+
+        if job_ids:
+            logger.info(f"Recovering {len(job_ids)} queued AI jobs")
+        for job_id in job_ids:
+            self.submit(job_id)
+
+    def claim(self, job_id):
+        """Atomically move a job from queued to running.
+
+        Returns True if the caller now owns the job and must finish it with
+        ``complete`` or ``fail``.
+        """
+        claimed = AIJob.query.filter_by(id=job_id, status='queued').update({
+            'status': 'running',
+            'started_at': datetime.utcnow(),
+            'attempts': AIJob.attempts + 1
+        }, synchronize_session=False)
+        db.session.commit()
+        return claimed == 1
+
+    def _run(self, job_id):
+        with self.app.app_context():
+            try:
+                # Another worker or process may already own this job
+                if not self.claim(job_id):
+                    return
+
+                job = db.session.get(AIJob, job_id)
+                query = db.session.get(Query, job.query_id)
+                process_query(query)
+                self.complete(job)
+                db.session.commit()
+
+            except Exception as e:
+                db.session.rollback()
+                if busy_error_of(e) is not None:
+                    logger.warning(f"AI job {job_id} deferred, AI upstream busy: {str(e)}")
+                    self.defer(job_id, str(e))
+                else:
+                    logger.error(f"AI job {job_id} failed: {str(e)}")
+                    self.fail(job_id, str(e))
+
+    def complete(self, job):
+        """Mark a claimed job as done; the caller commits."""
+        job.status = 'completed'
+        job.finished_at = datetime.utcnow()
+        job.last_error = None
+
+    def fail(self, job_id, error):
+        """Record a failed attempt, retrying on the pool until attempts run out."""
+        try:
+            job = db.session.get(AIJob, job_id)
+            if job is None:
+                return
+            job.last_error = error
+
+            if job.attempts < self.app.config.get('AI_JOB_MAX_ATTEMPTS', 3):
+                job.status = 'queued'
+                db.session.commit()
+                self.submit(job_id, delay=self.retry_delay(job.attempts))
+            else:
+                job.status = 'failed'
+                job.finished_at = datetime.utcnow()
+                query = db.session.get(Query, job.query_id)
+                if query is not None:
+                    query.status = 'failed'
+                    event_bus.publish(QUERY_FAILED, query)
+                db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to record failure for AI job {job_id}: {str(e)}")
+
+    def defer(self, job_id, error):
+        """Put a job back without using up an attempt.
+
+        For calls the governor refused (circuit breaker open, no slot free):
+        upstream was never asked, so the job waits out the breaker, plus
+        jitter so deferred jobs don't all return at once.
+        """
+        try:
+            updated = AIJob.query.filter_by(id=job_id, status='running').update({
+                'status': 'queued',
+                'attempts': AIJob.attempts - 1,
+                'last_error': error
+            }, synchronize_session=False)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to defer AI job {job_id}: {str(e)}")
+            return
+        if updated:
+            jitter = random.uniform(0, self.app.config.get('AI_JOB_RETRY_BASE_DELAY', 2.0))
+            self.submit(job_id, delay=ai_governor.retry_after() + jitter)
+
+    def retry_delay(self, attempts):
+        """Seconds before retrying a job that has failed ``attempts`` times.
+
+        Exponential backoff with jitter, so an upstream outage isn't met
+        with every job retrying at once.
+        """
+        base = self.app.config.get('AI_JOB_RETRY_BASE_DELAY', 2.0)
+        cap = self.app.config.get('AI_JOB_RETRY_MAX_DELAY', 60.0)
+        delay = min(cap, base * 2 ** max(0, attempts - 1))
+        return random.uniform(delay / 2, delay)
+
+    def requeue_failed(self, query_ids=None):
+        """Give failed jobs a fresh set of attempts and run them again.
+
+        Limited to ``query_ids`` when given. Their queries go back to
+        'processing'. Returns the ids of the requeued queries.
+        """
+        jobs = AIJob.query.filter_by(status='failed')
+        if query_ids is not None:
+            jobs = jobs.filter(AIJob.query_id.in_(query_ids))
+        jobs = jobs.all()
+        if not jobs:
+            return []
+        for job in jobs:
+            job.status = 'queued'
+            job.attempts = 0
+            job.finished_at = None
+        job_ids = [job.id for job in jobs]
+        requeued = [job.query_id for job in jobs]
+        Query.query.filter(Query.id.in_(requeued), Query.status == 'failed')\
+            .update({'status': 'processing'}, synchronize_session=False)
+        db.session.commit()
+        for job_id in job_ids:
+            self.submit(job_id)
+        return requeued
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+ai_worker_pool = AIWorkerPool()
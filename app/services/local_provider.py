@@ -0,0 +1,256 @@
+from app.services.ai_provider import AIResponse
+from app.utils.specialization import Specialization
+import threading
+import random
+import json
+import math
+import time
+import zlib
+import re
+
+CATEGORY_PATTERN = re.compile(r'^# Category\n(.+)$', re.MULTILINE)
+QUERY_PATTERN = re.compile(r'^Query: (.*)$', re.MULTILINE)
+
+# (section, [(sub-heading, phrases to pick three bullets from), ...]) in
+# the order of the answer scaffold
+SCAFFOLD = [
+    ('Detailed Analysis', [
+        ('Key symptoms and their significance', [
+            'Pain that worsens with activity can point to strain on the affected area',
+            'Symptoms lasting more than two weeks deserve a closer look',
+            'Changes at night or on waking often help narrow down the cause',
+            'Swelling or redness suggests an inflammatory process',
+            'Associated fatigue may reflect how the body is coping overall',
+        ]),
+        ('Potential causes and risk factors', [
+            'Recent changes in routine, diet or medication',
+            'Overuse or repetitive strain',
+            'A minor infection that has not fully cleared',
+            'Family history of similar conditions',
+            'Stress and poor sleep',
+        ]),
+        ('Relevant medical conditions', [
+            'Inflammatory conditions affecting the area',
+            'Common viral or bacterial infections',
+            'Circulatory or metabolic conditions',
+            'Musculoskeletal injury',
+            'Allergic or immune reactions',
+        ]),
+    ]),
+    ('Clinical Considerations', [
+        ('When to seek immediate medical attention', [
+            'Sudden severe pain or difficulty breathing',
+            'Fainting, confusion or trouble speaking',
+            'High fever that does not come down with medication',
+            'Rapidly spreading redness or swelling',
+            'Chest pain spreading to the arm, jaw or back',
+        ]),
+        ('Warning signs to watch for', [
+            'Symptoms that steadily get worse',
+            'New symptoms appearing alongside the original ones',
+            'Unexplained weight loss',
+            'Symptoms that wake you from sleep',
+            'Numbness or tingling',
+        ]),
+        ('Risk factors to be aware of', [
+            'Smoking and alcohol use',
+            'High blood pressure or diabetes',
+            'Age and previous episodes',
+            'A sedentary lifestyle',
+            'Recent surgery or long periods of immobility',
+        ]),
+    ]),
+    ('Important Notes', [
+        ('Key points to remember', [
+            'Many cases improve with rest and simple measures',
+            'Keeping a symptom diary helps your clinician',
+            'Do not stop prescribed medication without advice',
+            'Early assessment usually means simpler treatment',
+            'Most causes are treatable',
+        ]),
+        ('Lifestyle considerations', [
+            'Regular, moderate exercise as tolerated',
+            'A balanced diet with plenty of fluids',
+            'Consistent sleep schedule',
+            'Limiting caffeine and alcohol',
+            'Managing stress with relaxation techniques',
+        ]),
+        ('Preventive measures', [
+            'Warm up before physical activity',
+            'Keep vaccinations up to date',
+            'Attend routine check-ups',
+            'Use protective equipment where appropriate',
+            'Wash hands regularly',
+        ]),
+    ]),
+    ('Next Steps', [
+        ('Immediate actions', [
+            'Rest and avoid activities that trigger symptoms',
+            'Use over-the-counter pain relief as directed',
+            'Apply a cold or warm compress as appropriate',
+            'Note when symptoms started and what makes them better or worse',
+            'Stay hydrated',
+        ]),
+        ('Follow-up recommendations', [
+            'Book an appointment if there is no improvement within a week',
+            'Ask about blood tests or imaging if symptoms persist',
+            'Review current medications with a pharmacist',
+            'Arrange a follow-up to review progress',
+            'Ask for a referral to a specialist if needed',
+        ]),
+        ('Self-care measures', [
+            'Gentle stretching or movement as comfortable',
+            'Keep a regular routine',
+            'Avoid known triggers',
+            'Get enough sleep',
+            'Ask friends or family for support',
+        ]),
+    ]),
+]
+
+class LocalProviderError(Exception):
+    """Injected failure carrying an HTTP status like upstream errors do."""
+
+    def __init__(self, code):
+        super().__init__(f'{code} Simulated upstream error')
+        self.code = code
+
+def _token_estimate(text):
+    # Roughly four characters per token, like real tokenizers on English
+    return (len(text) + 3) // 4 if text else 0
+
+def _category_for(query):
+    categories = Specialization.list()
+    return categories[zlib.crc32(query.encode('utf-8')) % len(categories)]
+
+def _sections_for(query):
+    """Scaffold-shaped section bodies for a query, the same every time."""
+    rng = random.Random(zlib.crc32(query.encode('utf-8')))
+    sections = {'Overview': (
+        f'Your question about "{query}" describes symptoms that are common and usually manageable. '
+        'Below is an overview of what they may mean, warning signs to look out for and sensible next steps.'
+    )}
+    for title, subsections in SCAFFOLD:
+        blocks = []
+        for heading, phrases in subsections:
+            bullets = '\n'.join(f'- {phrase}' for phrase in rng.sample(phrases, 3))
+            blocks.append(f'{heading}:\n{bullets}')
+        sections[title] = '\n\n'.join(blocks)
+    return sections
+
+class LocalProvider:
+    """Deterministic offline provider for CI, development and load tests.
+
+    Answers follow the real answer scaffold and depend only on the
+    question, so runs are repeatable. Latency is drawn from a ``fixed``,
+    ``uniform`` or ``lognormal`` distribution around ``LOCAL_AI_LATENCY_MS``
+    and streams pause ``LOCAL_AI_CHUNK_DELAY_MS`` between chunks; a
+    ``LOCAL_AI_ERROR_RATE`` fraction of calls fail with
+    ``LOCAL_AI_ERROR_CODE``. ``LOCAL_AI_SEED`` makes the latency and error
+    sequence repeatable as well.
+    """
+
+    name = 'local'
+
+    DISTRIBUTIONS = ('fixed', 'uniform', 'lognormal')
+
+    def __init__(self, app=None):
+        self.latency = 0.0
+        self.distribution = 'fixed'
+        self.spread = 0.5
+        self.chunk_delay = 0.0
+        self.chunk_size = 64
+        self.error_rate = 0.0
+        self.error_code = 503
+        self._rng = random.Random()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.latency = app.config.get('LOCAL_AI_LATENCY_MS', 0) / 1000
+        self.distribution = app.config.get('LOCAL_AI_LATENCY_DISTRIBUTION', 'fixed')
+        if self.distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown LOCAL_AI_LATENCY_DISTRIBUTION '{self.distribution}'")
+        self.spread = app.config.get('LOCAL_AI_LATENCY_SPREAD', 0.5)
+        self.chunk_delay = app.config.get('LOCAL_AI_CHUNK_DELAY_MS', 0) / 1000
+        self.error_rate = app.config.get('LOCAL_AI_ERROR_RATE', 0.0)
+        self.error_code = app.config.get('LOCAL_AI_ERROR_CODE', 503)
+        self._rng = random.Random(app.config.get('LOCAL_AI_SEED'))
+        app.extensions['local_ai_provider'] = self
+
+    def sample_latency(self):
+        """Seconds before the first token; ``spread`` is ±fraction (uniform) or sigma (lognormal)."""
+        if not self.latency:
+            return 0.0
+        with self._lock:
+            if self.distribution == 'uniform':
+                return max(0.0, self.latency * self._rng.uniform(1 - self.spread, 1 + self.spread))
+            if self.distribution == 'lognormal':
+                # ``latency`` is the median; p99 is about latency * e^(2.33 * spread)
+                return self.latency * math.exp(self.spread * self._rng.gauss(0, 1))
+            return self.latency
+
+    def _respond(self):
+        time.sleep(self.sample_latency())
+        if self.error_rate:
+            with self._lock:
+                failed = self._rng.random() < self.error_rate
+            if failed:
+                raise LocalProviderError(self.error_code)
+
+    def _answer(self, message, kind, json_schema):
+        query_match = QUERY_PATTERN.search(message)
+        query = query_match.group(1) if query_match else message
+        sections = _sections_for(query)
+
+        if json_schema is not None:
+            payload = {'category': _category_for(query)}
+            for title, body in sections.items():
+                payload[title.lower().replace(' ', '_')] = body
+            return json.dumps(payload)
+
+        if kind == 'categorize':
+            return _category_for(query)
+
+        category_match = CATEGORY_PATTERN.search(message)
+        category = category_match.group(1) if category_match else _category_for(query)
+        parts = [f'# Category\n{category}']
+        parts += [f'# {title}\n\n{body}' for title, body in sections.items()]
+        return '\n\n'.join(parts)
+
+    @staticmethod
+    def _usage(instruction, message, text):
+        return {
+            'prompt_tokens': _token_estimate(instruction) + _token_estimate(message),
+            'cached_tokens': 0,
+            'output_tokens': _token_estimate(text)
+        }
+
+    def generate(self, instruction, message, kind, json_schema=None) -> AIResponse:
+        self._respond()
+        text = self._answer(message, kind, json_schema)
+        return AIResponse(text, self._usage(instruction, message, text))
+
+    def stream(self, instruction, message, kind):
+        self._respond()
+        text = self._answer(message, kind, None)
+        usage = self._usage(instruction, message, text)
+        for start in range(0, len(text), self.chunk_size):
+            if start:
+                time.sleep(self.chunk_delay)
+            last = start + self.chunk_size >= len(text)
+            yield AIResponse(text[start:start + self.chunk_size], usage if last else None)
+
+    def preload(self):
+        """Nothing to import ahead of time."""
+        pass
+
+    def info(self) -> dict:
+        return {
+            'latency_ms': round(self.latency * 1000, 1),
+            'latency_distribution': self.distribution,
+            'error_rate': self.error_rate
+        }
+
+local_provider = LocalProvider()
@@ -0,0 +1,106 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from werkzeug.security import generate_password_hash, check_password_hash
+import threading
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+class PasswordHasherBusyError(Exception):
+    """Raised when the hashing queue is full for longer than the timeout."""
+    pass
+
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+def _verify(password_hash, password):
+    return check_password_hash(password_hash, password)
+
+def _method_of(password_hash):
+    # Werkzeug hashes look like "scrypt:32768:8:1$salt$hash"
+    return password_hash.split('$', 1)[0]
+
+class PasswordHasher:
+    """Runs password hashing on a bounded pool of worker threads.
+
+    Key derivation is deliberately CPU-heavy, so a burst of logins hashed
+    in request threads starves every other endpoint. Werkzeug's scrypt and
+    pbkdf2 run in ``hashlib``, which releases the GIL, so hashing threads
+    use other cores while request threads keep serving. At most
+    ``PASSWORD_HASH_WORKERS`` hashes run at once and up to
+    ``PASSWORD_HASH_QUEUE_SIZE`` more wait their turn; callers beyond that
+    give up with ``PasswordHasherBusyError`` after ``PASSWORD_HASH_TIMEOUT``.
+    With zero workers hashing runs inline, which is also the behaviour
+    before ``init_app``.
+    """
+
+    def __init__(self, app=None):
+        self.method = 'scrypt'
+        self.workers = 0
+        self.queue_size = 0
+        self.timeout = None
+        self._canonical_method = None
+        self._slots = None
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', 'scrypt')
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', 2)
+        self.queue_size = app.config.get('PASSWORD_HASH_QUEUE_SIZE', 64)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', 10.0)
+        # Expands e.g. "scrypt" to "scrypt:32768:8:1" and rejects unknown methods
+        self._canonical_method = _method_of(generate_password_hash('', method=self.method))
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size) if self.workers else None
+        self.shutdown(wait=False)
+        app.extensions['password_hasher'] = self
+
+    @property
+    def executor(self):
+        with self._lock:
+            # Threads don't survive a fork, so a pool from a preloading parent is rebuilt
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix='password-hash'
+                )
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def hash(self, password):
+        """Hash a password with the configured method."""
+        return self._call(_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        """Check a password against a stored hash of any supported method."""
+        return self._call(_verify, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Whether a stored hash was made with different parameters than configured."""
+        canonical = self._canonical_method or _method_of(generate_password_hash('', method=self.method))
+        return _method_of(password_hash) != canonical
+
+    def _call(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PasswordHasherBusyError(
+                f'Password hashing queue is full ({self.workers + self.queue_size} pending)'
+            )
+        try:
+            return self.executor.submit(fn, *args).result(timeout=self.timeout)
+        except FuturesTimeoutError:
+            raise PasswordHasherBusyError(f'Password hashing took longer than {self.timeout}s')
+        finally:
+            self._slots.release()
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown(wait=wait)
+            self._executor = None
+            self._executor_pid = None
+
+password_hasher = PasswordHasher()
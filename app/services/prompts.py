@@ -0,0 +1,162 @@
+from app.utils.specialization import Specialization
+import threading
+import hashlib
+
+# Everything that does not depend on the patient's question lives in these
+# system instructions, built once at import. Per call only the question
+# (and, for answers, its category) is sent.
+
+CATEGORIES_LIST = ', '.join(Specialization.list())
+
+CATEGORIZE_INSTRUCTION = f"""Given a medical query, determine the most appropriate medical specialization category from this list: {CATEGORIES_LIST}.
+
+Please respond with ONLY the name of the most appropriate specialization category from the list provided. Don't include any explanations or additional text."""
+
+ANSWER_INSTRUCTION = """You are a medical AI assistant. Each message contains a health query and the medical specialization it was categorized under. Please provide a detailed medical response to the query. Format your response exactly as shown, starting with the category given in the message:
+
+# Category
+[Category from the message]
+
+# Overview
+[Provide a brief summary of the main points]
+
+# Detailed Analysis
+
+Key symptoms and their significance:
+- [Symptom 1 and its significance]
+- [Symptom 2 and its significance]
+- [Symptom 3 and its significance]
+
+Potential causes and risk factors:
+- [Cause/factor 1]
+- [Cause/factor 2]
+- [Cause/factor 3]
+
+Relevant medical conditions:
+- [Condition 1]
+- [Condition 2]
+- [Condition 3]
+
+# Clinical Considerations
+
+When to seek immediate medical attention:
+- [Emergency situation 1]
+- [Emergency situation 2]
+- [Emergency situation 3]
+
+Warning signs to watch for:
+- [Warning sign 1]
+- [Warning sign 2]
+- [Warning sign 3]
+
+Risk factors to be aware of:
+- [Risk factor 1]
+- [Risk factor 2]
+- [Risk factor 3]
+
+# Important Notes
+
+Key points to remember:
+- [Key point 1]
+- [Key point 2]
+- [Key point 3]
+
+Lifestyle considerations:
+- [Lifestyle point 1]
+- [Lifestyle point 2]
+- [Lifestyle point 3]
+
+Preventive measures:
+- [Measure 1]
+- [Measure 2]
+- [Measure 3]
+
+# Next Steps
+
+Immediate actions:
+- [Action 1]
+- [Action 2]
+- [Action 3]
+
+Follow-up recommendations:
+- [Recommendation 1]
+- [Recommendation 2]
+- [Recommendation 3]
+
+Self-care measures:
+- [Measure 1]
+- [Measure 2]
+- [Measure 3]
+
+Please ensure your response:
+1. Follows this exact format with proper markdown
+2. Includes the category section at the top
+3. Uses proper line breaks between sections
+4. Uses proper list formatting with dashes
+5. Is professional and medically accurate
+6. Is clear and easy to understand
+7. Is based on current medical knowledge
+8. Is appropriate for the query's urgency level
+9. Does not include any disclaimers"""
+
+STRUCTURED_INSTRUCTION = f"""You are a medical AI assistant. Categorize each health query you are given and provide a detailed medical response to it.
+
+Respond with a JSON object. Set "category" to the most appropriate medical specialization from this list: {CATEGORIES_LIST}.
+Fill every other field with markdown content (no headers) following this structure:
+- overview: a brief summary of the main points
+- detailed_analysis: "Key symptoms and their significance:", "Potential causes and risk factors:" and "Relevant medical conditions:", each followed by three dash list items
+- clinical_considerations: "When to seek immediate medical attention:", "Warning signs to watch for:" and "Risk factors to be aware of:", each followed by three dash list items
+- important_notes: "Key points to remember:", "Lifestyle considerations:" and "Preventive measures:", each followed by three dash list items
+- next_steps: "Immediate actions:", "Follow-up recommendations:" and "Self-care measures:", each followed by three dash list items
+
+The response must be professional, medically accurate, clear and easy to understand, based on current medical knowledge, appropriate for the query's urgency level, and must not include any disclaimers."""
+
+def _fingerprint(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()[:12]
+
+# Changes whenever any instruction does, so cached contexts and cached
+# answers made with an older template are never reused
+PROMPT_VERSION = _fingerprint(CATEGORIZE_INSTRUCTION, ANSWER_INSTRUCTION, STRUCTURED_INSTRUCTION)
+
+def categorize_message(query: str) -> str:
+    return f"Query: {query}"
+
+def answer_message(query: str, category: str) -> str:
+    return f"Query: {query}\n\n# Category\n{category}"
+
+def structured_message(query: str) -> str:
+    return f"Query: {query}"
+
+class TokenUsage:
+    """Thread-safe token counters per prompt kind, from providers' reported usage."""
+
+    FIELDS = ('calls', 'prompt_tokens', 'cached_tokens', 'output_tokens')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, kind, usage):
+        """Add a response's ``prompt_tokens``/``cached_tokens``/``output_tokens``."""
+        if usage is None:
+            return
+        with self._lock:
+            counts = self._counts.setdefault(kind, dict.fromkeys(self.FIELDS, 0))
+            counts['calls'] += 1
+            counts['prompt_tokens'] += usage.get('prompt_tokens', 0)
+            counts['cached_tokens'] += usage.get('cached_tokens', 0)
+            counts['output_tokens'] += usage.get('output_tokens', 0)
+
+    def to_dict(self):
+        with self._lock:
+            counts = {kind: dict(values) for kind, values in self._counts.items()}
+        for values in counts.values():
+            calls = values['calls']
+            values['avg_prompt_tokens'] = round(values['prompt_tokens'] / calls, 1) if calls else 0.0
+        return counts
+
+token_usage = TokenUsage()
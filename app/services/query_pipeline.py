@@ -0,0 +1,44 @@
+from app.models.query import Query
+from app.services.ai_service import AIService
+from app.services.assignment import clinician_assigner
+from app.services.analytics import record_category_change
+from app.services.events import event_bus, QUERY_ANSWERED, QUERY_ASSIGNED
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Placeholder category stored until the AI pipeline has categorized a query
+UNCATEGORIZED = 'Uncategorized'
+
+def assign_clinician(category):
+    """Pick the least-loaded clinician for a category, falling back to any clinician."""
+    return clinician_assigner.assign(category)
+
+def assign_clinicians(categories):
+    """Pick a clinician id per category in one pass over the cached roster."""
+    return clinician_assigner.assign_many(categories)
+
+def process_query(query: Query) -> Query:
+    """Fill in category, AI response and clinician assignment for a query.
+
+    The caller owns the session and is responsible for committing.
+    """
+    ai_service = AIService()
+    category, ai_response = ai_service.get_response(query.question)
+    return finalize_query(query, category, ai_response)
+
+def finalize_query(query: Query, category: str, ai_response: str) -> Query:
+    """Store the AI result on a query and assign a clinician for review."""
+    record_category_change(query.category, category)
+    query.category = category
+    query.set_ai_response(ai_response)
+
+    clinician_id = assign_clinician(category)
+    if clinician_id is None:
+        logger.warning(f"No clinicians available for query {query.id}")
+    query.clinician_id = clinician_id
+
+    event_bus.publish(QUERY_ANSWERED, query)
+    if clinician_id is not None:
+        event_bus.publish(QUERY_ASSIGNED, query)
+    return query
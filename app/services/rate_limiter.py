@@ -0,0 +1,250 @@
+from app import db
+from app.models.rate_limit import RateLimitBucket
+from flask import g
+from sqlalchemy.exc import IntegrityError
+from typing import NamedTuple, Optional
+from werkzeug.exceptions import TooManyRequests
+import threading
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    per: int
+    remaining: int
+    # Seconds until the bucket is full again
+    reset_after: float
+    # Seconds until this request would have been allowed (0 when it was)
+    retry_after: float
+
+class RateLimitExceeded(TooManyRequests):
+    """429 carrying the limit that was hit, for the error handler's headers."""
+
+    def __init__(self, result):
+        super().__init__('Rate limit exceeded. Please try again later')
+        self.rate_limit = result
+
+def rate_limit_headers(result):
+    """``RateLimit-*`` (and, when refused, ``Retry-After``) headers for a result."""
+    headers = {
+        'RateLimit-Limit': str(result.limit),
+        'RateLimit-Remaining': str(result.remaining),
+        'RateLimit-Reset': str(math.ceil(result.reset_after)),
+        'RateLimit-Policy': f'{result.limit};w={result.per}'
+    }
+    if not result.allowed:
+        headers['Retry-After'] = str(max(1, math.ceil(result.retry_after)))
+    return headers
+
+def gcra(tat, now, limit, per, cost=1):
+    """Generic cell rate algorithm: a token bucket stored as one timestamp.
+
+    ``tat`` is the stored theoretical arrival time (None for a new key).
+    Returns the new value to store (None when refused) and the result.
+    A bucket holds ``limit`` tokens and refills one every ``per / limit``
+    seconds, so bursts of up to ``limit`` are allowed after an idle period.
+    """
+    interval = per / limit
+    tat = max(tat or now, now)
+    new_tat = tat + interval * cost
+    allow_at = new_tat - per
+    if allow_at > now:
+        return None, RateLimitResult(
+            allowed=False, limit=limit, per=per,
+            remaining=0, reset_after=tat - now, retry_after=allow_at - now
+        )
+    return new_tat, RateLimitResult(
+        allowed=True, limit=limit, per=per,
+        remaining=int((now - allow_at) / interval),
+        reset_after=new_tat - now, retry_after=0.0
+    )
+
+class MemoryRateLimitBackend:
+    """Buckets in this process only; each worker enforces its own limit."""
+
+    name = 'memory'
+
+    # Idle buckets are swept once the table grows past this many keys
+    SWEEP_THRESHOLD = 10000
+
+    def __init__(self):
+        self._buckets = {}  # key -> tat
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, per, cost=1):
+        now = time.time()
+        with self._lock:
+            new_tat, result = gcra(self._buckets.get(key), now, limit, per, cost)
+            if new_tat is not None:
+                self._buckets[key] = new_tat
+                if len(self._buckets) > self.SWEEP_THRESHOLD:
+                    self._sweep(now)
+        return result
+
+    def _sweep(self, now):
+        for key in [k for k, tat in self._buckets.items() if tat <= now]:
+            del self._buckets[key]
+
+class DatabaseRateLimitBackend:
+    """Buckets in a table shared by every worker process (SQLite or Postgres).
+
+    Each hit reads the bucket and writes it back only if nobody changed it
+    in between, retrying on a lost race, so no row locks are held.
+    """
+
+    name = 'database'
+
+    MAX_ATTEMPTS = 5
+    # Full buckets are swept at most this often, from whichever worker writes
+    PRUNE_INTERVAL_SECONDS = 300
+
+    def __init__(self):
+        self._last_prune = 0.0
+
+    def hit(self, key, limit, per, cost=1):
+        table = RateLimitBucket.__table__
+        # Own connection and transaction so the caller's session is untouched
+        with db.engine.connect() as connection:
+            for _ in range(self.MAX_ATTEMPTS):
+                now = time.time()
+                tat = connection.execute(
+                    db.select(table.c.tat).where(table.c.key == key)
+                ).scalar()
+                new_tat, result = gcra(tat, now, limit, per, cost)
+                if new_tat is None:
+                    connection.rollback()
+                    return result
+                if tat is None:
+                    try:
+                        connection.execute(table.insert().values(key=key, tat=new_tat))
+                        connection.commit()
+                        break
+                    except IntegrityError:
+                        connection.rollback()
+                        continue
+                updated = connection.execute(
+                    table.update()
+                    .where(table.c.key == key, table.c.tat == tat)
+                    .values(tat=new_tat)
+                ).rowcount
+                connection.commit()
+                if updated:
+                    break
+            else:
+                raise RuntimeError(f'Gave up updating rate limit bucket {key} after {self.MAX_ATTEMPTS} attempts')
+
+            if time.monotonic() - self._last_prune > self.PRUNE_INTERVAL_SECONDS:
+                self._last_prune = time.monotonic()
+                connection.execute(table.delete().where(table.c.tat <= now))
+                connection.commit()
+        return result
+
+class RedisRateLimitBackend:
+    """Buckets in Redis, or anything speaking its protocol (Valkey, fakeredis).
+
+    Uses only GET/SET with WATCH/MULTI, so stand-ins without Lua scripting
+    work too. Keys expire once their bucket is full again.
+    """
+
+    name = 'redis'
+
+    MAX_ATTEMPTS = 5
+
+    def __init__(self, client, prefix='ratelimit:'):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_BACKEND 'redis' requires the redis package (pip install redis)")
+        return cls(redis.Redis.from_url(url))
+
+    def hit(self, key, limit, per, cost=1):
+        from redis.exceptions import WatchError
+        key = self.prefix + key
+        with self.client.pipeline() as pipe:
+            for _ in range(self.MAX_ATTEMPTS):
+                try:
+                    pipe.watch(key)
+                    stored = pipe.get(key)
+                    now = time.time()
+                    new_tat, result = gcra(float(stored) if stored else None, now, limit, per, cost)
+                    if new_tat is None:
+                        pipe.unwatch()
+                        return result
+                    pipe.multi()
+                    pipe.set(key, repr(new_tat), px=max(1, math.ceil((new_tat - now) * 1000)))
+                    pipe.execute()
+                    return result
+                except WatchError:
+                    continue
+        raise RuntimeError(f'Gave up updating rate limit bucket {key} after {self.MAX_ATTEMPTS} attempts')
+
+class RateLimiter:
+    """App extension enforcing per-user, per-route request limits.
+
+    Limits are declared on views with ``app.utils.decorators.rate_limit``.
+    If the backend fails the request is let through and the error logged:
+    an outage of the limiter's store should not take the API down with it.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get('RATE_LIMIT_BACKEND', 'memory')
+        if backend == 'memory':
+            self.backend = MemoryRateLimitBackend()
+        elif backend == 'database':
+            self.backend = DatabaseRateLimitBackend()
+        elif backend == 'redis':
+            self.backend = RedisRateLimitBackend.from_url(
+                app.config.get('RATE_LIMIT_REDIS_URL', 'redis://localhost:6379/0')
+            )
+        elif backend in (None, '', 'none'):
+            self.backend = None
+        else:
+            raise ValueError(f"Unknown RATE_LIMIT_BACKEND '{backend}'")
+        app.after_request(self._add_headers)
+        app.extensions['rate_limiter'] = self
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    def hit(self, key, limit, per, cost=1) -> Optional[RateLimitResult]:
+        """Take ``cost`` tokens from a bucket; None when limiting is off or failing."""
+        if not self.enabled:
+            return None
+        try:
+            return self.backend.hit(key, limit, per, cost)
+        except Exception as e:
+            logger.error(f"Rate limiter {self.backend.name} failed, allowing request: {str(e)}")
+            return None
+
+    def check(self, key, limit, per, cost=1):
+        """Hit a bucket for the current request; raises ``RateLimitExceeded`` when empty."""
+        result = self.hit(key, limit, per, cost)
+        if result is None:
+            return
+        if not result.allowed:
+            raise RateLimitExceeded(result)
+        g.rate_limit = result
+
+    @staticmethod
+    def _add_headers(response):
+        result = g.pop('rate_limit', None)
+        if result is not None:
+            response.headers.update(rate_limit_headers(result))
+        return response
+
+rate_limiter = RateLimiter()
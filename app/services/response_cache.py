@@ -0,0 +1,315 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from app import db
+from app.models.cache import AIResponseCacheEntry
+from app.services.prompts import PROMPT_VERSION
+from typing import Callable, Optional, Tuple
+import threading
+import hashlib
+import logging
+import time
+import re
+
+logger = logging.getLogger(__name__)
+
+# Filler words that do not change what is being asked. Only true filler:
+# pronouns ("he" vs "she"), negations, comparatives and conditionals
+# ("over", "than", "if") and qualifiers ("very") change the medical
+# meaning, so they stay in the key.
+CACHE_STOP_WORDS = frozenset("""
+a an the
+please help question wondering hi hello thanks thank
+""".split())
+
+# Part of every key, bumped whenever normalize_question changes, so answers
+# stored under the old normalization are never matched to other questions
+NORMALIZATION_VERSION = 2
+
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+def normalize_question(question: str) -> str:
+    """Canonical form of a question used as the cache key."""
+    text = PUNCTUATION_PATTERN.sub(' ', question.lower())
+    words = [w for w in WHITESPACE_PATTERN.split(text) if w and w not in CACHE_STOP_WORDS]
+    return ' '.join(words)
+
+def cache_key(normalized_question: str) -> str:
+    # Answers made with another prompt template are never served
+    return hashlib.sha256(
+        f'{PROMPT_VERSION}:{NORMALIZATION_VERSION}:{normalized_question}'.encode('utf-8')
+    ).hexdigest()
+
+class CacheStats:
+    """Thread-safe hit/miss/eviction counters."""
+
+    FIELDS = ('hits', 'misses', 'evictions', 'coalesced', 'invalidations')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def incr(self, field, amount=1):
+        with self._lock:
+            self._counts[field] += amount
+
+    def to_dict(self):
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = counts['hits'] + counts['misses']
+        counts['hit_rate'] = round(counts['hits'] / lookups, 4) if lookups else 0.0
+        return counts
+
+class MemoryCacheBackend:
+    """In-process LRU cache with per-entry TTL."""
+
+    name = 'memory'
+
+    def __init__(self, stats, max_entries=1024, ttl=86400):
+        self.stats = stats
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, category, response)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.stats.incr('evictions')
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+
+    def set(self, key, normalized_question, category, response):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, category, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.incr('evictions')
+
+    def invalidate(self, category=None):
+        with self._lock:
+            if category is None:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                keys = [k for k, entry in self._entries.items() if entry[1] == category]
+                for k in keys:
+                    del self._entries[k]
+                removed = len(keys)
+        return removed
+
+    def size(self):
+        with self._lock:
+            return len(self._entries)
+
+class DatabaseCacheBackend:
+    """Cache table shared by every worker process (SQLite or Postgres)."""
+
+    name = 'database'
+
+    # Expired rows are swept at most this often, from whichever worker writes
+    PRUNE_INTERVAL_SECONDS = 300
+
+    def __init__(self, stats, ttl=86400):
+        self.stats = stats
+        self.ttl = ttl
+        self._last_prune = 0.0
+
+    def get(self, key):
+        row = db.session.query(
+            AIResponseCacheEntry.category, AIResponseCacheEntry.ai_response
+        ).filter(
+            AIResponseCacheEntry.key == key,
+            AIResponseCacheEntry.expires_at > datetime.utcnow()
+        ).first()
+        return (row.category, row.ai_response) if row else None
+
+    def set(self, key, normalized_question, category, response):
+        table = AIResponseCacheEntry.__table__
+        now = datetime.utcnow()
+        # Own connection and transaction so the caller's session is untouched
+        with db.engine.begin() as connection:
+            connection.execute(table.delete().where(table.c.key == key))
+            connection.execute(table.insert().values(
+                key=key,
+                normalized_question=normalized_question,
+                category=category,
+                ai_response=response,
+                created_at=now,
+                expires_at=now + timedelta(seconds=self.ttl)
+            ))
+            if time.monotonic() - self._last_prune > self.PRUNE_INTERVAL_SECONDS:
+                self._last_prune = time.monotonic()
+                pruned = connection.execute(
+                    table.delete().where(table.c.expires_at <= now)
+                ).rowcount
+                self.stats.incr('evictions', pruned)
+
+    def invalidate(self, category=None):
+        query = AIResponseCacheEntry.query
+        if category is not None:
+            query = query.filter(AIResponseCacheEntry.category == category)
+        removed = query.delete(synchronize_session=False)
+        db.session.commit()
+        return removed
+
+    def size(self):
+        return AIResponseCacheEntry.query.filter(
+            AIResponseCacheEntry.expires_at > datetime.utcnow()
+        ).count()
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one execution."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Run ``fn`` once per key at a time; returns (result, shared)."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+class ResponseCache:
+    """App extension caching AI answers by normalized question."""
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.stats = CacheStats()
+        self._flight = SingleFlight()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get('AI_CACHE_BACKEND', 'memory')
+        ttl = app.config.get('AI_CACHE_TTL_SECONDS', 86400)
+        if backend == 'memory':
+            self.backend = MemoryCacheBackend(
+                self.stats, max_entries=app.config.get('AI_CACHE_MAX_ENTRIES', 1024), ttl=ttl
+            )
+        elif backend == 'database':
+            self.backend = DatabaseCacheBackend(self.stats, ttl=ttl)
+        elif backend in (None, '', 'none'):
+            self.backend = None
+        else:
+            raise ValueError(f"Unknown AI_CACHE_BACKEND '{backend}'")
+        app.extensions['ai_response_cache'] = self
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    def get_or_compute(self, question: str, compute: Callable[[], Tuple[str, str]]) -> Tuple[str, str]:
+        """Return a cached (category, response) or compute and store one.
+
+        Concurrent callers asking the same normalized question in this
+        process wait for a single ``compute`` call instead of each calling
+        the model.
+        """
+        if not self.enabled:
+            return compute()
+
+        normalized = normalize_question(question)
+        if not normalized:
+            return compute()
+        key = cache_key(normalized)
+
+        cached = self._get(key)
+        if cached is not None:
+            self.stats.incr('hits')
+            return cached
+
+        def load():
+            # A previous leader may have filled the cache while we queued
+            cached = self._get(key)
+            if cached is not None:
+                return cached, True
+            category, response = compute()
+            try:
+                self.backend.set(key, normalized, category, response)
+            except Exception as e:
+                logger.error(f"Failed to store AI response in cache: {str(e)}")
+            return (category, response), False
+
+        (result, from_cache), shared = self._flight.do(key, load)
+        if shared:
+            self.stats.incr('coalesced')
+        self.stats.incr('hits' if shared or from_cache else 'misses')
+        return result
+
+    def lookup(self, question: str) -> Optional[Tuple[str, str]]:
+        """Return a cached (category, response) without computing on a miss."""
+        if not self.enabled:
+            return None
+        normalized = normalize_question(question)
+        if not normalized:
+            return None
+        cached = self._get(cache_key(normalized))
+        self.stats.incr('hits' if cached is not None else 'misses')
+        return cached
+
+    def store(self, question: str, category: str, response: str):
+        """Cache an answer produced outside ``get_or_compute`` (e.g. streamed)."""
+        normalized = normalize_question(question)
+        if not self.enabled or not normalized:
+            return
+        try:
+            self.backend.set(cache_key(normalized), normalized, category, response)
+        except Exception as e:
+            logger.error(f"Failed to store AI response in cache: {str(e)}")
+
+    def _get(self, key) -> Optional[Tuple[str, str]]:
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            logger.error(f"AI response cache lookup failed: {str(e)}")
+            return None
+
+    def invalidate(self, category: Optional[str] = None) -> int:
+        """Drop cached answers, optionally only for one specialization."""
+        if not self.enabled:
+            return 0
+        removed = self.backend.invalidate(category)
+        self.stats.incr('invalidations', removed)
+        return removed
+
+    def info(self) -> dict:
+        info = {'backend': self.backend.name if self.enabled else None}
+        info.update(self.stats.to_dict())
+        if self.enabled:
+            info['size'] = self.backend.size()
+        return info
+
+response_cache = ResponseCache()
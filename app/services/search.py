@@ -0,0 +1,212 @@
+from flask import current_app
+from app import db
+from app.models.query import Query, SEARCH_CONFIG
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import load_only
+from typing import NamedTuple, Optional
+import html
+import re
+
+# Snippet markers that can't occur in stored text; after escaping the
+# snippet they become <mark> tags
+MARK_START = '\x02'
+MARK_STOP = '\x03'
+
+# FTS5 column weights in table order: question, AI answer, clinician
+# response (the same order of importance as the tsvector weights A/C/B)
+FTS5_WEIGHTS = '4.0, 1.0, 2.0'
+
+HEADLINE_OPTIONS = (
+    f'StartSel="{MARK_START}", StopSel="{MARK_STOP}", '
+    'MaxWords=24, MinWords=8, MaxFragments=2, FragmentDelimiter=" … "'
+)
+
+class SearchMatch(NamedTuple):
+    """A matching query's id, rank and raw (marked, unescaped) snippets."""
+    id: int
+    rank: float
+    question: str
+    ai_response: Optional[str]
+    clinician_response: Optional[str]
+
+# Quoted phrases and words, each optionally negated with a leading '-'
+TERM_PATTERN = re.compile(r'(-?)"([^"]*)"|(-?)(\w+)')
+
+def fts5_match(terms):
+    """Translate web-search syntax (words, "phrases", -exclusions, or) to an FTS5 query.
+
+    Mirrors PostgreSQL's ``websearch_to_tsquery``: terms are ANDed, ``or``
+    between two terms makes them alternatives and ``-term`` excludes.
+    Returns None when nothing is left to search for.
+    """
+    included = []
+    excluded = []
+    alternative = False
+    for phrase_negated, phrase, word_negated, word in TERM_PATTERN.findall(terms):
+        if word.lower() == 'or' and not word_negated:
+            alternative = bool(included)
+            continue
+        words = re.findall(r'\w+', phrase or word)
+        if not words:
+            continue
+        term = '"' + ' '.join(words) + '"'
+        if phrase_negated or word_negated:
+            excluded.append(term)
+        elif alternative:
+            included.append('OR')
+            included.append(term)
+        else:
+            if included:
+                included.append('AND')
+            included.append(term)
+        alternative = False
+    if not included:
+        return None
+    return ' NOT '.join([f"({' '.join(included)})"] + excluded)
+
+def has_positive_terms(terms):
+    """Whether ``terms`` has a word or phrase to match, not only exclusions.
+
+    ``-chest`` alone matches nothing on SQLite but every row without
+    "chest" on PostgreSQL, a scan of most of the table, so callers reject it.
+    """
+    return fts5_match(terms) is not None
+
+def _filters(category, status, urgency):
+    clauses = []
+    params = {}
+    for column, value in (('category', category), ('status', status), ('urgency_level', urgency)):
+        if value is not None:
+            clauses.append(f'AND q.{column} = :{column}')
+            params[column] = value
+    return ' '.join(clauses), params
+
+def search_statement(dialect, filters=''):
+    """The statement that finds and ranks one page of matches on ``dialect``.
+
+    PostgreSQL takes ``terms``, ``options``, ``limit``, ``offset`` and
+    ``max_candidates`` and returns rows with snippets; SQLite takes
+    ``match`` (see ``fts5_match``) instead of ``terms`` and ``options`` and
+    returns ids and ranks only.
+    """
+    if dialect == 'postgresql':
+        # Rank only the newest SEARCH_MAX_CANDIDATES matches, so a common term
+        # doesn't rank millions of rows, and build snippets for one page only.
+        # The GIN bitmap scan still visits every match before the sort picks the
+        # newest, so a very common term gets slower as the table grows; check
+        # with benchmarks/plan_check.py against a large database.
+        # The tsquery is written out each time (not taken from a CTE) so the
+        # planner folds it to a constant and can estimate how common it is.
+        tsquery = f"websearch_to_tsquery('{SEARCH_CONFIG}', :terms)"
+        return text(f"""
+            WITH candidates AS (
+                SELECT q.id, q.search_vector
+                FROM queries q
+                WHERE q.search_vector @@ {tsquery} {filters}
+                ORDER BY q.created_at DESC
+                LIMIT :max_candidates
+            ), ranked AS (
+                SELECT c.id, ts_rank_cd(c.search_vector, {tsquery}, 32) AS rank
+                FROM candidates c
+                ORDER BY rank DESC, c.id DESC
+                LIMIT :limit OFFSET :offset
+            )
+            SELECT r.id, r.rank,
+                ts_headline('{SEARCH_CONFIG}', q.question, {tsquery}, :options) AS question,
+                ts_headline('{SEARCH_CONFIG}', coalesce(q.ai_response, ''), {tsquery}, :options) AS ai_response,
+                ts_headline('{SEARCH_CONFIG}', coalesce(q.clinician_response, ''), {tsquery}, :options)
+                    AS clinician_response
+            FROM ranked r JOIN queries q ON q.id = r.id
+            ORDER BY r.rank DESC, r.id DESC
+        """)
+    if dialect == 'sqlite':
+        # Same candidate cap as on PostgreSQL, newest by id (FTS5 walks rowids
+        # in order); snippets need the FTS cursor, so they are a second pass
+        return text(f"""
+            SELECT id, rank FROM (
+                SELECT q.id AS id, -bm25(queries_fts, {FTS5_WEIGHTS}) AS rank
+                FROM queries_fts JOIN queries q ON q.id = queries_fts.rowid
+                WHERE queries_fts MATCH :match {filters}
+                ORDER BY queries_fts.rowid DESC
+                LIMIT :max_candidates
+            )
+            ORDER BY rank DESC, id DESC
+            LIMIT :limit OFFSET :offset
+        """)
+    raise NotImplementedError(f'Full-text search is not available on {dialect}')
+
+def _postgres_matches(terms, filters, params, limit, offset):
+    return db.session.execute(search_statement('postgresql', filters), dict(
+        params, terms=terms, options=HEADLINE_OPTIONS, limit=limit, offset=offset,
+        max_candidates=current_app.config.get('SEARCH_MAX_CANDIDATES', 10000)
+    )).all()
+
+def _sqlite_matches(terms, filters, params, limit, offset):
+    match = fts5_match(terms)
+    if match is None:
+        return []
+    ranked = db.session.execute(search_statement('sqlite', filters), dict(
+        params, match=match, limit=limit, offset=offset,
+        max_candidates=current_app.config.get('SEARCH_MAX_CANDIDATES', 10000)
+    )).all()
+    if not ranked:
+        return []
+    snippet = "snippet(queries_fts, {column}, :start, :stop, ' … ', 24)"
+    snippets = {row.id: row for row in db.session.execute(text(f"""
+        SELECT rowid AS id,
+            {snippet.format(column=0)} AS question,
+            {snippet.format(column=1)} AS ai_response,
+            {snippet.format(column=2)} AS clinician_response
+        FROM queries_fts
+        WHERE queries_fts MATCH :match AND rowid IN :ids
+    """).bindparams(bindparam('ids', expanding=True)), {
+        'match': match, 'start': MARK_START, 'stop': MARK_STOP, 'ids': [row.id for row in ranked]
+    })}
+    return [
+        SearchMatch(row.id, row.rank, snippets[row.id].question, snippets[row.id].ai_response,
+                    snippets[row.id].clinician_response)
+        for row in ranked if row.id in snippets
+    ]
+
+def highlight(snippet):
+    """HTML-escape a snippet and wrap the matched words in <mark>."""
+    return html.escape(snippet).replace(MARK_START, '<mark>').replace(MARK_STOP, '</mark>')
+
+def search_queries(terms, category=None, status=None, urgency=None, page=1, per_page=20):
+    """Queries matching ``terms``, best match first.
+
+    Returns ``(results, has_more)``, where each result is ``(query, rank,
+    highlights)``. Queries are loaded with the summary columns only.
+    ``highlights`` holds an HTML snippet of the question and of each
+    response that contains a match.
+    """
+    filters, params = _filters(category, status, urgency)
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        find = _postgres_matches
+    elif dialect == 'sqlite':
+        find = _sqlite_matches
+    else:
+        raise NotImplementedError(f'Full-text search is not available on {dialect}')
+
+    # One extra row tells whether another page exists
+    rows = find(terms, filters, params, per_page + 1, (page - 1) * per_page)
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    queries = {
+        query.id: query for query in Query.query.options(load_only(
+            *(getattr(Query, column) for column in Query.SUMMARY_COLUMNS), raiseload=True
+        )).filter(Query.id.in_([row.id for row in rows]))
+    } if rows else {}
+    results = []
+    for row in rows:
+        if row.id not in queries:
+            continue
+        highlights = {'question': highlight(row.question)}
+        for field in ('ai_response', 'clinician_response'):
+            snippet = getattr(row, field)
+            if snippet and MARK_START in snippet:
+                highlights[field] = highlight(snippet)
+        results.append((queries[row.id], float(row.rank), highlights))
+    return results, has_more
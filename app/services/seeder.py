@@ -0,0 +1,212 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models.query import Query, URGENCY_RANKS, make_preview
+from app.models.user import User
+from app.services.local_provider import LocalProvider
+from app.services.password_hasher import password_hasher
+from app.services.prompts import ANSWER_INSTRUCTION, answer_message
+from app.services.query_pipeline import UNCATEGORIZED
+from app.utils.specialization import Specialization
+import itertools
+import random
+import math
+import csv
+import io
+
+SEED_PASSWORD = 'Seed-Passw0rd'
+
+# Specializations from most to least asked about; weights fall off as 1/rank
+POPULARITY = [
+    Specialization.FAMILY_MEDICINE, Specialization.INTERNAL_MEDICINE, Specialization.DERMATOLOGY,
+    Specialization.PEDIATRICS, Specialization.PSYCHIATRY, Specialization.ORTHOPEDICS,
+    Specialization.GASTROENTEROLOGY, Specialization.CARDIOLOGY, Specialization.ENT,
+    Specialization.GYNECOLOGY, Specialization.ALLERGY_IMMUNOLOGY, Specialization.NEUROLOGY,
+    Specialization.ENDOCRINOLOGY, Specialization.PULMONOLOGY, Specialization.UROLOGY,
+    Specialization.OPHTHALMOLOGY, Specialization.INFECTIOUS_DISEASE, Specialization.RHEUMATOLOGY,
+    Specialization.EMERGENCY_MEDICINE, Specialization.GENERAL_SURGERY, Specialization.NEPHROLOGY,
+    Specialization.HEMATOLOGY, Specialization.ONCOLOGY, Specialization.PLASTIC_SURGERY,
+]
+CATEGORY_WEIGHTS = {specialization.value: 1 / rank for rank, specialization in enumerate(POPULARITY, 1)}
+
+URGENCY_WEIGHTS = {'low': 30, 'normal': 45, 'medium': 15, 'high': 10}
+# A long-running deployment: most queries reviewed, a backlog of recent ones
+STATUS_WEIGHTS = {'verified': 85, 'pending': 11, 'processing': 2, 'failed': 2}
+# Median hours from submission to review, by urgency
+REVIEW_HOURS = {'high': 1, 'medium': 4, 'normal': 12, 'low': 24}
+
+SYMPTOMS = {
+    Specialization.CARDIOLOGY: ['chest pain when climbing stairs', 'a racing heartbeat at night', 'swollen ankles by the evening'],
+    Specialization.DERMATOLOGY: ['an itchy rash on my arms', 'a mole that has changed shape', 'dry cracked skin on my hands'],
+    Specialization.NEUROLOGY: ['headaches with blurry vision', 'numbness in my fingers', 'dizzy spells when I turn my head'],
+    Specialization.PEDIATRICS: ['a fever that keeps coming back', 'a barking cough at night', 'a rash since starting nursery'],
+    Specialization.PSYCHIATRY: ['trouble sleeping and low mood', 'panic attacks at work', 'constant worrying I cannot switch off'],
+    Specialization.ORTHOPEDICS: ['a swollen knee after running', 'lower back pain when lifting', 'a stiff painful shoulder'],
+    Specialization.GYNECOLOGY: ['irregular periods for several months', 'pelvic pain during my period', 'hot flushes and night sweats'],
+    Specialization.ONCOLOGY: ['a lump in my neck that is not going away', 'unexplained weight loss', 'night sweats and tiredness'],
+    Specialization.ENDOCRINOLOGY: ['being thirsty all the time', 'weight gain and feeling cold', 'a swelling at the front of my neck'],
+    Specialization.GASTROENTEROLOGY: ['stomach cramps after meals', 'heartburn most evenings', 'bloating and changed bowel habits'],
+    Specialization.PULMONOLOGY: ['a cough that will not go away', 'shortness of breath on exertion', 'wheezing at night'],
+    Specialization.NEPHROLOGY: ['foamy urine and puffy eyes', 'high blood pressure and tiredness', 'pain in my side near the kidneys'],
+    Specialization.UROLOGY: ['needing to urinate often at night', 'a burning feeling when urinating', 'blood in my urine'],
+    Specialization.OPHTHALMOLOGY: ['red itchy eyes', 'floaters in my vision', 'trouble seeing at night'],
+    Specialization.ENT: ['ear pain and a mild fever', 'a blocked nose for weeks', 'ringing in my ears'],
+    Specialization.RHEUMATOLOGY: ['joint stiffness in the mornings', 'swollen finger joints', 'aching muscles all over'],
+    Specialization.HEMATOLOGY: ['bruising easily', 'feeling tired and pale', 'nosebleeds that take long to stop'],
+    Specialization.INFECTIOUS_DISEASE: ['a fever after travelling abroad', 'a wound that looks infected', 'recurring cold sores'],
+    Specialization.ALLERGY_IMMUNOLOGY: ['hay fever every spring', 'hives after eating nuts', 'a reaction to a bee sting'],
+    Specialization.EMERGENCY_MEDICINE: ['a deep cut on my hand', 'a fall and a painful wrist', 'a burn from boiling water'],
+    Specialization.FAMILY_MEDICINE: ['a sore throat and fatigue', 'feeling run down for weeks', 'questions about my vaccinations'],
+    Specialization.INTERNAL_MEDICINE: ['high cholesterol results', 'feeling tired all the time', 'swollen glands and a fever'],
+    Specialization.GENERAL_SURGERY: ['a bulge in my groin', 'pain after gallbladder surgery', 'a painful lump near my tailbone'],
+    Specialization.PLASTIC_SURGERY: ['a scar that is raised and itchy', 'questions about breast reconstruction', 'a slow-healing wound after surgery'],
+}
+OPENERS = ['I have', 'I have had', 'My child has', 'My partner has', 'For a few weeks I have had', 'Since last month I have']
+
+REVIEW_RESPONSES = [
+    'I agree with the AI response. Please book a routine appointment if this persists.',
+    'The AI response is accurate. Given your history, please see your GP within a week.',
+    'Please seek care today; the symptoms you describe need an examination in person.',
+    'This is most likely benign. Follow the self-care advice and get back to us if it changes.',
+]
+
+QUERY_COLUMNS = (
+    'patient_id', 'clinician_id', 'category', 'question', 'ai_response', 'ai_response_preview',
+    'clinician_response', 'status', 'urgency_level', 'urgency_rank', 'is_anonymous',
+    'created_at', 'updated_at', 'reviewed_at'
+)
+USER_COLUMNS = (
+    'email', 'password_hash', 'first_name', 'last_name', 'role', 'specialization',
+    'license_number', 'is_verified', 'created_at', 'updated_at'
+)
+
+def bulk_method():
+    """``copy`` on PostgreSQL, ``executemany`` elsewhere."""
+    return 'copy' if db.session.get_bind().dialect.name == 'postgresql' else 'executemany'
+
+def _copy_value(value):
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    return value
+
+def _bulk_insert(table, columns, rows):
+    """Insert tuples in ``columns`` order inside the session's transaction."""
+    if not rows:
+        return
+    if bulk_method() == 'copy':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            # NULLs are written as unquoted empty fields, which COPY's CSV format reads back as NULL
+            writer.writerow(['' if value is None else _copy_value(value) for value in row])
+        buffer.seek(0)
+        with db.session.connection().connection.cursor() as cursor:
+            cursor.copy_expert(f'COPY {table.name} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)', buffer)
+        return
+    db.session.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+
+def _answer_pool():
+    """Questions with their (answer, preview) per category, generated once per seeding run."""
+    provider = LocalProvider()
+    pool = {}
+    for specialization, symptoms in SYMPTOMS.items():
+        entries = []
+        for opener, symptom in itertools.product(OPENERS, symptoms):
+            question = f'{opener} {symptom}'
+            answer = provider.generate(ANSWER_INSTRUCTION, answer_message(question, specialization.value), 'answer').text
+            entries.append((question, answer, make_preview(answer)))
+        pool[specialization.value] = entries
+    return pool
+
+def _seed_users(patients, clinicians_per_specialization, password, now):
+    offset = db.session.query(db.func.coalesce(db.func.max(User.id), 0)).scalar()
+    # Every seeded user shares one password, so hash it once
+    password_hash = password_hasher.hash(password)
+    rows = [
+        (f'patient{offset + i}@seed.example.com', password_hash, 'Patient', str(offset + i),
+         'patient', None, None, False, now, now)
+        for i in range(patients)
+    ]
+    specializations = Specialization.list()
+    rows += [
+        (f'clinician{offset + i}@seed.example.com', password_hash, 'Clinician', str(offset + i),
+         'clinician', specializations[i % len(specializations)], f'SEED-{offset + i}', True, now, now)
+        for i in range(clinicians_per_specialization * len(specializations))
+    ]
+    _bulk_insert(User.__table__, USER_COLUMNS, rows)
+    db.session.commit()
+    return patients, len(rows) - patients
+
+def seed_database(patients=0, clinicians_per_specialization=0, queries=0, batch_size=10000,
+                  days=365, seed=None, password=SEED_PASSWORD, progress=None):
+    """Bulk-load synthetic users and queries; returns the number of rows added per kind.
+
+    New queries are spread over all patients and clinicians in the
+    database, so it can be called again to grow an existing dataset.
+    Categories, urgency and status follow skewed, production-like
+    distributions: a few patients ask most questions, most queries are
+    reviewed, and reviews come sooner for urgent ones. Rows go in with
+    ``COPY`` on PostgreSQL and batched ``executemany`` elsewhere, committing
+    every ``batch_size`` rows; ``progress(inserted, total)`` is called after
+    each batch.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    added_patients, added_clinicians = _seed_users(patients, clinicians_per_specialization, password, now)
+
+    patient_ids = [row.id for row in db.session.query(User.id).filter_by(role='patient').order_by(User.id)]
+    clinician_ids = {}
+    for row in db.session.query(User.id, User.specialization).filter_by(role='clinician'):
+        clinician_ids.setdefault(row.specialization, []).append(row.id)
+    if queries and not patient_ids:
+        raise ValueError('Seeding queries needs at least one patient')
+    everyone = [clinician for ids in clinician_ids.values() for clinician in ids]
+
+    pool = _answer_pool()
+    categories, category_weights = list(CATEGORY_WEIGHTS), list(itertools.accumulate(CATEGORY_WEIGHTS.values()))
+    urgencies, urgency_weights = list(URGENCY_WEIGHTS), list(itertools.accumulate(URGENCY_WEIGHTS.values()))
+    statuses, status_weights = list(STATUS_WEIGHTS), list(itertools.accumulate(STATUS_WEIGHTS.values()))
+    span = days * 86400
+
+    inserted = 0
+    while inserted < queries:
+        rows = []
+        for _ in range(min(batch_size, queries - inserted)):
+            category = rng.choices(categories, cum_weights=category_weights)[0]
+            urgency = rng.choices(urgencies, cum_weights=urgency_weights)[0]
+            status = rng.choices(statuses, cum_weights=status_weights)[0]
+            question, answer, preview = rng.choice(pool[category])
+            # Cubing a uniform draw concentrates queries on the first patients
+            patient_id = patient_ids[int(len(patient_ids) * rng.random() ** 3)]
+            clinicians = clinician_ids.get(category) or everyone
+
+            if status == 'verified':
+                # Skewed towards recent months, as traffic grows over time
+                created_at = now - timedelta(seconds=span * rng.random() ** 2)
+                delay = REVIEW_HOURS[urgency] * 3600 * math.exp(rng.gauss(0, 1))
+                reviewed_at = min(created_at + timedelta(seconds=delay), now)
+                row = (patient_id, rng.choice(clinicians) if clinicians else None, category, question,
+                       answer, preview, rng.choice(REVIEW_RESPONSES), status, urgency,
+                       URGENCY_RANKS[urgency], rng.random() < 0.1, created_at, reviewed_at, reviewed_at)
+            else:
+                # Open and failed queries are the last week's backlog; only pending ones have an answer
+                created_at = now - timedelta(seconds=rng.uniform(0, 7 * 86400))
+                if status == 'pending':
+                    row = (patient_id, rng.choice(clinicians) if clinicians else None, category, question,
+                           answer, preview, None, status, urgency, URGENCY_RANKS[urgency],
+                           rng.random() < 0.1, created_at, created_at, None)
+                else:
+                    row = (patient_id, None, UNCATEGORIZED, question, None, None, None, status, urgency,
+                           URGENCY_RANKS[urgency], rng.random() < 0.1, created_at, created_at, None)
+            rows.append(row)
+        _bulk_insert(Query.__table__, QUERY_COLUMNS, rows)
+        db.session.commit()
+        inserted += len(rows)
+        if progress is not None:
+            progress(inserted, queries)
+
+    # Refresh planner statistics for the new data distribution
+    db.session.execute(db.text('ANALYZE'))
+    db.session.commit()
+    return {'patients': added_patients, 'clinicians': added_clinicians, 'queries': inserted}
@@ -0,0 +1,33 @@
+import threading
+
+class StreamSlots:
+    """Caps the requests that hold a server thread open for a long time.
+
+    Event streams, AI answer streams and status long-polls can each keep a
+    request thread for minutes. Each worker process gets
+    ``WEB_STREAM_THREADS`` threads for them on top of ``WEB_THREADS``
+    (see ``gunicorn.conf.py``), and at most that many long-held requests
+    run at once, so they can't take the threads short requests need.
+    ``WEB_STREAM_THREADS=0`` turns the cap off.
+    """
+
+    def __init__(self, app=None):
+        self.limit = 0
+        self._slots = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.limit = app.config.get('WEB_STREAM_THREADS', 32)
+        self._slots = threading.BoundedSemaphore(self.limit) if self.limit else None
+        app.extensions['stream_slots'] = self
+
+    def acquire(self):
+        """Take a slot without waiting; False when all are in use."""
+        return self._slots is None or self._slots.acquire(blocking=False)
+
+    def release(self):
+        if self._slots is not None:
+            self._slots.release()
+
+stream_slots = StreamSlots()
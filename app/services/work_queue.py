@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.models.query import Query
+from app.services.assignment import clinician_assigner
+from sqlalchemy.orm import load_only
+import logging
+
+logger = logging.getLogger(__name__)
+
+def claimable_by(clinician_id, now):
+    """Queries with no live claim, or claimed by this clinician."""
+    return db.or_(
+        Query.claimed_by.is_(None),
+        Query.claimed_by == clinician_id,
+        Query.claim_expires_at <= now
+    )
+
+def _queue_filter(clinician_id, now):
+    """Pending queries for this clinician (or unassigned) without a live claim."""
+    return db.and_(
+        Query.status == 'pending',
+        db.or_(Query.clinician_id == clinician_id, Query.clinician_id.is_(None)),
+        claimable_by(clinician_id, now)
+    )
+
+def _claim_values(clinician_id, now):
+    # Claiming an unassigned query also assigns it to the claimer
+    return {
+        'claimed_by': clinician_id,
+        'claim_expires_at': now + _claim_ttl(),
+        'clinician_id': db.func.coalesce(Query.clinician_id, clinician_id)
+    }
+
+def _queue_order():
+    return Query.urgency_rank, Query.created_at, Query.id
+
+def _claim_ttl():
+    return timedelta(seconds=current_app.config.get('REVIEW_CLAIM_TTL_SECONDS', 900))
+
+def peek_query(clinician_id, limit, now):
+    """The query ``peek_queue`` runs, summary columns only."""
+    return Query.query.options(load_only(
+        *(getattr(Query, column) for column in Query.SUMMARY_COLUMNS), raiseload=True
+    )).filter(_queue_filter(clinician_id, now))\
+        .order_by(*_queue_order())\
+        .limit(limit)
+
+def peek_queue(clinician_id, limit):
+    """Next ``limit`` queries this clinician could claim, most urgent then oldest."""
+    return peek_query(clinician_id, limit, datetime.utcnow()).all()
+
+def claim_candidates(clinician_id, now):
+    """Ids and clinicians of the queries ``claim_next`` tries, in claim order."""
+    return db.session.query(Query.id, Query.clinician_id)\
+        .filter(_queue_filter(clinician_id, now))\
+        .order_by(*_queue_order())
+
+def claim_next(clinician_id, limit):
+    """Claim up to ``limit`` queries for review and commit.
+
+    On Postgres the candidates are locked with ``FOR UPDATE SKIP LOCKED``,
+    so clinicians pulling at the same time get disjoint rows without
+    waiting on each other. Other databases claim each candidate with a
+    conditional UPDATE and skip rows another clinician won first.
+    Unassigned queries become the claimer's.
+    """
+    now = datetime.utcnow()
+    candidates = claim_candidates(clinician_id, now)
+
+    if db.session.get_bind().dialect.name == 'postgresql':
+        rows = candidates.limit(limit).with_for_update(skip_locked=True).all()
+        if rows:
+            Query.query.filter(Query.id.in_([row.id for row in rows]))\
+                .update(_claim_values(clinician_id, now), synchronize_session=False)
+    else:
+        rows = []
+        # Over-fetch so rows lost to a concurrent claimer can be skipped
+        for row in candidates.limit(limit * 2).all():
+            claimed = Query.query.filter(
+                Query.id == row.id,
+                _queue_filter(clinician_id, now)
+            ).update(_claim_values(clinician_id, now), synchronize_session=False)
+            if claimed:
+                rows.append(row)
+                if len(rows) == limit:
+                    break
+    db.session.commit()
+    clinician_assigner.take(clinician_id, sum(1 for row in rows if row.clinician_id is None))
+
+    ids = [row.id for row in rows]
+    if not ids:
+        return []
+    claimed = Query.query.filter(Query.id.in_(ids)).all()
+    claimed.sort(key=lambda query: ids.index(query.id))
+    return claimed
+
+def claim_one(query, clinician_id):
+    """Claim one query for review; returns False if someone else holds it.
+
+    An unassigned query becomes the claimer's.
+    """
+    now = datetime.utcnow()
+    was_unassigned = query.clinician_id is None
+    claimed = Query.query.filter(
+        Query.id == query.id,
+        Query.status == 'pending',
+        claimable_by(clinician_id, now)
+    ).update(_claim_values(clinician_id, now), synchronize_session=False)
+    db.session.commit()
+    db.session.refresh(query)
+    if claimed and was_unassigned and query.clinician_id == clinician_id:
+        clinician_assigner.take(clinician_id)
+    return bool(claimed)
+
+def release_claim(query, clinician_id):
+    """Give a claim back to the pool; only the holder can release it."""
+    released = Query.query.filter(
+        Query.id == query.id,
+        Query.claimed_by == clinician_id
+    ).update({
+        'claimed_by': None,
+        'claim_expires_at': None
+    }, synchronize_session=False)
+    db.session.commit()
+    return bool(released)
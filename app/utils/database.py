@@ -0,0 +1,82 @@
+from sqlalchemy.engine import make_url
+from app import db
+import weakref
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+def pool_size(config):
+    """Connections each worker process keeps open.
+
+    One per request thread, plus one per AI pipeline worker thread, unless
+    ``DB_POOL_SIZE`` is set. ``WEB_STREAM_THREADS`` are not counted: event
+    streams never query the database, and answer streams and long-polls
+    release their connection between polls and while the model streams, so
+    they only borrow one briefly and the overflow covers them. With
+    ``DB_MAX_CONNECTIONS`` the size is capped so that every worker's pool
+    and overflow, plus the LISTEN connection of the postgres events
+    backend, together stay within it.
+    """
+    if config.get('DB_POOL_SIZE'):
+        return config['DB_POOL_SIZE']
+    size = config.get('WEB_THREADS', 1)
+    if config.get('AI_PIPELINE_ASYNC', True):
+        size += config.get('AI_WORKER_COUNT', 4)
+    budget = config.get('DB_MAX_CONNECTIONS')
+    if budget:
+        workers = max(1, config.get('WEB_CONCURRENCY', 1))
+        reserved = config.get('DB_MAX_OVERFLOW', 0) + (1 if config.get('EVENTS_BACKEND') == 'postgres' else 0)
+        allowed = budget // workers - reserved
+        if allowed < size:
+            logger.warning(
+                f"DB_MAX_CONNECTIONS={budget} leaves {max(1, allowed)} pooled connections per worker "
+                f"for {size} threads; requests may wait up to DB_POOL_TIMEOUT for a connection"
+            )
+            size = max(1, allowed)
+    return size
+
+def engine_options(config):
+    """``SQLALCHEMY_ENGINE_OPTIONS`` for the configured database.
+
+    Server databases get a pool sized by ``pool_size``, pre-ping and
+    recycling; PostgreSQL also gets ``statement_timeout``. SQLite keeps
+    Flask-SQLAlchemy's defaults.
+    """
+    uri = config.get('SQLALCHEMY_DATABASE_URI')
+    if not uri:
+        return {}
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite':
+        return {}
+    options = {
+        'pool_size': pool_size(config),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 2),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 10),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True),
+    }
+    timeout = config.get('DB_STATEMENT_TIMEOUT_MS')
+    if timeout and url.get_backend_name() == 'postgresql':
+        options['connect_args'] = {'options': f'-c statement_timeout={int(timeout)}'}
+    return options
+
+def dispose_engines_after_fork(app):
+    """Make forked children open their own connections instead of sharing the parent's.
+
+    ``dispose(close=False)`` forgets the inherited pool without closing its
+    sockets, which the parent may still be using.
+    """
+    if not hasattr(os, 'register_at_fork'):
+        return
+    app_ref = weakref.ref(app)
+
+    def after_fork():
+        app = app_ref()
+        if app is None:
+            return
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+
+    os.register_at_fork(after_in_child=after_fork)
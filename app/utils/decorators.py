@@ -1,6 +1,7 @@
 from functools import wraps
 from flask import request, jsonify
 from flask_login import current_user
+from app.services.rate_limiter import rate_limiter
 
 def json_required(f):
     """Ensure request has JSON content type."""
@@ -38,17 +39,34 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-def rate_limit(limit=100, per=60):
+def rate_limit(limit=100, per=60, scope=None, cost=None, key=None):
     """
     Rate limit decorator.
     :param limit: Number of allowed requests
     :param per: Time period in seconds
+    :param scope: Bucket name shared by views that draw on the same limit
+        (defaults to the view's endpoint)
+    :param cost: Optional callable returning how many requests this one counts as
+    :param key: Optional callable returning a string that further splits the
+        buckets, e.g. the account a login is for
+    
+    Buckets are kept per user, or per client address before login, so
+    apply this below ``login_required``.
     """
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            # This is a placeholder for rate limiting logic
-            # In production, use Redis or similar for proper rate limiting
+            if current_user.is_authenticated:
+                client = f'user:{current_user.id}'
+            else:
+                client = f'ip:{request.remote_addr}'
+            if key is not None:
+                client = f'{client}:{key()}'
+            rate_limiter.check(
+                f'{scope or request.endpoint}:{client}',
+                limit, per,
+                cost() if cost is not None else 1
+            )
             return f(*args, **kwargs)
         return decorated_function
-    return decorator 
\ No newline at end of file
+    return decorator
@@ -1,6 +1,7 @@
-from flask import jsonify
+from flask import jsonify, request
 from werkzeug.exceptions import HTTPException
 from sqlalchemy.exc import SQLAlchemyError
+from app.services.rate_limiter import rate_limit_headers
 
 def register_error_handlers(app):
     """Register error handlers for the application."""
@@ -48,10 +49,15 @@ def register_error_handlers(app):
     @app.errorhandler(429)
     def too_many_requests_error(error):
         """Handle rate limit exceeded errors."""
-        return jsonify({
+        response = jsonify({
             'error': 'Too Many Requests',
             'message': 'Rate limit exceeded. Please try again later'
-        }), 429
+        })
+        response.status_code = 429
+        result = getattr(error, 'rate_limit', None)
+        if result is not None:
+            response.headers.update(rate_limit_headers(result))
+        return response
     
     @app.errorhandler(500)
     def internal_server_error(error):
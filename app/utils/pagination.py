@@ -0,0 +1,42 @@
+from datetime import datetime
+from app import db
+import base64
+import json
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+    pass
+
+def encode_cursor(created_at, row_id):
+    """Opaque cursor pointing just past a row in (created_at, id) order."""
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise InvalidCursorError('Invalid cursor') from e
+
+def keyset_query(query, model, limit, cursor=None):
+    """``query`` narrowed to one newest-first page after ``cursor``.
+
+    Fetches one row more than ``limit``, to tell whether another page exists.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(db.tuple_(model.created_at, model.id) < db.tuple_(created_at, row_id))
+    return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+def keyset_page(query, model, limit, cursor=None):
+    """Fetch one page newest-first after ``cursor``, without OFFSET or COUNT.
+
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is None on the last page.
+    """
+    rows = keyset_query(query, model, limit, cursor).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
@@ -0,0 +1,96 @@
+import json
+import math
+
+class DDSketch:
+    """Mergeable quantile sketch with relative-error guarantees (DDSketch).
+
+    Positive values are counted in logarithmic buckets whose width grows by
+    ``gamma = (1 + alpha) / (1 - alpha)``, so any quantile is returned within
+    ``alpha`` relative error of the true value. Two sketches with the same
+    ``alpha`` merge by adding bucket counts, which lets hourly sketches be
+    combined into any window. Values are counted rather than stored, so a
+    value can also be removed again.
+    """
+
+    def __init__(self, alpha=0.01):
+        if not 0 < alpha < 1:
+            raise ValueError('alpha must be between 0 and 1')
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _index(self, value):
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, index):
+        # Midpoint of the bucket (gamma^(i-1), gamma^i] in relative terms
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def add(self, value, weight=1):
+        """Count a non-negative value; negative values are clamped to zero."""
+        if value <= 0:
+            self.zero_count += weight
+        else:
+            index = self._index(value)
+            self.bins[index] = self.bins.get(index, 0) + weight
+        self.count += weight
+
+    def remove(self, value, weight=1):
+        """Uncount a value previously added with ``add``."""
+        if value <= 0:
+            removed = min(weight, self.zero_count)
+            self.zero_count -= removed
+        else:
+            index = self._index(value)
+            removed = min(weight, self.bins.get(index, 0))
+            if self.bins.get(index, 0) - removed <= 0:
+                self.bins.pop(index, None)
+            else:
+                self.bins[index] -= removed
+        self.count -= removed
+
+    def merge(self, other):
+        """Add another sketch's counts into this one."""
+        if other.alpha != self.alpha:
+            raise ValueError('Cannot merge sketches with different accuracy')
+        for index, weight in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + weight
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+
+    def quantile(self, q):
+        """Approximate value at quantile ``q`` (0..1), or None when empty."""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                return self._value(index)
+        return self._value(max(self.bins))
+
+    def to_json(self):
+        return json.dumps({
+            'alpha': self.alpha,
+            'zero': self.zero_count,
+            'bins': [[index, weight] for index, weight in sorted(self.bins.items())]
+        }, separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, data):
+        payload = json.loads(data)
+        sketch = cls(payload['alpha'])
+        sketch.zero_count = payload['zero']
+        sketch.bins = {index: weight for index, weight in payload['bins']}
+        sketch.count = sketch.zero_count + sum(sketch.bins.values())
+        return sketch
+
+    def __len__(self):
+        return self.count
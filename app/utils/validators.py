@@ -1,8 +1,9 @@
 import re
-from email_validator import validate_email as validate_email_format, EmailNotValidError
 
 def validate_email(email):
     """Validate email format."""
+    # email_validator pulls in dnspython, so import it on first use
+    from email_validator import validate_email as validate_email_format, EmailNotValidError
     try:
         validate_email_format(email)
         return True
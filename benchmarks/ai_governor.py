@@ -0,0 +1,132 @@
+"""Drive the AI call governor through a simulated upstream incident.
+
+Calls go to the offline local provider, whose latency and error rate change
+between phases: healthy, an outage of 503s, a slowdown, then recovery.
+For each phase the script reports outcomes, latency, where the adaptive
+concurrency limit ended up and the circuit breaker state, so its
+behaviour can be checked without a Gemini key.
+
+    python benchmarks/ai_governor.py --threads 16 --phase-seconds 5
+    python benchmarks/ai_governor.py --breaker-mode queue
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from config import config
+from app.services.ai_governor import ai_governor, CircuitOpenError, GeminiBusyError
+from app.services.ai_provider import ai_provider
+from app.services.local_provider import local_provider
+from app.services.prompts import ANSWER_INSTRUCTION
+
+MESSAGE = "Query: My knee is swollen after running\n\n# Category\nOrthopedics"
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def worker(stop, outcomes, timings, lock):
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            ai_provider.generate(ANSWER_INSTRUCTION, MESSAGE, 'answer')
+            outcome = 'ok'
+        except CircuitOpenError:
+            outcome = 'short_circuited'
+        except GeminiBusyError:
+            outcome = 'busy'
+        except Exception:
+            outcome = 'failed'
+        elapsed = time.perf_counter() - start
+        with lock:
+            outcomes[outcome] += 1
+            if outcome == 'ok':
+                timings.append(elapsed)
+        if outcome != 'ok':
+            # Callers back off a little instead of spinning on fast failures
+            time.sleep(0.05)
+
+def run_phase(name, latency, error_rate, args):
+    local_provider.latency = latency
+    local_provider.error_rate = error_rate
+    stop = threading.Event()
+    outcomes = Counter()
+    timings = []
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(target=worker, args=(stop, outcomes, timings, lock), daemon=True)
+        for _ in range(args.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    limits = []
+    deadline = time.monotonic() + args.phase_seconds
+    while time.monotonic() < deadline:
+        time.sleep(0.1)
+        limits.append(ai_governor.state()['concurrency_limit'])
+    stop.set()
+    for thread in threads:
+        thread.join()
+    state = ai_governor.state()
+    return {
+        'phase': name,
+        'upstream_latency_seconds': latency,
+        'upstream_error_rate': error_rate,
+        'outcomes': dict(outcomes),
+        'p50_ms': round(percentile(timings, 0.5) * 1000, 1) if timings else None,
+        'p99_ms': round(percentile(timings, 0.99) * 1000, 1) if timings else None,
+        'limit_min': min(limits) if limits else None,
+        'limit_end': state['concurrency_limit'],
+        'breaker_end': state['breaker']['state'],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--phase-seconds', type=float, default=5.0)
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='healthy upstream latency, seconds')
+    parser.add_argument('--slowdown', type=float, default=10.0,
+                        help='latency multiplier during the slow phase')
+    parser.add_argument('--max-in-flight', type=int, default=8)
+    parser.add_argument('--breaker-mode', choices=['fail', 'queue'], default='fail')
+    parser.add_argument('--breaker-reset', type=float, default=2.0)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object(config['default'])
+    app.config.update(
+        AI_PROVIDER='local',
+        GEMINI_MAX_IN_FLIGHT=args.max_in_flight,
+        GEMINI_ACQUIRE_TIMEOUT=5.0,
+        AI_BREAKER_MODE=args.breaker_mode,
+        AI_BREAKER_RESET_SECONDS=args.breaker_reset,
+        AI_RETRY_BASE_DELAY=0.05,
+        AI_RETRY_MAX_DELAY=0.5,
+    )
+    ai_governor.init_app(app)
+    ai_provider.init_app(app)
+
+    phases = [
+        run_phase('healthy', args.latency, 0.0, args),
+        run_phase('outage', args.latency, 1.0, args),
+        run_phase('slow', args.latency * args.slowdown, 0.0, args),
+        run_phase('recovered', args.latency, 0.0, args),
+    ]
+    print(json.dumps({
+        'threads': args.threads,
+        'max_in_flight': args.max_in_flight,
+        'breaker_mode': args.breaker_mode,
+        'phases': phases,
+        'counts': ai_governor.state()['counts'],
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Compare AIService latency in two-call and single-call modes.
+
+By default the AI provider is replaced with a simulated one whose calls
+sleep for a configurable round-trip time, so the comparison runs offline
+and isolates the number of round trips. Pass ``--live`` to call Gemini
+with ``GEMINI_API_KEY`` instead.
+
+    python benchmarks/ai_modes.py --iterations 20
+    python benchmarks/ai_modes.py --live --iterations 5
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from config import config
+from app.services.ai_service import AIService, STRUCTURED_SECTIONS
+from app.services.ai_governor import ai_governor
+from app.services.ai_provider import ai_provider, AIResponse
+
+QUESTIONS = [
+    "I get chest pain when climbing stairs",
+    "My child has had a rash on their arms for a week",
+    "I have frequent headaches and blurry vision in the morning",
+    "My knee is swollen after running",
+]
+
+class SimulatedProvider:
+    """Stand-in for the AI provider that sleeps for each round trip."""
+
+    def __init__(self, round_trip, answer_time):
+        self.round_trip = round_trip
+        self.answer_time = answer_time
+        self.calls = 0
+
+    def generate(self, instruction, message, kind, json_schema=None):
+        self.calls += 1
+        if json_schema is not None:
+            time.sleep(self.round_trip + self.answer_time)
+            payload = {'category': 'Cardiology'}
+            for key, _ in STRUCTURED_SECTIONS:
+                payload[key] = "Summary:\n- point one\n- point two\n- point three"
+            return AIResponse(json.dumps(payload))
+        if kind == 'categorize':
+            time.sleep(self.round_trip)
+            return AIResponse('Cardiology')
+        time.sleep(self.round_trip + self.answer_time)
+        return AIResponse("# Category\nCardiology\n\n# Overview\nSummary\n- point")
+
+def run_mode(app, single_call, iterations, simulated):
+    timings = []
+    calls = 0
+    with app.app_context():
+        app.config['AI_SINGLE_CALL'] = single_call
+        service = AIService()
+        if simulated is not None:
+            simulated.calls = 0
+            service.provider = simulated
+        for i in range(iterations):
+            start = time.perf_counter()
+            service.get_response(QUESTIONS[i % len(QUESTIONS)])
+            timings.append(time.perf_counter() - start)
+        if simulated is not None:
+            calls = simulated.calls
+    timings.sort()
+    return {
+        'iterations': iterations,
+        'model_calls': calls or None,
+        'mean_ms': round(statistics.mean(timings) * 1000, 2),
+        'p50_ms': round(timings[len(timings) // 2] * 1000, 2),
+        'max_ms': round(timings[-1] * 1000, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--live', action='store_true', help='call the real Gemini API')
+    parser.add_argument('--round-trip', type=float, default=0.4,
+                        help='simulated network round trip per call, seconds')
+    parser.add_argument('--answer-time', type=float, default=1.5,
+                        help='simulated generation time for a full answer, seconds')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object(config['default'])
+    app.config['AI_PROVIDER'] = 'gemini'
+    simulated = None if args.live else SimulatedProvider(args.round_trip, args.answer_time)
+    ai_governor.init_app(app)
+    ai_provider.init_app(app)
+
+    two_call = run_mode(app, False, args.iterations, simulated)
+    single_call = run_mode(app, True, args.iterations, simulated)
+    print(json.dumps({
+        'backend': 'gemini' if args.live else 'simulated',
+        'two_call': two_call,
+        'single_call': single_call,
+        'speedup': round(two_call['mean_ms'] / single_call['mean_ms'], 2),
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,377 @@
+"""Load-test the portal's HTTP endpoints with a realistic traffic mix.
+
+Boots ``create_app`` against a throwaway SQLite database (set
+``DATABASE_URL`` to use a scratch Postgres instead; it gets seeded), seeds
+it like ``flask seed`` does, and serves the app on a local threaded HTTP server. Model calls go to the
+local provider. With ``--workers`` the app is served by gunicorn with the
+production settings in ``gunicorn.conf.py`` instead, to check that
+throughput scales with worker processes. Virtual users then send a weighted mix of patient
+submissions, dashboard list reads, query detail reads, clinician reviews
+and analytics for ``--duration`` seconds.
+
+Requests/sec, error rate and p50/p95/p99 per endpoint are printed as JSON
+(and written to ``--output``). Store a run with ``--save-baseline`` and
+compare later runs against it with ``--baseline``; the script exits 1 when
+an endpoint's p95 latency or throughput regresses by more than
+``--tolerance``.
+
+    python benchmarks/load_test.py --duration 20 --concurrency 16
+    python benchmarks/load_test.py --mix submit=1,patient_list=1 --duration 10
+    python benchmarks/load_test.py --workers 4 --threads 4 --concurrency 32
+    python benchmarks/load_test.py --save-baseline /tmp/load-baseline.json
+    python benchmarks/load_test.py --baseline /tmp/load-baseline.json --tolerance 0.25
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DATABASE_FILE = os.path.join(tempfile.mkdtemp(prefix='load-test-'), 'bench.db')
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{DATABASE_FILE}')
+os.environ.setdefault('AI_PROVIDER', 'local')
+# Every virtual user comes from one address and submits far faster than a person
+os.environ.setdefault('RATE_LIMIT_BACKEND', 'none')
+
+from werkzeug.serving import make_server
+from app import create_app, db
+from app.models.query import Query, URGENCY_RANKS
+from app.models.user import User
+from app.services.analytics import rebuild_rollups
+from app.services.local_provider import local_provider
+from app.services.password_hasher import password_hasher
+from app.services.seeder import seed_database, OPENERS, SYMPTOMS, SEED_PASSWORD
+
+# Requests per virtual user pick, by relative weight
+DEFAULT_MIX = {
+    'submit': 10,
+    'patient_list': 30,
+    'clinician_list': 20,
+    'query_detail': 15,
+    'review': 10,
+    'analytics': 10,
+    'clinician_stats': 5,
+}
+
+def question(rng):
+    specialization = rng.choice(list(SYMPTOMS))
+    return f'{rng.choice(OPENERS)} {rng.choice(SYMPTOMS[specialization])}'
+
+def seed(app, args):
+    """Seed the database; returns (patient emails, clinician emails, pending query ids)."""
+    with app.app_context():
+        db.create_all()
+        seed_database(
+            patients=args.patients,
+            clinicians_per_specialization=args.clinicians_per_specialization,
+            queries=args.queries,
+            seed=args.seed
+        )
+        rebuild_rollups()
+        patients = [row.email for row in db.session.query(User.email).filter_by(role='patient').order_by(User.id)]
+        clinicians = [row.email for row in db.session.query(User.email).filter_by(role='clinician').order_by(User.id)]
+        pending = [row.id for row in db.session.query(Query.id).filter_by(status='pending')]
+    random.Random(args.seed).shuffle(pending)
+    return patients, clinicians, pending
+
+class VirtualUser(threading.Thread):
+    """Logs in as one patient and one clinician, then sends weighted requests until stopped."""
+
+    def __init__(self, index, base_url, mix, shared, stop, args):
+        super().__init__(daemon=True)
+        self.index = index
+        self.base_url = base_url
+        self.operations = list(mix)
+        self.weights = [mix[name] for name in self.operations]
+        self.shared = shared
+        self.stop = stop
+        self.args = args
+        self.rng = random.Random(None if args.seed is None else args.seed + index)
+        self.patient = requests.Session()
+        self.clinician = requests.Session()
+        self.samples = []  # (endpoint, started, seconds, status)
+
+    def login(self):
+        patients, clinicians = self.shared['patients'], self.shared['clinicians']
+        for session, email in (
+            (self.patient, patients[self.index % len(patients)]),
+            (self.clinician, clinicians[self.index % len(clinicians)]),
+        ):
+            response = session.post(f'{self.base_url}/api/auth/login', json={'email': email, 'password': SEED_PASSWORD})
+            response.raise_for_status()
+
+    def request(self, endpoint, session, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = session.request(method, f'{self.base_url}{path}', timeout=30, **kwargs)
+            status = response.status_code
+        except requests.RequestException:
+            response, status = None, 0
+        self.samples.append((endpoint, started, time.perf_counter() - started, status))
+        return response
+
+    def run(self):
+        while not self.stop.is_set():
+            getattr(self, self.rng.choices(self.operations, self.weights)[0])()
+            if self.args.think_ms:
+                time.sleep(self.rng.uniform(0, 2 * self.args.think_ms) / 1000)
+
+    def submit(self):
+        self.request('submit', self.patient, 'POST', '/api/queries', json={
+            'question': question(self.rng),
+            'urgency_level': self.rng.choice(list(URGENCY_RANKS))
+        })
+
+    def patient_list(self):
+        self.request('patient_list', self.patient, 'GET', '/api/queries', params={'limit': 10})
+
+    def clinician_list(self):
+        self.request('clinician_list', self.clinician, 'GET', '/api/queries', params={'limit': 20})
+
+    def query_detail(self):
+        query_id = self.rng.randint(1, self.shared['max_query_id'])
+        self.request('query_detail', self.clinician, 'GET', f'/api/queries/{query_id}')
+
+    def review(self):
+        with self.shared['lock']:
+            query_id = self.shared['pending'].pop() if self.shared['pending'] else None
+        if query_id is None:
+            return self.clinician_list()
+        self.request('review', self.clinician, 'POST', f'/api/queries/{query_id}/review', json={
+            'response': 'Reviewed under load; the AI answer is appropriate.'
+        })
+
+    def analytics(self):
+        self.request('analytics', self.clinician, 'GET', '/api/queries/analytics')
+
+    def clinician_stats(self):
+        self.request('clinician_stats', self.clinician, 'GET', '/api/clinician/stats')
+
+def serve(app, server, stop):
+    # The seeding connections inherited from the parent were already
+    # dropped by the app's after-fork hook
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stop.wait()
+    server.shutdown()
+    password_hasher.shutdown()
+
+def start_server(app):
+    """Serve the app on a free local port; returns (base url, stop function)."""
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    base_url = f'http://127.0.0.1:{server.server_port}'
+    if hasattr(os, 'fork'):
+        # A separate process, so the virtual users don't compete with it for the GIL
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        process = context.Process(target=serve, args=(app, server, stop))
+        process.start()
+        server.socket.close()
+
+        def stop_server():
+            stop.set()
+            process.join()
+        return base_url, stop_server
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return base_url, server.shutdown
+
+def start_gunicorn(args):
+    """Serve ``wsgi:app`` with gunicorn on a free local port; returns (base url, stop function)."""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    env = dict(
+        os.environ,
+        BIND=f'127.0.0.1:{port}',
+        WEB_CONCURRENCY=str(args.workers),
+        WEB_THREADS=str(args.threads),
+        WEB_STREAM_THREADS=str(args.stream_threads),
+        GUNICORN_ACCESS_LOG='',
+        # Production config would mark session cookies Secure, which plain HTTP drops
+        FLASK_CONFIG=os.environ.get('FLASK_CONFIG', 'development')
+    )
+    if args.ai_latency_ms is not None:
+        env['LOCAL_AI_LATENCY_MS'] = str(args.ai_latency_ms)
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                               cwd=ROOT, env=env)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 60
+    while True:
+        if process.poll() is not None:
+            raise SystemExit(f'gunicorn exited with status {process.returncode}')
+        try:
+            requests.get(f'{base_url}/api/queries', timeout=1)
+            break
+        except requests.RequestException:
+            if time.monotonic() > deadline:
+                process.kill()
+                raise SystemExit('gunicorn did not start within 60s')
+            time.sleep(0.2)
+
+    def stop_server():
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=60)
+    return base_url, stop_server
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def summarize(samples, seconds):
+    timings = sorted(elapsed for _, elapsed, _ in samples)
+    statuses = Counter(str(status) for _, _, status in samples)
+    errors = sum(count for status, count in statuses.items() if not 200 <= int(status) < 400)
+    return {
+        'requests': len(samples),
+        'rps': round(len(samples) / seconds, 2),
+        'error_rate': round(errors / len(samples), 4),
+        'statuses': dict(statuses),
+        'mean_ms': round(sum(timings) / len(timings) * 1000, 2),
+        'p50_ms': round(percentile(timings, 0.5) * 1000, 2),
+        'p95_ms': round(percentile(timings, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(timings, 0.99) * 1000, 2),
+    }
+
+def compare(report, baseline, tolerance, min_delta_ms):
+    """Endpoints whose p95, throughput or error rate got worse than the baseline allows."""
+    regressions = []
+    for endpoint, current in report['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(endpoint)
+        if previous is None:
+            continue
+        checks = [
+            ('p95_ms', current['p95_ms'] > previous['p95_ms'] * (1 + tolerance)
+             and current['p95_ms'] - previous['p95_ms'] > min_delta_ms),
+            ('rps', current['rps'] < previous['rps'] * (1 - tolerance)),
+            ('error_rate', current['error_rate'] > previous['error_rate'] + 0.01),
+        ]
+        regressions += [
+            {'endpoint': endpoint, 'metric': metric, 'baseline': previous[metric], 'current': current[metric]}
+            for metric, regressed in checks if regressed
+        ]
+    return regressions
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown endpoint '{name}', expected one of {', '.join(DEFAULT_MIX)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--duration', type=float, default=15.0, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=2.0, help='unmeasured seconds before that')
+    parser.add_argument('--concurrency', type=int, default=16, help='virtual users')
+    parser.add_argument('--think-ms', type=float, default=0.0,
+                        help='mean pause between a virtual user\'s requests')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help='endpoint=weight pairs, e.g. submit=10,patient_list=30')
+    parser.add_argument('--patients', type=int, default=200)
+    parser.add_argument('--clinicians-per-specialization', type=int, default=2)
+    parser.add_argument('--queries', type=int, default=5000, help='seeded queries')
+    parser.add_argument('--ai-latency-ms', type=float, default=None,
+                        help='local provider latency for submitted queries (default: configured)')
+    parser.add_argument('--seed', type=int, default=None, help='make seeding and traffic repeatable')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='serve with gunicorn and this many worker processes (default: in-process server)')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--stream-threads', type=int, default=0,
+                        help='WEB_STREAM_THREADS for gunicorn (the mix opens no streams, so none by default)')
+    parser.add_argument('--output', default=None, help='also write the report here')
+    parser.add_argument('--save-baseline', default=None, help='store this run as a baseline')
+    parser.add_argument('--baseline', default=None, help='compare against a stored baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed relative p95/throughput regression')
+    parser.add_argument('--min-delta-ms', type=float, default=2.0,
+                        help='ignore p95 increases smaller than this')
+    args = parser.parse_args()
+
+    app = create_app()
+    if args.ai_latency_ms is not None:
+        local_provider.latency = args.ai_latency_ms / 1000
+    patients, clinicians, pending = seed(app, args)
+    with app.app_context():
+        max_query_id = db.session.query(db.func.max(Query.id)).scalar()
+        database = db.engine.url.get_backend_name()
+
+    if args.workers:
+        base_url, stop_server = start_gunicorn(args)
+        server = {'type': 'gunicorn', 'workers': args.workers, 'threads': args.threads,
+                  'stream_threads': args.stream_threads}
+    else:
+        base_url, stop_server = start_server(app)
+        server = {'type': 'werkzeug'}
+
+    shared = {
+        'lock': threading.Lock(), 'pending': pending, 'max_query_id': max_query_id,
+        'patients': patients, 'clinicians': clinicians
+    }
+    stop = threading.Event()
+    users = [VirtualUser(i, base_url, args.mix, shared, stop, args) for i in range(args.concurrency)]
+    for user in users:
+        user.login()
+    for user in users:
+        user.start()
+    time.sleep(args.warmup)
+    measure_from = time.perf_counter()
+    time.sleep(args.duration)
+    measure_to = time.perf_counter()
+    stop.set()
+    for user in users:
+        user.join()
+    stop_server()
+
+    by_endpoint = {}
+    for user in users:
+        for endpoint, started, elapsed, status in user.samples:
+            if measure_from <= started < measure_to:
+                by_endpoint.setdefault(endpoint, []).append((started, elapsed, status))
+    measured = [sample for samples in by_endpoint.values() for sample in samples]
+    report = {
+        'database': database,
+        'ai_provider': app.config['AI_PROVIDER'],
+        'server': server,
+        'concurrency': args.concurrency,
+        'duration_seconds': args.duration,
+        'seeded': {'patients': len(patients), 'queries': args.queries},
+        'mix': args.mix,
+        'total': summarize(measured, args.duration) if measured else None,
+        'endpoints': {
+            endpoint: summarize(samples, args.duration)
+            for endpoint, samples in sorted(by_endpoint.items())
+        },
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report['regressions'] = compare(report, baseline, args.tolerance, args.min_delta_ms)
+        exit_code = 1 if report['regressions'] else 0
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            f.write(output + '\n')
+    sys.exit(exit_code)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""Measure login throughput with password hashing inline and on the thread pool.
+
+Runs a burst of concurrent logins against a throwaway SQLite database
+while a probe thread keeps calling a cheap endpoint, once with hashing in
+the request threads (``PASSWORD_HASH_WORKERS=0``) and once on the pool.
+The probe latency shows how much a login burst slows everything else.
+
+    python benchmarks/password_hashing.py --users 20 --logins 200 --workers 2
+    python benchmarks/password_hashing.py --method pbkdf2:sha256:600000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DATABASE_FILE = os.path.join(tempfile.mkdtemp(prefix='password-bench-'), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DATABASE_FILE}'
+os.environ.setdefault('AI_PROVIDER', 'local')
+# Every login comes from one address; don't let the login limit cut the burst short
+os.environ.setdefault('RATE_LIMIT_BACKEND', 'none')
+
+from app import create_app, db
+from app.models.user import User
+from app.services.password_hasher import password_hasher
+
+PASSWORD = 'Bench-Passw0rd'
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def seed_users(app, count):
+    with app.app_context():
+        db.create_all()
+        # Every benchmark user shares one password, so hash it once
+        password_hash = password_hasher.hash(PASSWORD)
+        db.session.execute(User.__table__.insert(), [
+            {
+                'email': f'bench{i}@example.com',
+                'password_hash': password_hash,
+                'first_name': 'Bench',
+                'last_name': str(i),
+                'role': 'patient'
+            }
+            for i in range(count)
+        ])
+        db.session.commit()
+
+def probe(app, stop, timings):
+    """Time an unauthenticated request that never touches a password."""
+    client = app.test_client()
+    while not stop.is_set():
+        start = time.perf_counter()
+        client.get('/api/queries')
+        timings.append(time.perf_counter() - start)
+        time.sleep(0.01)
+
+def run_mode(app, workers, args):
+    app.config['PASSWORD_HASH_WORKERS'] = workers
+    password_hasher.init_app(app)
+
+    def login(i):
+        client = app.test_client()
+        start = time.perf_counter()
+        response = client.post('/api/auth/login', json={
+            'email': f'bench{i % args.users}@example.com',
+            'password': PASSWORD
+        })
+        return response.status_code, time.perf_counter() - start
+
+    # Warm the pool so thread start-up isn't counted
+    login(0)
+
+    stop = threading.Event()
+    probe_timings = []
+    prober = threading.Thread(target=probe, args=(app, stop, probe_timings), daemon=True)
+    prober.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(login, range(args.logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    prober.join()
+    password_hasher.shutdown()
+
+    timings = [seconds for status, seconds in results if status == 200]
+    statuses = {}
+    for status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        'hash_workers': workers,
+        'statuses': statuses,
+        'logins_per_second': round(len(timings) / elapsed, 2),
+        'login_p50_ms': round(percentile(timings, 0.5) * 1000, 2) if timings else None,
+        'login_p99_ms': round(percentile(timings, 0.99) * 1000, 2) if timings else None,
+        'probe_requests': len(probe_timings),
+        'probe_p50_ms': round(percentile(probe_timings, 0.5) * 1000, 2) if probe_timings else None,
+        'probe_p99_ms': round(percentile(probe_timings, 0.99) * 1000, 2) if probe_timings else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--logins', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=16,
+                        help='login requests in flight at once')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2,
+                        help='hashing threads for the pooled run')
+    parser.add_argument('--method', default=None,
+                        help='PASSWORD_HASH_METHOD to benchmark (default: configured)')
+    args = parser.parse_args()
+
+    app = create_app()
+    if args.method:
+        app.config['PASSWORD_HASH_METHOD'] = args.method
+    app.config['PASSWORD_HASH_WORKERS'] = 0
+    password_hasher.init_app(app)
+    seed_users(app, args.users)
+
+    inline = run_mode(app, 0, args)
+    pooled = run_mode(app, args.workers, args)
+    print(json.dumps({
+        'method': password_hasher.method,
+        'cpu_count': os.cpu_count(),
+        'inline': inline,
+        'pooled': pooled,
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+"""Check that hot-path queries are served by indexes, not sequential scans.
+
+Seeds a large synthetic dataset, runs ANALYZE, then EXPLAINs each query
+the dashboards, work queue, assignment, stats and search endpoints
+issue. Exits non-zero if any plan falls back to a full scan of
+``queries`` or ``users``, so it can gate CI after model or migration
+changes.
+
+Everything runs in one transaction that is rolled back, so pointing it at
+a development Postgres database leaves no rows behind. Without
+``--database-url`` it uses a temporary SQLite file.
+
+    python benchmarks/plan_check.py
+    python benchmarks/plan_check.py --database-url postgresql://... --queries 500000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import load_only
+from app import db
+from app.models.query import Query, URGENCY_RANKS
+from app.models.user import User
+from app.services.assignment import OPEN_STATUSES
+from app.services.search import search_statement, fts5_match, HEADLINE_OPTIONS
+from app.services.work_queue import peek_query, claim_candidates
+from app.utils.pagination import keyset_query, encode_cursor
+from app.utils.specialization import Specialization
+
+queries = Query.__table__
+users = User.__table__
+
+SCANNED_TABLES = ('queries', 'users')
+
+# Roughly what a long-running deployment looks like: most queries reviewed
+STATUS_WEIGHTS = {'verified': 85, 'pending': 10, 'processing': 3, 'failed': 2}
+
+# Page size the list and queue endpoints use by default
+PAGE_LIMIT = 10
+
+def _summary(query):
+    # List endpoints load only the summary columns
+    return query.options(load_only(
+        *(getattr(Query, column) for column in Query.SUMMARY_COLUMNS), raiseload=True
+    ))
+
+def hot_queries(dialect, patient_id, clinician_id):
+    """The statements issued on every dashboard, work queue, assignment and stats request.
+
+    Built with the same helpers the endpoints use, so a change to a query's
+    shape is checked here too. Dashboards are checked on the first page and
+    on a later page (with a keyset cursor).
+    """
+    now = datetime.utcnow()
+    cursor = encode_cursor(now - timedelta(days=30), 2 ** 31 - 1)
+    patient = _summary(Query.query.filter_by(patient_id=patient_id))
+    pending = _summary(Query.query.filter_by(status='pending'))
+    claim = claim_candidates(clinician_id, now)
+    # claim_next locks a page on PostgreSQL and over-fetches elsewhere
+    if dialect == 'postgresql':
+        claim = claim.limit(1).with_for_update(skip_locked=True)
+    else:
+        claim = claim.limit(2)
+    statements = {
+        'patient_dashboard': keyset_query(patient, Query, PAGE_LIMIT),
+        'patient_dashboard_next_page': keyset_query(patient, Query, PAGE_LIMIT, cursor),
+        'clinician_dashboard': keyset_query(pending, Query, PAGE_LIMIT),
+        'clinician_dashboard_next_page': keyset_query(pending, Query, PAGE_LIMIT, cursor),
+        'work_queue_peek': peek_query(clinician_id, PAGE_LIMIT, now),
+        'work_queue_claim': claim,
+    }
+    statements = {name: query.statement for name, query in statements.items()}
+    statements.update({
+        'assignment_roster': select(users.c.id, users.c.specialization)
+            .where(users.c.role == 'clinician'),
+        'assignment_open_counts': select(queries.c.clinician_id, func.count(queries.c.id))
+            .where(queries.c.clinician_id.isnot(None), queries.c.status.in_(OPEN_STATUSES))
+            .group_by(queries.c.clinician_id),
+        'clinician_stats_reviewed': select(func.count(queries.c.id))
+            .where(queries.c.clinician_id == clinician_id, queries.c.status == 'verified'),
+        'clinician_stats_open': select(func.count(queries.c.id))
+            .where(queries.c.clinician_id == clinician_id, queries.c.status.in_(OPEN_STATUSES)),
+    })
+    return statements
+
+def search_queries(dialect):
+    """The search statement for a term in every row and a term in none.
+
+    On PostgreSQL the estimated rows of the bitmap scan show how many
+    matches a common term reads before the newest are kept.
+    """
+    terms = {'search_common_term': 'question', 'search_rare_term': 'zebrafish'}
+    params = {'limit': 21, 'offset': 0, 'max_candidates': 10000}
+    statements = {}
+    for name, term in terms.items():
+        if dialect == 'postgresql':
+            bound = dict(params, terms=term, options=HEADLINE_OPTIONS)
+        else:
+            bound = dict(params, match=fts5_match(term))
+        statements[name] = search_statement(dialect).bindparams(**bound)
+    return statements
+
+def seed(connection, patients, clinicians, total_queries):
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    specializations = Specialization.list()
+
+    def user_rows(role, count, offset):
+        return [{
+            'email': f'{role}{offset + i}@plan-check.invalid',
+            'password_hash': 'x',
+            'first_name': role,
+            'last_name': str(i),
+            'role': role,
+            'specialization': specializations[i % len(specializations)] if role == 'clinician' else None,
+            'created_at': now,
+            'updated_at': now
+        } for i in range(count)]
+
+    start = connection.execute(select(func.coalesce(func.max(users.c.id), 0))).scalar()
+    connection.execute(users.insert(), user_rows('patient', patients, start))
+    connection.execute(users.insert(), user_rows('clinician', clinicians, start + patients))
+    patient_ids = list(range(start + 1, start + patients + 1))
+    clinician_ids = list(range(start + patients + 1, start + patients + clinicians + 1))
+
+    statuses = list(STATUS_WEIGHTS)
+    weights = list(STATUS_WEIGHTS.values())
+    urgencies = list(URGENCY_RANKS)
+    for chunk_start in range(0, total_queries, 10000):
+        rows = []
+        for _ in range(min(10000, total_queries - chunk_start)):
+            status = rng.choices(statuses, weights)[0]
+            urgency = rng.choice(urgencies)
+            created_at = now - timedelta(seconds=rng.randint(0, 365 * 86400))
+            rows.append({
+                'patient_id': rng.choice(patient_ids),
+                'clinician_id': rng.choice(clinician_ids) if status != 'processing' else None,
+                'category': rng.choice(specializations),
+                'question': 'plan check question',
+                'status': status,
+                'urgency_level': urgency,
+                'urgency_rank': URGENCY_RANKS[urgency],
+                'is_anonymous': False,
+                'created_at': created_at,
+                'updated_at': created_at,
+                'reviewed_at': created_at + timedelta(hours=2) if status == 'verified' else None
+            })
+        connection.execute(queries.insert(), rows)
+
+    connection.execute(text('ANALYZE'))
+    return patient_ids[0], clinician_ids[0]
+
+def explain(connection, statement):
+    """Return (plan lines, tables read by a full scan) for one statement."""
+    dialect = connection.dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+
+    if dialect.name == 'postgresql':
+        plan = connection.execute(text(f'EXPLAIN (FORMAT JSON) {sql}')).scalar()
+        lines, scanned = [], []
+
+        def walk(node, depth=0):
+            relation = node.get('Relation Name')
+            index = node.get('Index Name')
+            lines.append('  ' * depth + node['Node Type']
+                         + (f' on {relation}' if relation else '')
+                         + (f' using {index}' if index else '')
+                         + f" (rows={node['Plan Rows']})")
+            if node['Node Type'] == 'Seq Scan' and relation in SCANNED_TABLES:
+                scanned.append(relation)
+            for child in node.get('Plans', []):
+                walk(child, depth + 1)
+
+        walk(plan[0]['Plan'])
+        return lines, scanned
+
+    if dialect.name == 'sqlite':
+        rows = connection.execute(text(f'EXPLAIN QUERY PLAN {sql}')).fetchall()
+        lines = [row[3] for row in rows]
+        scanned = []
+        for detail in lines:
+            words = detail.split()
+            # "SCAN queries" reads the whole table; "SCAN queries USING INDEX ..." does not
+            if words[:1] == ['SCAN'] and len(words) > 1 and words[1] in SCANNED_TABLES \
+                    and 'INDEX' not in detail:
+                scanned.append(words[1])
+        return lines, scanned
+
+    raise SystemExit(f'EXPLAIN parsing is not implemented for {dialect.name}')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', default=None,
+                        help='database to check (defaults to a temporary SQLite file)')
+    parser.add_argument('--queries', type=int, default=100000)
+    parser.add_argument('--patients', type=int, default=5000)
+    parser.add_argument('--clinicians', type=int, default=200)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'plan_check.db')}"
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    db.init_app(app)
+
+    results = {}
+    with app.app_context(), db.engine.connect() as connection:
+        dialect = connection.dialect.name
+        transaction = connection.begin()
+        try:
+            db.metadata.create_all(connection)
+            patient_id, clinician_id = seed(connection, args.patients, args.clinicians, args.queries)
+            statements = dict(hot_queries(dialect, patient_id, clinician_id), **search_queries(dialect))
+            for name, statement in statements.items():
+                lines, scanned = explain(connection, statement)
+                results[name] = {'plan': lines, 'sequential_scans': scanned}
+        finally:
+            transaction.rollback()
+
+    failures = sorted(name for name, result in results.items() if result['sequential_scans'])
+    print(json.dumps({
+        'dialect': dialect,
+        'queries': args.queries,
+        'results': results,
+        'failures': failures
+    }, indent=2))
+    if tmpdir is not None:
+        tmpdir.cleanup()
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Compare input tokens and latency for the ways of sending the fixed prompt.
+
+Each prompt kind (categorize, answer, structured) is sent three ways:
+
+- ``inline``: instruction and question together in the message, as every
+  call did before the instructions were split out
+- ``system_instruction``: the instruction as the request's system instruction
+- ``context_cache``: the instruction uploaded once as cached content
+
+With ``--live`` the calls go to Gemini with ``GEMINI_API_KEY`` and token
+counts come from the responses' usage metadata (context caching needs a
+model and instruction size the API accepts, otherwise that mode falls back
+inline). Offline, no call is made and tokens are estimated at about four
+characters per token, as the local provider reports them.
+
+    python benchmarks/prompt_tokens.py
+    python benchmarks/prompt_tokens.py --live --iterations 3
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from google.genai import types
+from config import config
+from app.services.gemini_client import gemini_client
+from app.services.ai_service import AIService
+from app.services.local_provider import _token_estimate
+from app.services.prompts import (
+    PROMPT_VERSION, CATEGORIZE_INSTRUCTION, ANSWER_INSTRUCTION, STRUCTURED_INSTRUCTION,
+    categorize_message, answer_message, structured_message
+)
+
+QUESTION = "I get chest pain when climbing stairs"
+CATEGORY = "Cardiology"
+
+def kinds(app):
+    with app.app_context():
+        schema = AIService()._structured_schema()
+    json_output = {'response_mime_type': 'application/json', 'response_schema': schema}
+    return [
+        ('categorize', CATEGORIZE_INSTRUCTION, categorize_message(QUESTION), {}),
+        ('answer', ANSWER_INSTRUCTION, answer_message(QUESTION, CATEGORY), {}),
+        ('structured', STRUCTURED_INSTRUCTION, structured_message(QUESTION), json_output),
+    ]
+
+def request_for(mode, model, label, instruction, message, extra):
+    if mode == 'inline':
+        return f"{instruction}\n\n{message}", types.GenerateContentConfig(**extra) if extra else None
+    if mode == 'system_instruction':
+        return message, types.GenerateContentConfig(system_instruction=instruction, **extra)
+    return message, gemini_client.prompt_config(model, instruction, label, **extra)
+
+def estimate(mode, kind):
+    _, instruction, message, _ = kind
+    contents = f"{instruction}\n\n{message}" if mode == 'inline' else message
+    prompt_tokens = _token_estimate(instruction) + _token_estimate(message)
+    return {
+        'request_chars': len(contents),
+        'prompt_tokens': prompt_tokens,
+        'cached_tokens': _token_estimate(instruction) if mode == 'context_cache' else 0,
+        'uncached_prompt_tokens': _token_estimate(message) if mode == 'context_cache' else prompt_tokens,
+    }
+
+def run(app, mode, kind, iterations):
+    label, instruction, message, extra = kind
+    model = gemini_client.model
+    timings = []
+    usage = None
+    for _ in range(iterations):
+        contents, generation_config = request_for(mode, model, label, instruction, message, extra)
+        start = time.perf_counter()
+        response = gemini_client.client.models.generate_content(model=model, contents=contents, config=generation_config)
+        timings.append(time.perf_counter() - start)
+        usage = getattr(response, 'usage_metadata', None)
+    prompt_tokens = getattr(usage, 'prompt_token_count', None) or 0
+    cached_tokens = getattr(usage, 'cached_content_token_count', None) or 0
+    return {
+        'request_chars': len(contents),
+        'prompt_tokens': prompt_tokens,
+        'cached_tokens': cached_tokens,
+        'uncached_prompt_tokens': prompt_tokens - cached_tokens,
+        'mean_ms': round(statistics.mean(timings) * 1000, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--live', action='store_true', help='call the real Gemini API')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object(config['default'])
+    app.config['AI_CONTEXT_CACHE'] = True
+    gemini_client.init_app(app)
+
+    results = {}
+    for kind in kinds(app):
+        results[kind[0]] = {
+            mode: run(app, mode, kind, args.iterations) if args.live else estimate(mode, kind)
+            for mode in ('inline', 'system_instruction', 'context_cache')
+        }
+    print(json.dumps({
+        'backend': 'gemini' if args.live else 'estimate',
+        'prompt_version': PROMPT_VERSION,
+        'kinds': results,
+        'cached_contexts': gemini_client.info()['cached_contexts'],
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
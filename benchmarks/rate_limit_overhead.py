@@ -0,0 +1,108 @@
+"""Measure what the rate limiter adds to each request, per backend.
+
+For every backend this times raw ``hit`` calls and a trivial view served
+with and without ``@rate_limit``, against a throwaway SQLite database.
+The Redis backend runs when ``--redis-url`` is given, or against
+fakeredis when it is installed.
+
+    python benchmarks/rate_limit_overhead.py --iterations 2000
+    python benchmarks/rate_limit_overhead.py --redis-url redis://localhost:6379/15
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DATABASE_FILE = os.path.join(tempfile.mkdtemp(prefix='rate-limit-bench-'), 'bench.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DATABASE_FILE}'
+os.environ.setdefault('AI_PROVIDER', 'local')
+
+from flask import jsonify
+from app import create_app, db
+from app.services.rate_limiter import (
+    rate_limiter, MemoryRateLimitBackend, DatabaseRateLimitBackend, RedisRateLimitBackend
+)
+from app.utils.decorators import rate_limit
+
+# Generous enough that no benchmark request is ever refused
+LIMIT = 10 ** 9
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def summarize(timings):
+    return {
+        'mean_us': round(sum(timings) / len(timings) * 1e6, 1),
+        'p50_us': round(percentile(timings, 0.5) * 1e6, 1),
+        'p99_us': round(percentile(timings, 0.99) * 1e6, 1),
+    }
+
+def time_calls(fn, iterations):
+    fn()  # warm up
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def ping():
+    return jsonify({'ok': True})
+
+def build_app():
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+    app.add_url_rule('/bench/plain', 'bench_plain', ping)
+    app.add_url_rule('/bench/limited', 'bench_limited', rate_limit(limit=LIMIT, per=60)(ping))
+    return app
+
+def backends(args):
+    yield MemoryRateLimitBackend()
+    yield DatabaseRateLimitBackend()
+    if args.redis_url:
+        yield RedisRateLimitBackend.from_url(args.redis_url)
+    else:
+        try:
+            import fakeredis
+        except ImportError:
+            return
+        yield RedisRateLimitBackend(fakeredis.FakeRedis())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--redis-url', default=None)
+    args = parser.parse_args()
+
+    app = build_app()
+    client = app.test_client()
+    plain = summarize(time_calls(lambda: client.get('/bench/plain'), args.iterations))
+
+    results = {}
+    for backend in backends(args):
+        rate_limiter.backend = backend
+        with app.app_context():
+            hit = summarize(time_calls(
+                lambda: backend.hit('bench:hit', LIMIT, 60), args.iterations
+            ))
+        limited = summarize(time_calls(lambda: client.get('/bench/limited'), args.iterations))
+        results[backend.name] = {
+            'hit': hit,
+            'request': limited,
+            'request_overhead_p50_us': round(limited['p50_us'] - plain['p50_us'], 1),
+        }
+
+    print(json.dumps({
+        'iterations': args.iterations,
+        'unlimited_request': plain,
+        'backends': results,
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""Measure how each endpoint's latency grows with the size of the queries table.
+
+Grows one database step by step to each of ``--sizes`` rows with the same
+seeder as ``flask seed``, and after every step times each endpoint on its
+own, one request at a time. That isolates per-request database cost from
+concurrency effects. The patient is the heaviest one, since the seeder
+gives the first patients the most queries.
+
+Defaults to a temporary SQLite file; set ``DATABASE_URL`` to a scratch
+Postgres database to measure the production engine. The 10M step takes a
+while to seed, so pass smaller ``--sizes`` for a quick run.
+
+    python benchmarks/scaling.py --sizes 10000,100000
+    DATABASE_URL=postgresql://... python benchmarks/scaling.py --iterations 50
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DATABASE_FILE = os.path.join(tempfile.mkdtemp(prefix='scaling-'), 'bench.db')
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{DATABASE_FILE}')
+os.environ.setdefault('AI_PROVIDER', 'local')
+os.environ.setdefault('RATE_LIMIT_BACKEND', 'none')
+
+from app import create_app, db
+from app.models.query import Query
+from app.models.user import User
+from app.services.analytics import rebuild_rollups
+from app.services.seeder import seed_database, bulk_method, SEED_PASSWORD, SYMPTOMS
+from app.utils.specialization import Specialization
+
+# Search terms: one that matches a large share of queries, and specific phrases
+COMMON_SEARCH_TERM = 'pain'
+SEARCH_PHRASES = [symptom for symptoms in SYMPTOMS.values() for symptom in symptoms]
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def endpoints(rng, max_query_id, pending):
+    """(name, role, method, path or path factory, JSON body) for each timed request."""
+    return [
+        ('patient_list', 'patient', 'GET', '/api/queries?per_page=10', None),
+        ('patient_list_keyset', 'patient', 'GET', '/api/queries?limit=10', None),
+        ('clinician_list', 'clinician', 'GET', '/api/queries?per_page=10', None),
+        ('clinician_list_page_100', 'clinician', 'GET', '/api/queries?page=100&per_page=10', None),
+        ('clinician_list_keyset', 'clinician', 'GET', '/api/queries?limit=10', None),
+        ('query_detail', 'clinician', 'GET', lambda: f'/api/queries/{rng.randint(1, max_query_id)}', None),
+        ('work_queue', 'clinician', 'GET', '/api/queries/queue', None),
+        ('analytics', 'clinician', 'GET', '/api/queries/analytics', None),
+        ('clinician_stats', 'clinician', 'GET', '/api/clinician/stats', None),
+        ('search_common_term', 'clinician', 'GET', '/api/queries/search?' + urlencode({'q': COMMON_SEARCH_TERM}), None),
+        ('search_phrase', 'clinician', 'GET',
+         lambda: '/api/queries/search?' + urlencode({'q': f'"{rng.choice(SEARCH_PHRASES)}"'}), None),
+        ('search_filtered', 'clinician', 'GET', '/api/queries/search?' + urlencode({
+            'q': COMMON_SEARCH_TERM, 'status': 'verified', 'urgency': 'high',
+            'category': Specialization.CARDIOLOGY.value
+        }), None),
+        ('submit', 'patient', 'POST', '/api/queries', {'question': 'I have a cough that will not go away'}),
+        ('review', 'clinician', 'POST', lambda: f'/api/queries/{pending.pop()}/review',
+         {'response': 'Reviewed during the scaling benchmark.'}),
+    ]
+
+def login(app, email):
+    client = app.test_client()
+    response = client.post('/api/auth/login', json={'email': email, 'password': SEED_PASSWORD})
+    if response.status_code != 200:
+        raise SystemExit(f'Could not log in as {email}: {response.get_json()}')
+    return client
+
+def measure(app, clients, args):
+    rng = random.Random(args.seed)
+    with app.app_context():
+        max_query_id = db.session.query(db.func.max(Query.id)).scalar()
+        pending = [row.id for row in db.session.query(Query.id).filter_by(status='pending')
+                   .order_by(Query.id.desc()).limit(args.iterations + args.warmup)]
+    results = {}
+    for name, role, method, path, body in endpoints(rng, max_query_id, pending):
+        client = clients[role]
+        timings = []
+        statuses = set()
+        for i in range(args.warmup + args.iterations):
+            if name == 'review' and not pending:
+                break
+            url = path() if callable(path) else path
+            start = time.perf_counter()
+            response = client.open(url, method=method, json=body)
+            elapsed = time.perf_counter() - start
+            statuses.add(response.status_code)
+            if i >= args.warmup:
+                timings.append(elapsed)
+        if timings:
+            results[name] = {
+                'p50_ms': round(percentile(timings, 0.5) * 1000, 2),
+                'p95_ms': round(percentile(timings, 0.95) * 1000, 2),
+                'statuses': sorted(statuses),
+            }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000,1000000,10000000',
+                        help='comma-separated queries table sizes to measure at')
+    parser.add_argument('--patients', type=int, default=10000)
+    parser.add_argument('--clinicians-per-specialization', type=int, default=5)
+    parser.add_argument('--iterations', type=int, default=30, help='timed requests per endpoint and size')
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        seed_database(patients=args.patients, clinicians_per_specialization=args.clinicians_per_specialization,
+                      seed=args.seed)
+        method = bulk_method()
+        database = db.engine.url.get_backend_name()
+        patient = db.session.query(User.email).filter_by(role='patient').order_by(User.id).first().email
+        clinician = db.session.query(User.email).filter_by(role='clinician').order_by(User.id).first().email
+    clients = {'patient': login(app, patient), 'clinician': login(app, clinician)}
+
+    steps = []
+    for step, size in enumerate(sizes):
+        with app.app_context():
+            current = db.session.query(db.func.count(Query.id)).scalar()
+            started = time.perf_counter()
+            seed_database(queries=max(0, size - current), batch_size=args.batch_size, seed=args.seed + step)
+            rebuild_rollups()
+            seed_seconds = time.perf_counter() - started
+            rows = db.session.query(db.func.count(Query.id)).scalar()
+        print(f'Seeded {rows} queries in {seed_seconds:.1f}s; measuring', file=sys.stderr)
+        steps.append({
+            'rows': rows,
+            'seed_seconds': round(seed_seconds, 1),
+            'endpoints': measure(app, clients, args),
+        })
+
+    first, last = steps[0]['endpoints'], steps[-1]['endpoints']
+    print(json.dumps({
+        'database': database,
+        'bulk_method': method,
+        'steps': steps,
+        # How many times slower each endpoint's p95 got from the smallest to the largest size
+        'p95_growth': {
+            name: round(last[name]['p95_ms'] / first[name]['p95_ms'], 2)
+            for name in last if name in first and first[name]['p95_ms']
+        },
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
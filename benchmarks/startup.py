@@ -0,0 +1,184 @@
+"""Measure cold-start time: importing the app, create_app and the first request.
+
+Every sample is a fresh interpreter, so nothing is cached between runs.
+Each one reports:
+
+- ``import_ms``: ``from app import create_app``
+- ``create_app_ms``: building the app and its extensions
+- ``first_request_ms``: the first request through the test client (a
+  failed login, which touches the database but not the password hasher)
+- ``sdk_import_ms``: what the first AI call still pays to import the
+  provider's SDK (close to zero when it was preloaded)
+
+Scenarios: ``lazy`` is the default, ``preload`` sets ``APP_PRELOAD=true``
+and ``preload_fork`` also forks a worker after create_app, the way a
+preloading server master does, and times the worker's first request.
+Medians go to stdout as JSON; pass ``--save-baseline`` and ``--baseline``
+to track startup time across changes.
+
+    python benchmarks/startup.py --runs 10 --importtime 15
+    python benchmarks/startup.py --baseline /tmp/startup-baseline.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SCENARIOS = ('lazy', 'preload', 'preload_fork')
+
+def _ms(start, end):
+    return round((end - start) * 1000, 2)
+
+def first_request(app):
+    client = app.test_client()
+    response = client.post('/api/auth/login', json={'email': 'nobody@startup.example.com', 'password': 'x'})
+    if response.status_code != 401:
+        raise SystemExit(f'Unexpected first response {response.status_code}: {response.get_json()}')
+
+def sdk_import():
+    from app.services.ai_provider import ai_provider
+    ai_provider.preload()
+
+def child(fork):
+    """One sample, run in a fresh interpreter; prints its timings as JSON."""
+    started = time.perf_counter()
+    from app import create_app
+    imported = time.perf_counter()
+    app = create_app()
+    created = time.perf_counter()
+    sample = {'import_ms': _ms(started, imported), 'create_app_ms': _ms(imported, created)}
+
+    if fork:
+        read_end, write_end = os.pipe()
+        forked = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_end)
+            first_request(app)
+            answered = time.perf_counter()
+            sdk_import()
+            with os.fdopen(write_end, 'w') as pipe:
+                json.dump({'first_request_ms': _ms(forked, answered),
+                           'sdk_import_ms': _ms(answered, time.perf_counter())}, pipe)
+            os._exit(0)
+        os.close(write_end)
+        with os.fdopen(read_end) as pipe:
+            sample.update(json.load(pipe))
+        os.waitpid(pid, 0)
+    else:
+        first_request(app)
+        answered = time.perf_counter()
+        sdk_import()
+        sample.update({'first_request_ms': _ms(created, answered),
+                       'sdk_import_ms': _ms(answered, time.perf_counter())})
+    print(json.dumps(sample))
+
+def run_sample(scenario, env):
+    env = dict(env, APP_PRELOAD='true' if scenario != 'lazy' else 'false')
+    command = [sys.executable, os.path.abspath(__file__), '--child']
+    if scenario == 'preload_fork':
+        command.append('--fork')
+    started = time.perf_counter()
+    result = subprocess.run(command, env=env, cwd=ROOT, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        raise SystemExit(f'{scenario} sample failed:\n{result.stderr}')
+    sample = json.loads(result.stdout.strip().splitlines()[-1])
+    sample['process_ms'] = _ms(0, elapsed)
+    return sample
+
+def import_profile(env, top):
+    """Packages that take longest to import with ``app``, from ``-X importtime``."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'from app import create_app'],
+                            env=env, cwd=ROOT, capture_output=True, text=True)
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|', 2)
+        if not cumulative.strip().isdigit():
+            continue
+        # A package's first (outermost) import includes all of its submodules
+        package = name.strip().split('.')[0]
+        if package != 'app':
+            packages[package] = max(packages.get(package, 0), int(cumulative))
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {package: round(us / 1000, 1) for package, us in slowest}
+
+def compare(report, baseline, tolerance, min_delta_ms):
+    """Median timings that got slower than the baseline allows."""
+    regressions = []
+    for scenario, current in report['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(scenario, {})
+        for metric, value in current.items():
+            before = previous.get(metric)
+            if before is not None and value > before * (1 + tolerance) and value - before > min_delta_ms:
+                regressions.append({'scenario': scenario, 'metric': metric, 'baseline': before, 'current': value})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=7, help='fresh processes per scenario')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--provider', default='gemini',
+                        help='AI_PROVIDER for the samples; no calls are made, only imports')
+    parser.add_argument('--importtime', type=int, default=0, metavar='N',
+                        help='also list the N slowest top-level imports')
+    parser.add_argument('--baseline', default=None, help='compare against a saved report')
+    parser.add_argument('--save-baseline', default=None, help='write this report for later comparison')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative slowdown')
+    parser.add_argument('--min-delta-ms', type=float, default=50.0,
+                        help='ignore slowdowns smaller than this, whatever the ratio')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--fork', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.fork)
+        return
+
+    scenarios = [name for name in args.scenarios.split(',') if name]
+    if 'preload_fork' in scenarios and not hasattr(os, 'fork'):
+        scenarios.remove('preload_fork')
+
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='startup-'), 'bench.db')}")
+    env['AI_PROVIDER'] = args.provider
+    env.setdefault('RATE_LIMIT_BACKEND', 'none')
+    env.setdefault('PASSWORD_HASH_WORKERS', '0')
+    # Schema setup is not part of startup; do it once up front
+    subprocess.run([sys.executable, '-c', 'from app import create_app, db\n'
+                    'app = create_app()\nwith app.app_context(): db.create_all()'],
+                   env=env, cwd=ROOT, check=True)
+
+    report = {'provider': args.provider, 'runs': args.runs, 'scenarios': {}}
+    for scenario in scenarios:
+        samples = [run_sample(scenario, env) for _ in range(args.runs)]
+        report['scenarios'][scenario] = {
+            metric: round(statistics.median(sample[metric] for sample in samples), 2)
+            for metric in samples[0]
+        }
+    if args.importtime:
+        report['slowest_imports_ms'] = import_profile(env, args.importtime)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance, args.min_delta_ms)
+        report['regressions'] = regressions
+        exit_code = 1 if regressions else 0
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    sys.exit(exit_code)
+
+if __name__ == '__main__':
+    main()
@@ -42,7 +42,7 @@ import {
   Legend,
   CartesianGrid,
 } from 'recharts';
-import { api, QueryResponse, Query } from '../services/api';
+import { api, QueryResponse, QueryDetailResponse, Query } from '../services/api';
 
 const PageContainer = styled(Box)(({ theme }) => ({
   minHeight: '100vh',
@@ -160,24 +160,46 @@ interface Analytics {
   category_stats: Record<string, number>;
 }
 
+interface LatencySummary {
+  count: number;
+  p50_seconds: number | null;
+  p90_seconds: number | null;
+  p99_seconds: number | null;
+}
+
+interface ClinicianStats {
+  total_reviewed: number;
+  pending_reviews: number;
+  assigned_open: number;
+  avg_response_time_seconds: number;
+  latency: Record<string, LatencySummary & { by_urgency: Record<string, LatencySummary> }>;
+}
+
+// Same order as the server's work queue: most urgent first, then oldest
+const URGENCY_RANKS: Record<string, number> = { high: 0, medium: 1, normal: 2, low: 3 };
+
+const compareQueueOrder = (a: Query, b: Query) =>
+  (URGENCY_RANKS[a.urgency_level] ?? 2) - (URGENCY_RANKS[b.urgency_level] ?? 2)
+  || a.created_at.localeCompare(b.created_at)
+  || a.id - b.id;
+
 const ClinicianDashboard = () => {
   const [queries, setQueries] = useState<Query[]>([]);
   const [selectedQuery, setSelectedQuery] = useState<Query | null>(null);
   const [reviewText, setReviewText] = useState('');
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
-  const [page, setPage] = useState(1);
-  const [totalPages, setTotalPages] = useState(1);
   const [showAnalytics, setShowAnalytics] = useState(false);
   const [analytics, setAnalytics] = useState<Analytics | null>(null);
+  const [clinicianStats, setClinicianStats] = useState<ClinicianStats | null>(null);
   const navigate = useNavigate();
 
   const fetchQueries = async () => {
     try {
       setLoading(true);
-      const response = await api.get<QueryResponse>(`api/queries?page=${page}&per_page=5`);
+      // This clinician's work queue: most urgent first, then oldest
+      const response = await api.get<QueryResponse>('api/queries/queue?limit=20');
       setQueries(response.queries);
-      setTotalPages(response.pages);
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Failed to fetch queries');
     } finally {
@@ -187,8 +209,12 @@ const ClinicianDashboard = () => {
 
   const fetchAnalytics = async () => {
     try {
-      const response = await api.get<Analytics>('api/queries/analytics');
+      const [response, stats] = await Promise.all([
+        api.get<Analytics>('api/queries/analytics'),
+        api.get<ClinicianStats>('api/clinician/stats'),
+      ]);
       setAnalytics(response);
+      setClinicianStats(stats);
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Failed to fetch analytics');
     }
@@ -196,11 +222,46 @@ const ClinicianDashboard = () => {
 
   useEffect(() => {
     fetchQueries();
-  }, [page]);
 
-  const handleQueryClick = (query: Query) => {
+    // Keep the queue current from pushed events instead of re-fetching it
+    const source = api.subscribeQueryEvents({
+      onQuery: async (type, query, partial) => {
+        if (partial) {
+          query = (await api.get<QueryDetailResponse>(`api/queries/${query.id}`)).query;
+        }
+        setQueries(prev => {
+          const rest = prev.filter(q => q.id !== query.id);
+          if (type === 'query.reviewed' || query.status !== 'pending') {
+            return rest;
+          }
+          return [...rest, query].sort(compareQueueOrder).slice(0, 20);
+        });
+      },
+      onResync: () => fetchQueries(),
+    });
+    return () => source.close();
+  }, []);
+
+  const handleQueryClick = async (query: Query) => {
+    // Claim the query so no one else reviews it; the claim also returns the full responses
     setSelectedQuery(query);
     setReviewText('');
+    try {
+      const claimed = await api.post<QueryDetailResponse>(`api/queries/${query.id}/claim`, {});
+      setSelectedQuery(claimed.query);
+    } catch (err) {
+      setSelectedQuery(null);
+      setError(err instanceof Error ? err.message : 'Failed to claim query');
+      fetchQueries();
+    }
+  };
+
+  const handleReviewCancel = async () => {
+    if (selectedQuery) {
+      // Hand the query back to the queue; an unreleased claim would expire anyway
+      api.delete(`api/queries/${selectedQuery.id}/claim`).catch(() => undefined);
+    }
+    setSelectedQuery(null);
   };
 
   const handleReviewSubmit = async () => {
@@ -211,8 +272,8 @@ const ClinicianDashboard = () => {
         response: reviewText,
       });
 
+      setQueries(prev => prev.filter(q => q.id !== selectedQuery.id));
       setSelectedQuery(null);
-      fetchQueries();
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Failed to submit review');
     }
@@ -255,6 +316,9 @@ const ClinicianDashboard = () => {
     return `${hours}h ${minutes}m`;
   };
 
+  const formatLatency = (seconds: number | null) =>
+    seconds === null ? '—' : formatResponseTime(seconds);
+
   return (
     <PageContainer>
       <StyledPaper>
@@ -315,24 +379,14 @@ const ClinicianDashboard = () => {
           <>
             <Box display="flex" alignItems="center" justifyContent="space-between" width="100%" mb={2}>
               <Typography variant="h6" sx={{ color: 'white' }}>
-                Pending Reviews
+                My Review Queue
               </Typography>
-              <Box display="flex" gap={1}>
-                <Button
-                  onClick={() => setPage(p => Math.max(1, p - 1))}
-                  disabled={page === 1}
-                  sx={{ borderRadius: '8px', textTransform: 'none' }}
-                >
-                  Previous
-                </Button>
-                <Button
-                  onClick={() => setPage(p => Math.min(totalPages, p + 1))}
-                  disabled={page === totalPages}
-                  sx={{ borderRadius: '8px', textTransform: 'none' }}
-                >
-                  Next
-                </Button>
-              </Box>
+              <Button
+                onClick={fetchQueries}
+                sx={{ borderRadius: '8px', textTransform: 'none' }}
+              >
+                Refresh
+              </Button>
             </Box>
 
             <List sx={{ width: '100%' }}>
@@ -412,7 +466,7 @@ const ClinicianDashboard = () => {
       {/* Query Review Dialog */}
       <Dialog 
         open={!!selectedQuery} 
-        onClose={() => setSelectedQuery(null)}
+        onClose={handleReviewCancel}
         maxWidth="md"
         fullWidth
         PaperProps={{
@@ -449,7 +503,7 @@ const ClinicianDashboard = () => {
               >
                 <MarkdownContainer>
                   <ReactMarkdown>
-                    {selectedQuery.ai_response}
+                    {selectedQuery.ai_response ?? selectedQuery.ai_response_preview ?? ''}
                   </ReactMarkdown>
                 </MarkdownContainer>
               </Paper>
@@ -487,7 +541,7 @@ const ClinicianDashboard = () => {
             </DialogContent>
             <DialogActions sx={{ borderTop: '1px solid rgba(255, 255, 255, 0.1)', p: 2 }}>
               <Button 
-                onClick={() => setSelectedQuery(null)}
+                onClick={handleReviewCancel}
                 sx={{ 
                   color: 'rgba(255, 255, 255, 0.7)',
                   '&:hover': {
@@ -624,6 +678,43 @@ const ClinicianDashboard = () => {
                   </StyledAnalyticsPaper>
                 </Grid>
 
+                {/* Review latency percentiles */}
+                {clinicianStats && (
+                  <Grid item xs={12}>
+                    <StyledAnalyticsPaper>
+                      <Typography variant="h6" gutterBottom sx={{ color: 'white' }}>
+                        My Review Latency
+                      </Typography>
+                      <Grid container spacing={2}>
+                        {Object.entries(clinicianStats.latency).map(([window, summary]) => (
+                          <Grid item xs={12} md={4} key={window}>
+                            <Box
+                              p={2}
+                              sx={{
+                                backgroundColor: 'rgba(255,255,255,0.03)',
+                                borderRadius: '8px',
+                                border: '1px solid rgba(255,255,255,0.1)'
+                              }}
+                            >
+                              <Typography variant="body1" sx={{ color: 'rgba(255,255,255,0.9)' }}>
+                                Last {window} ({summary.count} reviews)
+                              </Typography>
+                              <Typography variant="body2" sx={{ color: 'rgba(255,255,255,0.7)' }}>
+                                p50 {formatLatency(summary.p50_seconds)} · p90 {formatLatency(summary.p90_seconds)} · p99 {formatLatency(summary.p99_seconds)}
+                              </Typography>
+                              {Object.entries(summary.by_urgency).map(([urgency, byUrgency]) => (
+                                <Typography key={urgency} variant="caption" display="block" sx={{ color: 'rgba(255,255,255,0.5)' }}>
+                                  {urgency}: p90 {formatLatency(byUrgency.p90_seconds)} · p99 {formatLatency(byUrgency.p99_seconds)}
+                                </Typography>
+                              ))}
+                            </Box>
+                          </Grid>
+                        ))}
+                      </Grid>
+                    </StyledAnalyticsPaper>
+                  </Grid>
+                )}
+
                 {/* Detailed Stats */}
                 <Grid item xs={12}>
                   <StyledAnalyticsPaper>
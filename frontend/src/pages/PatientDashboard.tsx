@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import ReactMarkdown from 'react-markdown';
 import {
   Box,
@@ -27,7 +27,7 @@ import MedicalServicesIcon from '@mui/icons-material/MedicalServices';
 import RefreshIcon from '@mui/icons-material/Refresh';
 import AddIcon from '@mui/icons-material/Add';
 import { LogoutRounded as LogoutIcon } from '@mui/icons-material';
-import { api, Query, QueryResponse } from '../services/api';
+import { api, Query, QueryResponse, QueryDetailResponse, CreateQueryResponse } from '../services/api';
 import { useNavigate } from 'react-router-dom';
 import SpeechToText from '../components/SpeechToText';
 
@@ -158,7 +158,9 @@ const PatientDashboard = () => {
   const [openDialog, setOpenDialog] = useState(false);
   const [page, setPage] = useState(1);
   const [totalPages, setTotalPages] = useState(1);
+  const pageRef = useRef(1);
   const [showForm, setShowForm] = useState(false);
+  const [streamingAnswer, setStreamingAnswer] = useState<{ question: string; category?: string; text: string } | null>(null);
   const navigate = useNavigate();
 
   const fetchQueries = async () => {
@@ -174,25 +176,66 @@ const PatientDashboard = () => {
   };
 
   useEffect(() => {
+    pageRef.current = page;
     fetchQueries();
   }, [page]);
 
+  useEffect(() => {
+    // Update rows in place as the server pushes changes
+    const source = api.subscribeQueryEvents({
+      onQuery: async (_type, query, partial) => {
+        if (partial) {
+          query = (await api.get<QueryDetailResponse>(`api/queries/${query.id}`)).query;
+        }
+        setQueries(prev => {
+          if (prev.some(q => q.id === query.id)) {
+            return prev.map(q => (q.id === query.id ? { ...q, ...query } : q));
+          }
+          // New queries only belong at the top of the first page
+          return pageRef.current === 1 ? [query, ...prev].slice(0, 5) : prev;
+        });
+      },
+      onResync: () => fetchQueries(),
+    });
+    return () => source.close();
+  }, []);
+
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
     if (!newQuery.trim()) return;
 
     setSubmitting(true);
     try {
-      await api.post<Query>('api/queries', {
+      const created = await api.post<CreateQueryResponse>('api/queries', {
         question: newQuery,
         is_anonymous: false,
         urgency_level: urgencyLevel,
+        stream: true,
       });
 
       setNewQuery('');
       setUrgencyLevel('normal');
       setShowForm(false);
-      fetchQueries();
+
+      if (created.stream_url) {
+        // Show the answer as it is generated instead of waiting for all of it
+        setStreamingAnswer({ question: created.query.question, text: '' });
+        api.streamQuery(created.stream_url, {
+          onCategory: (category) => setStreamingAnswer(prev => prev && { ...prev, category }),
+          onChunk: (text) => setStreamingAnswer(prev => prev && { ...prev, text: prev.text + text }),
+          onDone: () => setStreamingAnswer(null),
+          onError: (message) => {
+            setStreamingAnswer(null);
+            setError(message);
+            fetchQueries();
+          },
+        });
+      } else if (created.query.status === 'processing') {
+        // The AI answer is produced in the background; refresh once it lands
+        api.waitForQuery(created.query.id)
+          .then(() => fetchQueries())
+          .catch(() => undefined);
+      }
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Failed to create query');
     } finally {
@@ -200,19 +243,29 @@ const PatientDashboard = () => {
     }
   };
 
-  const handleQueryClick = (query: Query) => {
+  const handleQueryClick = async (query: Query) => {
+    // List rows only carry a preview; fetch the full responses on open
     setSelectedQuery(query);
     setOpenDialog(true);
+    try {
+      const detail = await api.get<QueryDetailResponse>(`api/queries/${query.id}`);
+      setSelectedQuery(detail.query);
+    } catch (err) {
+      setError(err instanceof Error ? err.message : 'Failed to fetch query');
+    }
   };
 
   const getStatusColor = (status: Query['status']) => {
     switch (status) {
       case 'pending':
         return 'warning';
+      case 'processing':
       case 'pending_review':
         return 'info';
       case 'verified':
         return 'success';
+      case 'failed':
+        return 'error';
       default:
         return 'default';
     }
@@ -389,6 +442,28 @@ const PatientDashboard = () => {
           </QueryForm>
         )}
 
+        {streamingAnswer && (
+          <QueryForm>
+            <Box display="flex" alignItems="center" gap={1} mb={1}>
+              <CircularProgress size={16} />
+              <Typography variant="subtitle1" sx={{ color: 'white', fontWeight: 500 }}>
+                {streamingAnswer.question}
+              </Typography>
+              {streamingAnswer.category && (
+                <Chip
+                  label={streamingAnswer.category}
+                  variant="outlined"
+                  size="small"
+                  sx={{ color: 'white', borderColor: 'rgba(255, 255, 255, 0.5)' }}
+                />
+              )}
+            </Box>
+            <MarkdownContent sx={{ color: 'white' }}>
+              <ReactMarkdown>{streamingAnswer.text || 'Generating answer...'}</ReactMarkdown>
+            </MarkdownContent>
+          </QueryForm>
+        )}
+
         {queries.length > 0 ? (
           <>
             <Box display="flex" alignItems="center" justifyContent="space-between" width="100%" mb={2}>
@@ -510,7 +585,7 @@ const PatientDashboard = () => {
                 AI Response
               </Typography>
               <MarkdownContent>
-                <ReactMarkdown>{selectedQuery.ai_response || 'Pending'}</ReactMarkdown>
+                <ReactMarkdown>{selectedQuery.ai_response ?? selectedQuery.ai_response_preview ?? 'Pending'}</ReactMarkdown>
               </MarkdownContent>
 
               {selectedQuery.clinician_response && (
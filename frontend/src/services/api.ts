@@ -19,19 +19,71 @@ export interface Query {
   id: number;
   question: string;
   category: string;
-  status: 'pending' | 'pending_review' | 'verified';
+  status: 'processing' | 'pending' | 'pending_review' | 'verified' | 'failed';
   urgency_level: 'low' | 'normal' | 'high';
   created_at: string;
   ai_response?: string;
+  ai_response_preview?: string | null;
   clinician_response?: string;
   is_anonymous: boolean;
 }
 
+export const QUERY_EVENT_TYPES = [
+  'query.created',
+  'query.answered',
+  'query.assigned',
+  'query.reviewed',
+  'query.failed',
+] as const;
+
+export type QueryEventType = typeof QUERY_EVENT_TYPES[number];
+
+export interface QueryEventHandlers {
+  // `partial` events carry only id/status fields; fetch the query for the rest
+  onQuery: (type: QueryEventType, query: Query, partial: boolean) => void;
+  // Events may have been missed; re-fetch the list
+  onResync: () => void;
+}
+
+export interface QueryEventSubscription {
+  close: () => void;
+}
+
+export interface QueryDetailResponse {
+  query: Query;
+}
+
 export interface QueryResponse {
   queries: Query[];
   pages: number;
 }
 
+export interface CreateQueryResponse {
+  message: string;
+  query: Query;
+  status_url?: string;
+  stream_url?: string;
+}
+
+export interface StreamHandlers {
+  onCategory?: (category: string) => void;
+  onChunk: (text: string) => void;
+  onDone: (query: Query) => void;
+  onError: (message: string) => void;
+}
+
+export interface QueryStatus {
+  id: number;
+  status: Query['status'];
+  category: string;
+  clinician_id: number | null;
+  job: {
+    status: 'queued' | 'running' | 'completed' | 'failed';
+    attempts: number;
+    last_error: string | null;
+  } | null;
+}
+
 export interface RegisterFormData {
   email: string;
   password: string;
@@ -81,6 +133,20 @@ const api = {
     return response.json();
   },
 
+  async delete<T>(endpoint: string): Promise<T> {
+    const response = await fetch(`http://localhost:5000/${endpoint}`, {
+      method: 'DELETE',
+      credentials: 'include',
+    });
+    
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.error || 'Request failed');
+    }
+    
+    return response.json();
+  },
+
   async login(email: string, password: string, remember?: boolean): Promise<LoginResponse> {
     return this.post<LoginResponse>('api/auth/login', {
       email,
@@ -96,6 +162,83 @@ const api = {
   async logout(): Promise<void> {
     await this.post('api/auth/logout');
   },
+
+  // Subscribe to the Server-Sent Events stream of an AI answer
+  streamQuery(streamUrl: string, handlers: StreamHandlers): EventSource {
+    const source = new EventSource(formatUrl(streamUrl), { withCredentials: true });
+    source.addEventListener('category', (event) => {
+      handlers.onCategory?.(JSON.parse((event as MessageEvent).data).category);
+    });
+    source.addEventListener('chunk', (event) => {
+      handlers.onChunk(JSON.parse((event as MessageEvent).data).text);
+    });
+    source.addEventListener('done', (event) => {
+      source.close();
+      handlers.onDone(JSON.parse((event as MessageEvent).data).query);
+    });
+    source.addEventListener('error', (event) => {
+      source.close();
+      const data = (event as MessageEvent).data;
+      handlers.onError(data ? JSON.parse(data).error : 'Lost connection to the answer stream');
+    });
+    return source;
+  },
+
+  // Subscribe to pushed updates for the current user's queries
+  subscribeQueryEvents(handlers: QueryEventHandlers): QueryEventSubscription {
+    let source: EventSource | null = null;
+    let retryTimer: ReturnType<typeof setTimeout> | undefined;
+    let closed = false;
+    // EventSource reconnects on its own; anything sent meanwhile was missed
+    let connected = false;
+
+    const connect = () => {
+      const current = new EventSource(formatUrl('api/events'), { withCredentials: true });
+      source = current;
+      QUERY_EVENT_TYPES.forEach((type) => {
+        current.addEventListener(type, (event) => {
+          const data = JSON.parse((event as MessageEvent).data);
+          handlers.onQuery(type, data.query, data.partial);
+        });
+      });
+      current.addEventListener('resync', () => handlers.onResync());
+      current.onopen = () => {
+        if (connected) handlers.onResync();
+        connected = true;
+      };
+      // A refused connection (503 when the server has no stream capacity left)
+      // is not retried by EventSource; try again after 15-30 seconds
+      current.onerror = () => {
+        if (!closed && current.readyState === EventSource.CLOSED) {
+          retryTimer = setTimeout(connect, 15000 + Math.random() * 15000);
+        }
+      };
+    };
+    connect();
+
+    return {
+      close: () => {
+        closed = true;
+        clearTimeout(retryTimer);
+        source?.close();
+      },
+    };
+  },
+
+  // Long-poll the status endpoint until the AI pipeline has finished with a query
+  async waitForQuery(queryId: number, maxAttempts = 10): Promise<QueryStatus> {
+    let started = Date.now();
+    let status = await this.get<QueryStatus>(`api/queries/${queryId}/status?wait=25`);
+    for (let attempt = 1; status.status === 'processing' && attempt < maxAttempts; attempt++) {
+      // A busy server answers at once instead of holding the request; don't spin
+      if (Date.now() - started < 1000) {
+        await new Promise((resolve) => setTimeout(resolve, 3000));
+      }
+      started = Date.now();
+      status = await this.get<QueryStatus>(`api/queries/${queryId}/status?wait=25`);
+    }
+    return status;
+  },
 };
 
 export { api }; 
\ No newline at end of file
@@ -0,0 +1,36 @@
+"""Gunicorn settings for production serving.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+``WEB_CONCURRENCY`` worker processes (default: one per CPU), each with
+``WEB_THREADS`` request threads plus ``WEB_STREAM_THREADS`` threads for
+requests that stay open: event streams, answer streams and long-polls,
+which the app caps at that number (see ``app/services/stream_slots.py``).
+The app is loaded once in the master with ``APP_PRELOAD`` and then forked,
+so workers share the imported code and start immediately; each worker
+opens its own database connections and AI client after the fork. The same
+settings size each worker's connection pool (see ``app/utils/database.py``).
+"""
+import os
+
+# Must be set before config is imported: its settings are read at import
+os.environ.setdefault('APP_PRELOAD', 'true')
+
+from config import Config
+
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', '5000')}")
+workers = Config.WEB_CONCURRENCY
+threads = Config.WEB_THREADS + Config.WEB_STREAM_THREADS
+worker_class = 'gthread'
+preload_app = True
+
+# Event streams stay open for minutes; gthread workers heartbeat independently
+# of requests, so this only catches a stuck worker
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Empty to turn the access log off
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
@@ -0,0 +1,49 @@
+"""add review work queue
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:05:28.964766
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('queries', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('urgency_rank', sa.SmallInteger(), nullable=False, server_default='2'))
+        batch_op.add_column(sa.Column('claimed_by', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('claim_expires_at', sa.DateTime(), nullable=True))
+        batch_op.create_foreign_key('fk_queries_claimed_by_users', 'users', ['claimed_by'], ['id'])
+
+    # Rank existing queries by urgency (see URGENCY_RANKS) and fold the
+    # legacy 'pending_review' status into 'pending'
+    op.execute("""
+        UPDATE queries SET urgency_rank = CASE urgency_level
+            WHEN 'high' THEN 0
+            WHEN 'medium' THEN 1
+            WHEN 'low' THEN 3
+            ELSE 2
+        END
+    """)
+    op.execute("UPDATE queries SET status = 'pending' WHERE status = 'pending_review'")
+
+    with op.batch_alter_table('queries', schema=None) as batch_op:
+        batch_op.alter_column('urgency_rank', server_default=None)
+        batch_op.create_index('ix_queries_review_queue', ['clinician_id', 'urgency_rank', 'created_at'], unique=False, postgresql_where=sa.text("status = 'pending'"), sqlite_where=sa.text("status = 'pending'"))
+
+
+def downgrade():
+    with op.batch_alter_table('queries', schema=None) as batch_op:
+        batch_op.drop_index('ix_queries_review_queue', postgresql_where=sa.text("status = 'pending'"), sqlite_where=sa.text("status = 'pending'"))
+        batch_op.drop_constraint('fk_queries_claimed_by_users', type_='foreignkey')
+        batch_op.drop_column('claim_expires_at')
+        batch_op.drop_column('claimed_by')
+        batch_op.drop_column('urgency_rank')
@@ -0,0 +1,80 @@
+"""add query full-text search
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 01:02:11.482913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        # Adding a stored generated column rewrites the table under an
+        # exclusive lock, so run this in a maintenance window on large tables
+        op.execute("""
+            ALTER TABLE queries ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(question, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(clinician_response, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(ai_response, '')), 'C')
+            ) STORED
+        """)
+        op.execute("CREATE INDEX ix_queries_search_vector ON queries USING gin (search_vector)")
+    elif bind.dialect.name == 'sqlite':
+        # Triggers are lost if a later batch migration recreates the queries
+        # table; such a migration must create them again
+        op.execute("""
+            CREATE VIRTUAL TABLE queries_fts USING fts5(
+                question, ai_response, clinician_response,
+                content='queries', content_rowid='id', tokenize='porter unicode61'
+            )
+        """)
+        op.execute("""
+            CREATE TRIGGER queries_fts_insert AFTER INSERT ON queries BEGIN
+                INSERT INTO queries_fts (rowid, question, ai_response, clinician_response)
+                VALUES (new.id, new.question, new.ai_response, new.clinician_response);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER queries_fts_delete AFTER DELETE ON queries BEGIN
+                INSERT INTO queries_fts (queries_fts, rowid, question, ai_response, clinician_response)
+                VALUES ('delete', old.id, old.question, old.ai_response, old.clinician_response);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER queries_fts_update AFTER UPDATE OF question, ai_response, clinician_response ON queries BEGIN
+                INSERT INTO queries_fts (queries_fts, rowid, question, ai_response, clinician_response)
+                VALUES ('delete', old.id, old.question, old.ai_response, old.clinician_response);
+                INSERT INTO queries_fts (rowid, question, ai_response, clinician_response)
+                VALUES (new.id, new.question, new.ai_response, new.clinician_response);
+            END
+        """)
+        # Index the queries that already exist
+        op.execute("INSERT INTO queries_fts (queries_fts) VALUES ('rebuild')")
+
+    with op.batch_alter_table('queries', schema=None) as batch_op:
+        batch_op.create_index('ix_queries_created_at', ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('queries', schema=None) as batch_op:
+        batch_op.drop_index('ix_queries_created_at')
+
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("DROP INDEX ix_queries_search_vector")
+        op.execute("ALTER TABLE queries DROP COLUMN search_vector")
+    elif bind.dialect.name == 'sqlite':
+        op.execute("DROP TRIGGER queries_fts_update")
+        op.execute("DROP TRIGGER queries_fts_delete")
+        op.execute("DROP TRIGGER queries_fts_insert")
+        op.execute("DROP TABLE queries_fts")
@@ -1,6 +1,8 @@
+import os
 from app import create_app
 
-app = create_app()
+# Development server; use `gunicorn -c gunicorn.conf.py wsgi:app` in production
+app = create_app(os.environ.get('FLASK_CONFIG', 'default'))
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
+    app.run(debug=app.config['DEBUG'], host='0.0.0.0', port=5000)
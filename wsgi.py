@@ -0,0 +1,15 @@
+"""Production WSGI entry point: ``gunicorn -c gunicorn.conf.py wsgi:app``.
+
+Uses ``ProductionConfig`` unless ``FLASK_CONFIG`` names another one. Set
+``TRUSTED_PROXY_HOPS`` to the number of reverse proxies in front of the
+app so ``request.remote_addr`` is the client's address, not the proxy's.
+"""
+import os
+from werkzeug.middleware.proxy_fix import ProxyFix
+from app import create_app
+
+app = create_app(os.environ.get('FLASK_CONFIG', 'production'))
+
+if app.config.get('TRUSTED_PROXY_HOPS'):
+    hops = app.config['TRUSTED_PROXY_HOPS']
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)